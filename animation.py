@@ -0,0 +1,224 @@
+import math
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPainter, QPixmap, QColor
+
+from metrics import timed
+
+
+class Animation:
+    # frames: how many frames one loop has. fps: playback speed (0 = hold
+    # the first frame, nothing scheduled). rest: seconds to hold still
+    # between loops, so a loop reads as a fidget rather than a constant
+    # wobble. loops: stop after this many loops (None = forever).
+    def __init__(self, frames=1, fps=0.0, rest=0.0, loops=None, motion=None):
+        self.frames = frames
+        self.fps = fps
+        self.rest = rest
+        self.loops = loops
+        self.motion = motion
+
+
+def breathe(amount):
+    # Gentle vertical squash anchored at her feet
+    def motion(phase):
+        return 0.0, 1.0 + amount * math.sin(phase * 2.0 * math.pi)
+    return motion
+
+
+def bounce(height):
+    def motion(phase):
+        return -height * math.sin(phase * math.pi), 1.0
+    return motion
+
+
+# Per-look playback. Curious, agitated and peek are short reactions and stay
+# still; idle breathes now and then, sleep takes a few slow breaths as she
+# settles and then lies still (a sleeping pet would otherwise wake the GUI
+# thread every two seconds for hours), and happy hops twice and then holds.
+ANIMATIONS = {
+    "idle": Animation(frames=6, fps=8.0, rest=7.0, motion=breathe(0.025)),
+    "sleep": Animation(frames=4, fps=0.5, loops=3, motion=breathe(0.035)),
+    "happy": Animation(frames=6, fps=12.0, loops=2, motion=bounce(5.0)),
+}
+STILL = Animation()
+
+
+# Paints her sprite with QPainter instead of handing pixmaps to a QLabel.
+# Frames for each (look, pixel ratio, opacity) are rendered once and cached,
+# with dimming baked in, so the window itself never changes opacity. Views
+# can share one frame cache (pass the same frames dict), so a litter of
+# pets renders each frame once. Each
+# frame change repaints only this widget's rect, frames are timed by the
+# shared scheduler, and nothing is scheduled while a look is still or the
+# widget is hidden.
+class SpriteView(QWidget):
+    # Room above her head for hops
+    HEADROOM = 6
+    # On battery: frames this much further apart, and this much longer
+    # rests between loops
+    POWER_SAVING_SLOWDOWN = 2.0
+    POWER_SAVING_REST = 3.0
+    # Pixels she leans towards the cursor, per axis
+    GAZE_SHIFT = 2
+
+    def __init__(self, sprites, scheduler, size=64, frames=None, parent=None):
+        super().__init__(parent)
+        self.sprites = sprites
+        self.scheduler = scheduler
+        self.sprite_size = size
+        self.setFixedSize(size, size + self.HEADROOM)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+
+        self.look = "idle"
+        self.opacity = 1.0
+        self.dpr = 1.0
+        self.frame = 0
+        self.loops_done = 0
+        self.suspended = False
+        self.power_saving = False
+        self.frame_cache = frames if frames is not None else {}
+        self.frame_timer = scheduler.timer(self.next_frame, single_shot=True)
+        self.gaze = None
+
+        self.frames_painted = 0
+
+    def set_look(self, look):
+        if look == self.look:
+            return
+        self.look = look
+        self.restart()
+
+    def set_opacity(self, opacity):
+        if opacity == self.opacity:
+            return
+        self.opacity = opacity
+        self.update()
+
+    def set_gaze(self, direction):
+        # (dx, dy) towards the cursor, or None. Drawn as an offset at paint
+        # time, so no frames are re-rendered.
+        if direction == self.gaze:
+            return
+        self.gaze = direction
+        self.update()
+
+    def set_dpr(self, dpr):
+        if dpr == self.dpr:
+            return
+        self.dpr = dpr
+        self.update()
+
+    def sprite_changed(self, look):
+        # New pixels for look are in the store: frames built from the old
+        # ones are dropped (the cache may be shared, so this is idempotent)
+        # and rebuilt on the next paint, which keeps showing the old frames
+        # until then
+        for key in [k for k in self.frame_cache if k[0] == look]:
+            del self.frame_cache[key]
+        if look == self.look:
+            self.update()
+
+    def set_suspended(self, suspended):
+        self.suspended = suspended
+        self.schedule_next(0.0)
+
+    def set_power_saving(self, power_saving):
+        self.power_saving = power_saving
+
+    def animation(self):
+        return ANIMATIONS.get(self.look, STILL)
+
+    def restart(self):
+        self.frame = 0
+        self.loops_done = 0
+        self.update()
+        self.schedule_next(0.0)
+
+    def schedule_next(self, rest):
+        animation = self.animation()
+        if animation.fps <= 0 or animation.frames <= 1 or not self.isVisible() or self.suspended:
+            self.frame_timer.stop()
+            return
+        if animation.loops is not None and self.loops_done >= animation.loops:
+            self.frame_timer.stop()
+            return
+        interval = 1.0 / animation.fps
+        if self.power_saving:
+            interval *= self.POWER_SAVING_SLOWDOWN
+            rest *= self.POWER_SAVING_REST
+        self.frame_timer.start((rest + interval) * 1000)
+
+    def next_frame(self):
+        animation = self.animation()
+        self.frame = (self.frame + 1) % animation.frames
+        rest = 0.0
+        if self.frame == 0:
+            self.loops_done += 1
+            rest = animation.rest
+        self.update()
+        self.schedule_next(rest)
+
+    def frames(self):
+        key = (self.look, self.dpr, self.opacity)
+        frames = self.frame_cache.get(key)
+        if frames is None:
+            frames = self.render_frames()
+            self.frame_cache[key] = frames
+        return frames
+
+    def render_frames(self):
+        base = self.sprites.get(self.look, self.dpr)
+        animation = self.animation()
+        if base.isNull():
+            return [None]
+
+        frames = []
+        for i in range(max(1, animation.frames)):
+            canvas = QPixmap(round(self.width() * self.dpr), round(self.height() * self.dpr))
+            canvas.setDevicePixelRatio(self.dpr)
+            canvas.fill(Qt.transparent)
+
+            offset, stretch = 0.0, 1.0
+            if animation.motion is not None and animation.frames > 1:
+                offset, stretch = animation.motion(i / animation.frames)
+
+            w = base.width() / self.dpr
+            h = base.height() / self.dpr
+            target = QRectF(
+                (self.width() - w) / 2.0,
+                self.height() - h * stretch + offset,
+                w, h * stretch
+            )
+            painter = QPainter(canvas)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.setOpacity(self.opacity)
+            painter.drawPixmap(target, base, QRectF(base.rect()))
+            painter.end()
+            frames.append(canvas)
+        return frames
+
+    @timed()
+    def paintEvent(self, event):
+        frames = self.frames()
+        frame = frames[self.frame % len(frames)]
+        painter = QPainter(self)
+        if frame is None:
+            painter.fillRect(self.rect(), QColor("black"))
+            painter.setPen(QColor("white"))
+            painter.drawText(self.rect(), Qt.AlignCenter, "[NEKO]")
+        else:
+            dx, dy = self.gaze or (0, 0)
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.drawPixmap(dx * self.GAZE_SHIFT, dy * self.GAZE_SHIFT, frame)
+        painter.end()
+        self.frames_painted += 1
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.schedule_next(0.0)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.frame_timer.stop()
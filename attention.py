@@ -0,0 +1,173 @@
+import math
+import time
+
+
+LOW_MAX = 30.0
+MEDIUM_MAX = 70.0
+METER_MAX = 100.0
+
+# 5 minutes of no interaction at max level = decay
+GIVE_UP_AFTER = 300.0
+
+
+def level_for(value):
+    if value <= LOW_MAX:
+        return "LOW"
+    elif value <= MEDIUM_MAX:
+        return "MEDIUM"
+    else:
+        return "HIGH"
+
+
+# The attention meter as a piecewise-linear function of time. Nothing ticks:
+# the meter remembers the value at the start of the current segment and how
+# fast it is rising, and works out the value whenever someone reads it. Any
+# change of rate, value or pause starts a new segment.
+#
+# next_event() gives the exact time of the next thing worth waking up for:
+# a LOW/MEDIUM/HIGH threshold crossing or the give-up deadline.
+class AttentionMeter:
+    def __init__(self, clock=time.monotonic, value=0.0):
+        self.clock = clock
+        self.rate = 0.0  # points per second
+        self.paused = False
+        self._value = value
+        self._since = clock()
+        # Start of the current unanswered stretch at HIGH, once known
+        self._high_since = self._since if value > MEDIUM_MAX else None
+
+    def value(self, now=None):
+        if now is None:
+            now = self.clock()
+        if self.paused or self.rate <= 0.0 or now <= self._since:
+            return self._value
+        return min(METER_MAX, self._value + self.rate * (now - self._since))
+
+    def level(self, now=None):
+        return level_for(self.value(now))
+
+    def set(self, value):
+        now = self.clock()
+        high_since = self.high_since(now)
+        self._value = max(0.0, min(METER_MAX, value))
+        self._since = now
+        if self._value > MEDIUM_MAX:
+            self._high_since = now if high_since is None else high_since
+        else:
+            self._high_since = None
+
+    def set_rate(self, rate):
+        if rate == self.rate:
+            return
+        self._rebase()
+        self.rate = rate
+
+    def set_paused(self, paused):
+        if paused == self.paused:
+            return
+        now = self.clock()
+        self._rebase(now)
+        self.paused = paused
+        if paused:
+            self._high_since = None
+        elif self._value > MEDIUM_MAX:
+            self._high_since = now
+
+    def reset_unanswered(self):
+        # Any interaction restarts the give-up countdown
+        now = self.clock()
+        self._rebase(now)
+        self._high_since = now if self._value > MEDIUM_MAX else None
+
+    def high_since(self, now=None):
+        if now is None:
+            now = self.clock()
+        if self.paused:
+            return None
+        if self._high_since is not None:
+            return self._high_since
+        crossing = self._crossing_time(MEDIUM_MAX)
+        if crossing is not None and crossing <= now:
+            return crossing
+        return None
+
+    def give_up_deadline(self):
+        if self.paused:
+            return None
+        if self._high_since is not None:
+            return self._high_since + GIVE_UP_AFTER
+        crossing = self._crossing_time(MEDIUM_MAX)
+        if crossing is None:
+            return None
+        return crossing + GIVE_UP_AFTER
+
+    def next_event(self, now=None):
+        # Earliest future threshold crossing or give-up deadline, or None if
+        # the meter will sit still until someone changes it
+        if now is None:
+            now = self.clock()
+        times = []
+        for threshold in (LOW_MAX, MEDIUM_MAX):
+            crossing = self._crossing_time(threshold)
+            if crossing is not None and crossing > now:
+                times.append(crossing)
+        deadline = self.give_up_deadline()
+        if deadline is not None:
+            times.append(max(deadline, now))
+        return min(times) if times else None
+
+    def _crossing_time(self, threshold):
+        # When the current segment rises past threshold (None if it never does)
+        if self.paused or self.rate <= 0.0 or self._value > threshold:
+            return None
+        return self._since + (threshold - self._value) / self.rate
+
+    def _rebase(self, now=None):
+        if now is None:
+            now = self.clock()
+        self._high_since = self.high_since(now)
+        self._value = self.value(now)
+        self._since = now
+
+
+# How fast the user is switching windows, as an exponentially decayed count:
+# every switch adds its weight and the total falls by a factor of e every
+# tau seconds. A burst of quick switches piles up; one switch a minute
+# never gets anywhere. Like the meter it is two numbers and some math on
+# read, so nothing has to wake up to reset it, and time_below() says
+# exactly when it will have calmed down past a threshold.
+class SwitchRate:
+    def __init__(self, clock=time.monotonic, tau=10.0):
+        self.clock = clock
+        self.tau = tau
+        self._value = 0.0
+        self._since = clock()
+        self.switches = 0
+
+    def value(self, now=None):
+        if now is None:
+            now = self.clock()
+        if self._value <= 0.0 or now <= self._since:
+            return self._value
+        return self._value * math.exp((self._since - now) / self.tau)
+
+    def add(self, weight=1.0):
+        now = self.clock()
+        self._value = self.value(now) + weight
+        self._since = now
+        self.switches += 1
+        return self._value
+
+    def reset(self):
+        self._value = 0.0
+        self._since = self.clock()
+
+    def per_minute(self, now=None):
+        # Steady switching every s seconds settles near 60 / s
+        return self.value(now) * 60.0 / self.tau
+
+    def time_below(self, threshold):
+        # When the value decays to threshold (None if it already is below)
+        if threshold <= 0.0 or self._value < threshold:
+            return None
+        return self._since + self.tau * math.log(self._value / threshold)
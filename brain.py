@@ -0,0 +1,611 @@
+import random
+from collections import deque
+from enum import Enum, auto
+
+from scheduler import Scheduler
+from attention import AttentionMeter, SwitchRate, level_for
+from metrics import timed
+from dialogue import default_engine
+from recording import FOCUS, PRESS, DRAG, HOVER, HIDE, SHOW, PRESENT, BATTERY
+
+
+class NekoState(Enum):
+    IDLE = auto()
+    TALKING = auto()
+    SLEEPING = auto()
+    PEEKING = auto()
+
+
+class NekoView:
+    # Everything the brain asks of whoever is drawing her. The defaults do
+    # nothing, so a bare NekoView() is enough for headless simulations.
+    def set_look(self, look):
+        # look is one of: idle, sleep, happy, peek, curious, agitated
+        pass
+
+    def set_opacity(self, opacity):
+        pass
+
+    def show_bubble(self, text):
+        pass
+
+    def hide_bubble(self):
+        pass
+
+    def set_visible(self, visible):
+        pass
+
+    def set_suspended(self, suspended):
+        # Nobody is looking: stop anything that animates
+        pass
+
+    def set_power_saving(self, power_saving):
+        # On battery: animate less often
+        pass
+
+    def set_tracking(self, mode):
+        # How closely to follow the cursor: None, "slow" or "smooth"
+        pass
+
+    def set_resting(self, resting):
+        # Asleep, hidden or nobody at the machine: anything that only
+        # matters while she's up and about (history sampling) can pause
+        pass
+
+
+# The behavior engine: state machine, attention meter, dialogue cadence and
+# sleep/peek/wake rules. It never touches Qt or the wall clock. Time comes
+# from the scheduler's clock and every delay is a scheduler deadline, so the
+# same code runs live behind a QTimer or simulated under a VirtualClock.
+#
+# Inputs arrive through focus_changed(), pressed(), hovered() and dragged();
+# outputs go to the view. With a recorder (--record) every input, her seed,
+# state changes and lines are written down for tools/replay.py.
+class NekoBrain:
+    # How far apart deadlines may be and still share one wakeup (seconds)
+    SLACK_AWAKE = 0.05
+    SLACK_HIDDEN = 1.0
+    SLACK_SLEEPING = 3.0
+    SLACK_AWAY = 5.0
+    # On battery every slack above is stretched by this much
+    BATTERY_SLACK_FACTOR = 4.0
+
+    # Attention rise per 10 seconds: a base amount plus a bonus for what
+    # she is doing. tools/batch_sim.py sweeps these.
+    ATTENTION_BASE = 2.0
+    ATTENTION_BUSY = 4.0  # Watching you be busy rapidly scales it
+    ATTENTION_IDLE = 1.0  # You are also idle
+    ATTENTION_ASLEEP = 0.8  # Slow increase while sleeping
+    PET_DROP = 25.0
+
+    # Delay before the next random line, by attention level (ms)
+    DIALOGUE_INTERVALS = {
+        "HIGH": (15000, 30000),  # 15 to 30 seconds
+        "MEDIUM": (30000, 60000),  # 30 to 60 seconds
+        "LOW": (60000, 120000),  # 1 to 2 minutes
+    }
+
+    # Inactivity before she dozes off, by attention level (ms)
+    SLEEP_DELAYS = {
+        "HIGH": 90000,  # Resist sleeping (1.5 minutes)
+        "MEDIUM": 45000,
+        "LOW": 30000,
+    }
+
+    # Window switching, as a decayed switch count (see SwitchRate): each
+    # switch adds 1 (SAME_APP_WEIGHT if it stays in the same application)
+    # and the count decays by e every SWITCH_TAU seconds. Three switches in
+    # a few seconds make her curious, a frantic burst agitated; she counts
+    # as busy until it has settled below SWITCH_BUSY again.
+    SWITCH_TAU = 10.0
+    SWITCH_CURIOUS = 2.5
+    SWITCH_AGITATED = 4.0
+    SWITCH_WAKE = 2.0
+    SWITCH_REARM = 1.0  # curious again only after calming down this far
+    SWITCH_BUSY = 0.5
+    SAME_APP_WEIGHT = 0.5
+
+    # She won't repeat any of her last few lines if the pool is big enough
+    NO_REPEAT = 4
+
+    # How closely she watches the cursor, by attention level. Never while
+    # asleep, hidden or while you're away.
+    CURSOR_TRACKING = {
+        "HIGH": "smooth",
+        "MEDIUM": "slow",
+        "LOW": None,
+    }
+
+    def __init__(self, view=None, scheduler=None, window_source=None, rng=None, dialogue=None, store=None,
+                 recorder=None):
+        self.view = view or NekoView()
+        self.scheduler = scheduler or Scheduler()
+        self.window_source = window_source
+        if window_source is not None:
+            # Pets share one source; it only slows down or stops once all
+            # of them are asleep or away, and this one starts out neither
+            window_source.set_sleeping(False, owner=self)
+            window_source.set_suspended(False, owner=self)
+        self.store = store
+        self.recorder = recorder
+        self.random = rng or random.Random()
+        self.dialogue = dialogue or default_engine()
+        self.recent_lines = deque(maxlen=self.NO_REPEAT)
+
+        self.state = NekoState.IDLE
+        self.tracking = None
+        self.resting = False
+
+        self.last_active_window = 0
+        self.last_active_app = None
+        self.switch_rate = SwitchRate(self.scheduler.clock, tau=self.SWITCH_TAU)
+        self.curious_armed = True
+
+        # --- Attention Meter System ---
+        self.attention = AttentionMeter(clock=self.scheduler.clock)  # 0 to 100, evaluated lazily
+        self.is_manually_hidden = False
+        self.temp_unhidden_for_dialogue = False
+
+        # Presence: is the user at the machine, and is it on battery
+        self.present = True
+        self.away_since = None
+        self.on_battery = False
+
+        self.stats_pets_received = 0
+        self.stats_times_slept = 0
+        self.stats_lines_spoken = 0
+        self.stats_give_ups = 0
+
+        self.init_timers()
+
+    def init_timers(self):
+        # Speech bubble timer
+        self.bubble_timer = self.scheduler.timer(self.hide_bubble, single_shot=True)
+
+        # Random dialogue timer
+        self.dialogue_timer = self.scheduler.timer(self.random_dialogue)
+
+        # Sleep timer (inactivity)
+        self.sleep_timer = self.scheduler.timer(self.go_to_sleep, single_shot=True)
+
+        # Peek back-to-sleep timer
+        self.peek_timer = self.scheduler.timer(self.end_peek, single_shot=True)
+
+        # Only fires when the meter crosses a level or she is about to give up
+        self.attention_timer = self.scheduler.timer(self.on_attention_event, single_shot=True)
+
+    def start(self):
+        if self.recorder is not None:
+            self.recorder.started(self)
+        self.set_next_dialogue_timer()
+        self.update_attention()
+
+        # Start the inactivity/sleep tracking
+        self.reset_sleep_timer()
+
+        # Startup greeting timer (5 seconds)
+        self.scheduler.single_shot(5000, self.do_greeting)
+
+    def choose_line(self, context):
+        # Weighted pick from the packs for this context at her current
+        # attention level; None if no pack has anything to say
+        return self.dialogue.choose(context, self.attention_level, self.random, self.recent_lines)
+
+    # --- Inputs ---
+
+    def record(self, kind, *payload):
+        if self.recorder is not None:
+            self.recorder.input(self, kind, *payload)
+
+    def focus_changed(self, current_window):
+        self.check_active_window(current_window)
+
+    def pressed(self):
+        # Left click on her
+        self.record(PRESS)
+        # If she's temporarily unhidden for dialogue and user clicks her, unhide her completely.
+        if self.temp_unhidden_for_dialogue:
+            self.is_manually_hidden = False
+            self.temp_unhidden_for_dialogue = False
+
+        # Interaction Logic
+        if self.state == NekoState.SLEEPING:
+            self.giving_up = False
+            self.reset_sleep_timer()
+        else:
+            self.pet_reaction()
+            self.reset_sleep_timer()
+
+    def dragged(self):
+        self.record(DRAG)
+        self.reset_sleep_timer()
+
+    def hovered(self):
+        # Hover tracking for waking up
+        self.record(HOVER)
+        self.reset_sleep_timer()
+
+    def hide(self):
+        self.record(HIDE)
+        self.is_manually_hidden = True
+        self.view.set_visible(False)
+        self.update_tick_rate()
+
+    def show(self):
+        self.record(SHOW)
+        self.is_manually_hidden = False
+        self.temp_unhidden_for_dialogue = False
+        self.view.set_visible(True)
+        self.update_tick_rate()
+
+    # --- Behavior ---
+
+    def set_state(self, state):
+        if state != self.state and self.recorder is not None:
+            self.recorder.state_changed(self, state)
+        self.state = state
+
+    def update_tick_rate(self):
+        # Nothing she does while asleep or hidden needs tight timing, so let
+        # the scheduler batch more deadlines into each wakeup
+        if not self.present:
+            slack = self.SLACK_AWAY
+        elif self.state == NekoState.SLEEPING:
+            slack = self.SLACK_SLEEPING
+        elif self.is_manually_hidden and not self.temp_unhidden_for_dialogue:
+            slack = self.SLACK_HIDDEN
+        else:
+            slack = self.SLACK_AWAKE
+        if self.on_battery:
+            slack *= self.BATTERY_SLACK_FACTOR
+        self.scheduler.set_slack(slack, owner=self)
+        self.update_tracking()
+
+    def update_tracking(self):
+        resting = (not self.present or self.state == NekoState.SLEEPING
+                   or (self.is_manually_hidden and not self.temp_unhidden_for_dialogue))
+        if resting != self.resting:
+            self.resting = resting
+            self.view.set_resting(resting)
+        mode = None if resting else self.CURSOR_TRACKING[self.attention_level]
+        if mode != self.tracking:
+            self.tracking = mode
+            self.view.set_tracking(mode)
+
+    def dialogue_interval_range(self, level):
+        return self.DIALOGUE_INTERVALS[level]
+
+    def set_next_dialogue_timer(self):
+        ms = self.random.randint(*self.dialogue_interval_range(self.attention_level))
+        self.dialogue_timer.start(ms)
+
+    def reset_sleep_timer(self):
+        self.sleep_timer.start(self.SLEEP_DELAYS[self.attention_level])
+
+        if self.state in [NekoState.SLEEPING, NekoState.PEEKING]:
+            self.wake_up()
+
+    @timed()
+    def check_active_window(self, current_window):
+        # We track window changes in IDLE and TALKING
+        if self.state not in [NekoState.SLEEPING, NekoState.PEEKING, NekoState.IDLE, NekoState.TALKING]:
+            return
+
+        app = None
+        if current_window and self.window_source is not None:
+            app = self.window_source.app_for(current_window)
+        self.record(FOCUS, current_window, app)
+
+        if current_window and self.last_active_window and current_window != self.last_active_window:
+            weight = 1.0
+            if app is not None and app == self.last_active_app:
+                weight = self.SAME_APP_WEIGHT
+
+            # Action if IDLE or TALKING
+            if self.state in [NekoState.IDLE, NekoState.TALKING]:
+                if self.switch_rate.value() < self.SWITCH_REARM:
+                    self.curious_armed = True
+                rate = self.switch_rate.add(weight)
+                self.reset_sleep_timer()  # Keep it awake like an interaction
+
+                if rate >= self.SWITCH_AGITATED:
+                    # Agitated state! A burst of fast switching
+                    self.view.set_look("agitated")
+                    self.say(self.choose_line("agitated"))
+                    self.switch_rate.reset()  # Start over after scolding
+                    self.curious_armed = True
+
+                elif rate >= self.SWITCH_CURIOUS and self.curious_armed:
+                    # Quick switching catches her eye, once per burst
+                    self.view.set_look("curious")
+                    self.say(self.choose_line("curious"))
+                    self.curious_armed = False
+
+            # Action if SLEEPING or PEEKING
+            else:
+                rate = self.switch_rate.add(weight)
+
+                if rate >= self.SWITCH_WAKE:
+                    # Wake up fully if frantic typing/switching is happening
+                    self.wake_up()
+                    self.say(self.choose_line("woken"))
+                    self.switch_rate.reset()
+                elif self.state == NekoState.SLEEPING:
+                    # Just peek if it's a minor change
+                    self.start_peek()
+
+            self.update_attention()
+
+        self.last_active_window = current_window
+        self.last_active_app = app
+
+    def update_attention(self):
+        # Re-derive how fast the meter rises from what she is doing, then
+        # sleep until the next level crossing or the give-up deadline
+        self.update_tracking()
+        if not self.present:
+            # Frozen; set_present() catches the meter up on return
+            self.attention.set_rate(0.0)
+            self.attention_timer.stop()
+            return
+
+        delta = self.ATTENTION_BASE
+        busy_until = None
+        if self.state in [NekoState.IDLE, NekoState.TALKING]:
+            busy_until = self.switch_rate.time_below(self.SWITCH_BUSY)
+            if busy_until is not None and busy_until > self.scheduler.clock():
+                delta += self.ATTENTION_BUSY
+            else:
+                delta += self.ATTENTION_IDLE
+        elif self.state == NekoState.SLEEPING:
+            delta += self.ATTENTION_ASLEEP
+
+        # Deltas are per 10 seconds, as in the old 10 second tick
+        self.attention.set_rate(delta / 10.0)
+
+        # Wake up when she stops counting as busy, too
+        next_event = self.attention.next_event()
+        if busy_until is not None and busy_until > self.scheduler.clock():
+            next_event = busy_until if next_event is None else min(next_event, busy_until)
+        if next_event is None:
+            self.attention_timer.stop()
+        else:
+            # Land just past the crossing so the new level is visible
+            delay = max(0.0, next_event - self.scheduler.clock()) + 0.001
+            self.attention_timer.start(delay * 1000)
+
+        # Every pet, line, nap and give-up passes through here, so this is
+        # where the store hears that there is something new to save
+        if self.store is not None:
+            self.store.mark_dirty()
+
+    def on_attention_event(self):
+        now = self.scheduler.clock()
+        deadline = self.attention.give_up_deadline()
+        if deadline is not None and deadline <= now + self.scheduler.slack:
+            self.trigger_giving_up()
+            return
+
+        # She just became needier: don't make her wait out a long LOW-level
+        # dialogue delay before she is allowed to say something
+        remaining = self.dialogue_timer.remaining()
+        longest = self.dialogue_interval_range(self.attention_level)[1] / 1000.0
+        if remaining is not None and remaining > longest:
+            self.set_next_dialogue_timer()
+        self.update_attention()
+
+    def trigger_giving_up(self):
+        self.stats_give_ups += 1
+        self.giving_up = True
+        self.attention_meter = 10.0  # Drop back down to sad/content range
+        self.update_attention()
+        if self.state in [NekoState.IDLE, NekoState.TALKING]:
+            self.say(self.choose_line("give_up"))
+            self.scheduler.single_shot(4000, self.go_to_sleep)
+
+    @property
+    def attention_meter(self):
+        return self.attention.value()
+
+    @attention_meter.setter
+    def attention_meter(self, value):
+        self.attention.set(value)
+
+    @property
+    def giving_up(self):
+        # Attention math is paused while she is ignoring you
+        return self.attention.paused
+
+    @giving_up.setter
+    def giving_up(self, value):
+        self.attention.set_paused(value)
+
+    @property
+    def attention_level(self):
+        return level_for(self.attention_meter)
+
+    # --- Persistence ---
+
+    def export_state(self):
+        return {
+            "attention": self.attention_meter,
+            "giving_up": 1.0 if self.giving_up else 0.0,
+            "pets": self.stats_pets_received,
+            "slept": self.stats_times_slept,
+            "lines": self.stats_lines_spoken,
+            "give_ups": self.stats_give_ups,
+        }
+
+    def restore_state(self, state, offline_seconds=0.0):
+        # Call before start(). While she was closed she was as good as
+        # asleep, so the meter catches up at the sleeping rate (unless she
+        # had given up on you, which pauses it).
+        self.stats_pets_received = int(state.get("pets", 0))
+        self.stats_times_slept = int(state.get("slept", 0))
+        self.stats_lines_spoken = int(state.get("lines", 0))
+        self.stats_give_ups = int(state.get("give_ups", 0))
+
+        self.attention_meter = state.get("attention", 0.0)
+        self.giving_up = bool(state.get("giving_up", 0.0))
+        self.advance_attention(offline_seconds)
+
+    def advance_attention(self, seconds):
+        # Catch the meter up on time she wasn't running, at the sleeping rate
+        if self.giving_up or seconds <= 0:
+            return
+        self.attention_meter += (self.ATTENTION_BASE + self.ATTENTION_ASLEEP) / 10.0 * seconds
+
+    # --- Presence ---
+
+    def set_present(self, present):
+        # The user left (idle for a while, screen locked) or came back.
+        # While they are away nothing of hers runs: no dialogue, sleep,
+        # attention or window tracking deadlines at all. Being away is not
+        # a nap, so it is not counted as one; on return the meter is moved
+        # forward in one step and she carries on from where she was.
+        if present == self.present:
+            return
+        self.record(PRESENT, present)
+        now = self.scheduler.clock()
+        if not present:
+            if self.state == NekoState.PEEKING:
+                # Lie back down without counting another nap
+                self.set_state(NekoState.SLEEPING)
+                self.view.set_look("sleep")
+                self.view.set_opacity(0.7)
+            elif self.state == NekoState.TALKING:
+                self.hide_bubble()
+            self.present = False
+            self.away_since = now
+            for timer in (self.dialogue_timer, self.sleep_timer, self.peek_timer, self.bubble_timer):
+                timer.stop()
+            self.update_attention()
+            if self.window_source is not None:
+                self.window_source.set_suspended(True, owner=self)
+            self.view.set_suspended(True)
+            self.update_tick_rate()
+        else:
+            self.present = True
+            if self.window_source is not None:
+                self.window_source.set_suspended(False, owner=self)
+            self.view.set_suspended(False)
+            self.advance_attention(now - self.away_since)
+            self.away_since = None
+            self.update_tick_rate()
+            self.set_next_dialogue_timer()
+            self.update_attention()
+            if self.state != NekoState.SLEEPING:
+                self.sleep_timer.start(self.SLEEP_DELAYS[self.attention_level])
+
+    def set_on_battery(self, on_battery):
+        if on_battery == self.on_battery:
+            return
+        self.record(BATTERY, on_battery)
+        self.on_battery = on_battery
+        if self.window_source is not None:
+            self.window_source.set_power_saving(on_battery)
+        self.view.set_power_saving(on_battery)
+        self.update_tick_rate()
+
+    def start_peek(self):
+        self.set_state(NekoState.PEEKING)
+        self.update_attention()
+        self.view.set_look("peek")
+        self.view.set_opacity(0.9)
+        self.peek_timer.start(3000)  # Peek for 3 seconds then go back to sleep
+
+    def end_peek(self):
+        if self.state == NekoState.PEEKING:
+            self.go_to_sleep()
+
+    def do_greeting(self):
+        self.say(self.choose_line("greeting"))
+
+    @timed()
+    def random_dialogue(self):
+        # If sleeping, there's a chance it wakes up just to talk
+        if self.state == NekoState.SLEEPING:
+            # Only wake occasionally if attention is high/medium
+            if self.attention_level == "LOW" and self.random.random() < 0.8:
+                self.set_next_dialogue_timer()
+                return # stays asleep
+
+            self.wake_up()
+            context = "sleep_talk"
+        else:
+            context = "chatter"
+
+        self.say(self.choose_line(context))
+        self.set_next_dialogue_timer()
+
+    @timed()
+    def pet_reaction(self):
+        self.stats_pets_received += 1
+
+        # Satisfaction Event
+        dropped_a_lot = False
+        if self.attention_meter >= self.PET_DROP:
+            dropped_a_lot = True
+
+        self.attention_meter = max(0.0, self.attention_meter - self.PET_DROP)
+        self.giving_up = False # Reset from sad state
+        self.attention.reset_unanswered()
+        self.update_attention()
+
+        self.view.set_look("happy")
+        self.say(self.choose_line("pet_satisfied" if dropped_a_lot else "pet_more"))
+
+    @timed()
+    def wake_up(self):
+        self.set_state(NekoState.IDLE)
+        if self.window_source is not None:
+            self.window_source.set_sleeping(False, owner=self)
+        self.update_tick_rate()
+        self.update_attention()
+        self.view.set_opacity(1.0)
+        self.view.set_look("idle")
+
+        self.say(self.choose_line("wake"))
+
+    @timed()
+    def go_to_sleep(self):
+        self.stats_times_slept += 1
+        self.set_state(NekoState.SLEEPING)
+        if self.window_source is not None:
+            self.window_source.set_sleeping(True, owner=self)
+        self.update_tick_rate()
+        self.update_attention()
+        self.view.set_look("sleep")
+        self.view.set_opacity(0.7)
+        self.hide_bubble()
+
+    @timed()
+    def say(self, text):
+        if text is None:
+            return
+        if self.recorder is not None:
+            self.recorder.said(self, text)
+        self.stats_lines_spoken += 1
+
+        if self.is_manually_hidden:
+            self.view.set_visible(True)
+            self.temp_unhidden_for_dialogue = True
+            self.update_tick_rate()
+
+        self.view.show_bubble(text)
+        self.set_state(NekoState.TALKING)
+        self.update_attention()
+        self.bubble_timer.start(4000)
+        self.reset_sleep_timer()
+
+    def hide_bubble(self):
+        self.view.hide_bubble()
+        if self.state == NekoState.TALKING:
+            self.set_state(NekoState.IDLE)
+            self.update_attention()
+            self.view.set_look("idle")
+
+        if self.temp_unhidden_for_dialogue:
+            self.view.set_visible(False)
+            self.temp_unhidden_for_dialogue = False
+            self.update_tick_rate()
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRect, QRectF
+from PySide6.QtGui import QPainter, QPixmap, QColor, QFont, QFontMetrics, QPen
+
+from metrics import timed
+
+
+# Same look as the old stylesheet bubble: white at 220 alpha, 2px #aaa
+# border, 12px corners, 6px/12px padding, bold 13px Segoe UI (or Arial)
+BACKGROUND = QColor(255, 255, 255, 220)
+BORDER = QColor("#aaa")
+TEXT = QColor("#333")
+BORDER_WIDTH = 2
+RADIUS = 12
+PAD_X = 12
+PAD_Y = 6
+
+
+def bubble_font():
+    font = QFont()
+    font.setFamilies(["Segoe UI", "Arial"])
+    font.setPixelSize(13)
+    font.setBold(True)
+    return font
+
+
+def render_bubble(text, font, dpr, max_width):
+    metrics = QFontMetrics(font)
+    inner = max_width - 2 * (PAD_X + BORDER_WIDTH)
+    flags = Qt.AlignCenter | Qt.TextWordWrap
+    text_rect = metrics.boundingRect(QRect(0, 0, inner, 10000), flags, text)
+    if text_rect.width() > inner:
+        # A single word too long for the window; break it anywhere
+        flags |= Qt.TextWrapAnywhere
+        text_rect = metrics.boundingRect(QRect(0, 0, inner, 10000), flags, text)
+    width = text_rect.width() + 2 * (PAD_X + BORDER_WIDTH)
+    height = text_rect.height() + 2 * (PAD_Y + BORDER_WIDTH)
+
+    pixmap = QPixmap(round(width * dpr), round(height * dpr))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.transparent)
+
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+    half = BORDER_WIDTH / 2.0
+    frame = QRectF(half, half, width - BORDER_WIDTH, height - BORDER_WIDTH)
+    painter.setPen(QPen(BORDER, BORDER_WIDTH))
+    painter.setBrush(BACKGROUND)
+    painter.drawRoundedRect(frame, RADIUS, RADIUS)
+    painter.setFont(font)
+    painter.setPen(TEXT)
+    painter.drawText(QRect(0, 0, width, height), flags, text)
+    painter.end()
+    return pixmap
+
+
+# Finished bubbles, keyed by text, font and pixel ratio. Her lines come from
+# small fixed pools, so after the first few minutes nearly every bubble is
+# a hit.
+class BubbleCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, font, dpr, max_width):
+        key = (text, font.key(), round(dpr, 2), max_width)
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pixmap
+        self.misses += 1
+        pixmap = render_bubble(text, font, dpr, max_width)
+        self._entries[key] = pixmap
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return pixmap
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Fixed-size area above her that blits a cached bubble pixmap, bottom
+# centred. Showing or hiding a line is a repaint of this rect only: no
+# stylesheet, text layout or relayout of the window.
+class BubbleView(QWidget):
+    def __init__(self, width, height, cache=None, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(width, height)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.cache = cache if cache is not None else BubbleCache()
+        self.text_font = bubble_font()
+        self.dpr = 1.0
+        self.text = ""
+        self.pixmap = None
+
+    def set_dpr(self, dpr):
+        if dpr == self.dpr:
+            return
+        self.dpr = dpr
+        if self.pixmap is not None:
+            self.show_text(self.text)
+
+    def show_text(self, text):
+        self.text = text
+        self.pixmap = self.cache.get(text, self.text_font, self.dpr, self.width())
+        self.update()
+
+    def clear(self):
+        if self.pixmap is None:
+            return
+        self.text = ""
+        self.pixmap = None
+        self.update()
+
+    def is_showing(self):
+        return self.pixmap is not None
+
+    @timed()
+    def paintEvent(self, event):
+        if self.pixmap is None:
+            return
+        w = self.pixmap.width() / self.pixmap.devicePixelRatio()
+        h = self.pixmap.height() / self.pixmap.devicePixelRatio()
+        painter = QPainter(self)
+        painter.drawPixmap(round((self.width() - w) / 2), round(self.height() - h), self.pixmap)
+        painter.end()
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+
+
+# A single packed file with everything she needs at startup: the sprite
+# PNGs, ready-to-blit premultiplied copies for the common pixel ratios, and
+# the dialogue packs. It is memory-mapped and read in place, so a frozen
+# build doesn't have to unpack loose PNGs into a temp dir on every boot.
+#
+# Layout: header (magic, version, index length), a JSON index, then the
+# blobs, each 16-byte aligned. Index offsets are relative to the first blob.
+#
+#   python bundle.py build            # assets/ -> neko.bundle
+#   python bundle.py info neko.bundle
+
+BUNDLE_NAME = "neko.bundle"
+MAGIC = b"NEKOBNDL"
+VERSION = 1
+ALIGN = 16
+PRESCALED_DPRS = (1.0, 1.25, 1.5, 2.0)
+
+_HEADER = struct.Struct("<8sHI")
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class AssetBundle:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        magic, version, index_length = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} Neko bundle")
+        start = _HEADER.size
+        self.index = json.loads(bytes(self._view[start:start + index_length]))
+        self._data_start = _align(start + index_length)
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+
+    def blob(self, offset, length):
+        # Zero-copy slice of the mapping
+        start = self._data_start + offset
+        return self._view[start:start + length]
+
+    def _sprite(self, look, size):
+        entry = self.index["sprites"].get(look)
+        if entry is None or entry["size"] != size:
+            return None
+        return entry
+
+    def sprite_hash(self, look, size):
+        entry = self._sprite(look, size)
+        return entry["hash"] if entry else None
+
+    def sprite_png(self, look, size):
+        entry = self._sprite(look, size)
+        return self.blob(*entry["png"]) if entry else None
+
+    def sprite_image(self, look, size, dpr):
+        from PySide6.QtGui import QImage
+
+        entry = self._sprite(look, size)
+        if entry is None:
+            return None
+        pixels = entry["pixels"].get(str(int(round(dpr * 100))))
+        if pixels is None:
+            return None
+        offset, length, width, height = pixels
+        # The image reads straight from the mapping, which lives as long as
+        # the bundle does
+        image = QImage(self.blob(offset, length), width, height, width * 4, QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(dpr)
+        return image
+
+    def dialogue_packs(self):
+        # {pack name: pack JSON}, as found in dialogue/ at build time
+        location = self.index.get("dialogue_packs")
+        if location is None:
+            return {}
+        return json.loads(bytes(self.blob(*location)).decode("utf-8"))
+
+
+def search_dirs():
+    # Next to the executable for frozen builds (so it stays out of the
+    # onefile archive), then the unpacked bundle dir, then the source tree
+    dirs = []
+    if getattr(sys, 'frozen', False):
+        dirs.append(os.path.dirname(sys.executable))
+        if hasattr(sys, '_MEIPASS'):
+            dirs.append(sys._MEIPASS)
+    dirs.append(os.path.dirname(os.path.abspath(__file__)))
+    return dirs
+
+
+def open_bundle():
+    for directory in search_dirs():
+        path = os.path.join(directory, BUNDLE_NAME)
+        if os.path.exists(path):
+            try:
+                return AssetBundle(path)
+            except (OSError, ValueError):
+                pass
+    return None
+
+
+def read_packs(dialogue_dir):
+    packs = {}
+    for filename in sorted(os.listdir(dialogue_dir)):
+        if filename.endswith(".json"):
+            with open(os.path.join(dialogue_dir, filename), "r", encoding="utf-8") as f:
+                packs[os.path.splitext(filename)[0]] = json.load(f)
+    return packs
+
+
+def build(asset_dir, out_path, size=64, dialogue_dir=None):
+    from sprites import LOOKS, source_hash, render_sprite
+
+    blobs = []
+    offset = 0
+
+    def add(data):
+        nonlocal offset
+        data = bytes(data)
+        location = [offset, len(data)]
+        blobs.append(data + b"\0" * (_align(len(data)) - len(data)))
+        offset += _align(len(data))
+        return location
+
+    sprites = {}
+    for look in LOOKS:
+        path = os.path.join(asset_dir, f"neko_{look}.png")
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            png = f.read()
+        pixels = {}
+        for dpr in PRESCALED_DPRS:
+            image = render_sprite(png, size, dpr)
+            if image is None:
+                break
+            width, height = image.width(), image.height()
+            location = add(bytes(image.constBits())[:width * height * 4])
+            pixels[str(int(round(dpr * 100)))] = location + [width, height]
+        sprites[look] = {"hash": source_hash(png), "size": size, "png": add(png), "pixels": pixels}
+
+    index = {"sprites": sprites}
+    if dialogue_dir is not None:
+        packs = read_packs(dialogue_dir)
+        if packs:
+            index["dialogue_packs"] = add(json.dumps(packs, ensure_ascii=False).encode("utf-8"))
+
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, len(index_bytes))
+    head = header + index_bytes
+    head += b"\0" * (_align(len(head)) - len(head))
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(head)
+        f.writelines(blobs)
+    os.replace(tmp_path, out_path)
+    return index
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build or inspect Neko's asset bundle")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="pack assets/ and dialogue/ into a bundle")
+    build_cmd.add_argument("--assets", default=os.path.join(here, "assets"))
+    build_cmd.add_argument("--dialogue", default=os.path.join(here, "dialogue"))
+    build_cmd.add_argument("--out", default=os.path.join(here, BUNDLE_NAME))
+    info_cmd = commands.add_parser("info", help="list what a bundle contains")
+    info_cmd.add_argument("path", nargs="?", default=os.path.join(here, BUNDLE_NAME))
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build(args.assets, args.out, dialogue_dir=args.dialogue)
+        print(f"Wrote {args.out} ({os.path.getsize(args.out)} bytes, {len(index['sprites'])} sprites)")
+    else:
+        bundle = AssetBundle(args.path)
+        for look, entry in bundle.index["sprites"].items():
+            ratios = ", ".join(f"{int(k) / 100:g}x" for k in entry["pixels"])
+            print(f"{look:<10} {entry['hash']}  png {entry['png'][1]} bytes, pre-scaled at {ratios}")
+        from dialogue import compile_pack
+        for name, pack in bundle.dialogue_packs().items():
+            table = compile_pack(pack)
+            contexts = {context for context, _ in table}
+            print(f"dialogue   {name}: {len(contexts)} contexts, {sum(len(v) for v in table.values())} lines by level")
+        bundle.close()
+
+
+if __name__ == "__main__":
+    main()
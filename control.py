@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+
+from platform_adapter import APP_NAME
+
+
+# One Neko per user session. The running instance holds a lock file and
+# listens on a local socket (a Unix socket, or a named pipe on Windows);
+# a second launch hands its request to it and exits instead of starting a
+# second Qt runtime. The same socket takes control commands:
+#
+#   python main.py show | hide | pet | stats [--json]
+#
+# This module is imported before anything Qt, and the client side only
+# uses the standard library, so a control command is done in milliseconds.
+# Requests and replies are one line of JSON each.
+
+COMMANDS = ("show", "hide", "pet", "stats")
+CONNECT_TIMEOUT = 0.5  # seconds
+# A second launch that loses the race for the lock waits this long for
+# the winner's server to come up
+STARTUP_WAIT = 5.0
+
+
+def runtime_dir():
+    return os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+
+
+def user_tag():
+    if hasattr(os, "getuid"):
+        return str(os.getuid())
+    return os.environ.get("USERNAME", "user")
+
+
+def server_name():
+    # Full socket path on Unix; the pipe name (\\.\pipe\<name>) on Windows
+    name = f"{APP_NAME}-{user_tag()}"
+    if sys.platform == 'win32':
+        return name
+    return os.path.join(runtime_dir(), name + ".sock")
+
+
+def lock_path():
+    return os.path.join(runtime_dir(), f"{APP_NAME}-{user_tag()}.lock")
+
+
+# --- Client ---
+
+def request(command, timeout=CONNECT_TIMEOUT, **args):
+    # Sends one command to the running instance and returns its reply, or
+    # None if nobody is listening
+    message = (json.dumps(dict(args, command=command)) + "\n").encode("utf-8")
+    try:
+        if sys.platform == 'win32':
+            reply = _pipe_request(message)
+        else:
+            reply = _socket_request(message, timeout)
+    except OSError:
+        return None
+    if not reply:
+        return None
+    try:
+        return json.loads(reply.decode("utf-8"))
+    except ValueError:
+        return None
+
+
+def _socket_request(message, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(server_name())
+        sock.sendall(message)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b"\n"):
+                break
+        return b"".join(chunks)
+
+
+def _pipe_request(message):
+    # QLocalServer on Windows is a named pipe; a plain file open speaks it
+    with open("\\\\.\\pipe\\" + server_name(), "r+b", buffering=0) as pipe:
+        pipe.write(message)
+        return pipe.readline()
+
+
+def run_client(argv):
+    # Called first thing by main.py. Returns an exit status if this process
+    # is done (a control command, or a launch handed to the running
+    # instance), or None if it should go on and start Neko itself.
+    command = next((arg for arg in argv if arg in COMMANDS), None)
+    as_json = "--json" in argv
+
+    if command is None:
+        return 0 if request("launch") is not None else None
+
+    reply = request(command)
+    if reply is None:
+        print("Neko isn't running", file=sys.stderr)
+        return 1
+    if as_json:
+        print(json.dumps(reply, indent=2))
+    elif command == "stats":
+        print_stats(reply)
+    return 0 if reply.get("ok") else 1
+
+
+def print_stats(reply):
+    print(f"{len(reply['pets'])} pet(s), {reply['wakeups_per_minute']:.0f} wakeups/min, "
+          f"{reply['rss_mb']:.1f} MB")
+    for i, pet in enumerate(reply["pets"]):
+        print(f"  #{i + 1}: {pet['state'].lower()}, attention {pet['attention']:.1f} ({pet['level']}), "
+              f"{pet['pets']} pets, {pet['slept']} naps, {pet['lines']} lines"
+              f"{', hidden' if pet['hidden'] else ''}")
+
+
+def wait_for_instance(timeout=STARTUP_WAIT):
+    # Another process holds the lock but may still be starting up: keep
+    # offering it the launch until its server answers
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if request("launch") is not None:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+# --- Server (Qt, only in the running instance) ---
+
+def acquire_instance_lock():
+    # A held QLockFile, or None if another live instance has it. Locks left
+    # by a crashed instance are noticed (by PID) and taken over.
+    from PySide6.QtCore import QLockFile
+
+    lock = QLockFile(lock_path())
+    lock.setStaleLockTime(0)
+    if lock.tryLock(100):
+        return lock
+    return None
+
+
+class ControlServer:
+    # Answers requests with handler(request) -> reply dict, on the GUI
+    # thread. Only started while holding the instance lock, so a socket
+    # file left behind by a crash can safely be removed.
+    def __init__(self, handler):
+        from PySide6.QtNetwork import QLocalServer
+
+        self.handler = handler
+        self.requests = 0
+        self.server = QLocalServer()
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.on_new_connection)
+
+    def listen(self):
+        from PySide6.QtNetwork import QLocalServer
+
+        name = server_name()
+        if not self.server.listen(name):
+            QLocalServer.removeServer(name)
+            return self.server.listen(name)
+        return True
+
+    def close(self):
+        self.server.close()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.buffer = b""
+            connection.readyRead.connect(lambda c=connection: self.on_ready_read(c))
+            connection.disconnected.connect(connection.deleteLater)
+
+    def on_ready_read(self, connection):
+        connection.buffer += bytes(connection.readAll())
+        if b"\n" not in connection.buffer:
+            return
+        line = connection.buffer.split(b"\n", 1)[0]
+        self.requests += 1
+        try:
+            reply = self.handler(json.loads(line.decode("utf-8")))
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        connection.write((json.dumps(reply) + "\n").encode("utf-8"))
+        connection.flush()
+        connection.disconnectFromServer()
@@ -0,0 +1,107 @@
+import time
+
+from metrics import REGISTRY
+
+
+# Which way the cursor is from her: (dx, dy) with each of -1, 0 or 1, so
+# nine buckets, (0, 0) being "right at her". The brain picks a mode from her
+# attention level and state, and the tracker samples the cursor only as
+# often as that mode needs: not at all when off, once a second when "slow",
+# four times a second when "smooth". A cursor that sits still is sampled
+# less and less often (down to once every STILL_INTERVAL) and the first
+# movement brings the mode's rate back. Only a change of bucket is passed
+# on, so the sprite repaints when she turns her head and never for the
+# samples in between.
+#
+# Every sample is timed into the registry as "cursor.sample", which puts
+# the tracker's own cost in the Stats window's handler table.
+class CursorTracker:
+    INTERVALS = {"slow": 1000, "smooth": 250}  # ms between samples
+    STILL_INTERVAL = 4000  # ms, the slowest a still cursor is sampled
+    # On battery: samples this much further apart
+    POWER_SAVING_SLOWDOWN = 2.0
+    # Within this many pixels of her centre (per axis) counts as straight
+    # ahead, so a cursor resting near her doesn't make her twitch
+    DEAD_ZONE = 48
+
+    def __init__(self, scheduler, position, anchor, callback, registry=None):
+        # position() and anchor() return global (x, y) for the cursor and
+        # her centre; position() may return None when it can't be read.
+        # callback(direction) gets the new bucket, or None when tracking
+        # stops.
+        self.position = position
+        self.anchor = anchor
+        self.callback = callback
+        self.registry = registry or REGISTRY
+        self.timer = scheduler.timer(self.sample)
+        self.mode = None
+        self.power_saving = False
+        self.direction = None
+        self.last_position = None
+        self.interval = None
+        self.samples = 0
+        self.changes = 0
+
+    def set_mode(self, mode):
+        if mode == self.mode:
+            return
+        self.mode = mode
+        if mode is None:
+            self.timer.stop()
+            self.last_position = None
+            self.publish(None)
+            return
+        self.interval = self.base_interval()
+        self.sample()
+
+    def set_power_saving(self, power_saving):
+        if power_saving == self.power_saving:
+            return
+        self.power_saving = power_saving
+        if self.mode is not None:
+            self.interval = self.base_interval()
+            self.timer.start(self.interval)
+
+    def base_interval(self):
+        interval = self.INTERVALS[self.mode]
+        if self.power_saving:
+            interval *= self.POWER_SAVING_SLOWDOWN
+        return interval
+
+    def sample(self):
+        started = time.perf_counter()
+        try:
+            cursor = self.position()
+            if cursor is not None:
+                self.publish(self.bucket(cursor, self.anchor()))
+            if cursor is not None and cursor == self.last_position:
+                self.interval = min(max(self.STILL_INTERVAL, self.base_interval()), self.interval * 2)
+            else:
+                self.interval = self.base_interval()
+            self.last_position = cursor
+        finally:
+            self.samples += 1
+            self.registry.observe("cursor.sample", time.perf_counter() - started)
+        self.timer.start(self.interval)
+
+    def bucket(self, cursor, centre):
+        def axis(delta):
+            if delta > self.DEAD_ZONE:
+                return 1
+            if delta < -self.DEAD_ZONE:
+                return -1
+            return 0
+        return axis(cursor[0] - centre[0]), axis(cursor[1] - centre[1])
+
+    def publish(self, direction):
+        if direction == self.direction:
+            return
+        self.direction = direction
+        self.changes += 1
+        self.callback(direction)
+
+    def describe(self):
+        # For the Stats window
+        if self.mode is None:
+            return "off"
+        return f"{self.mode}, every {self.interval / 1000.0:g} s"
@@ -0,0 +1,215 @@
+import os
+import json
+import math
+
+
+LEVELS = ("LOW", "MEDIUM", "HIGH")
+PACK_SUFFIX = ".json"
+
+
+# What she says lives in dialogue packs: JSON files in dialogue/ (and packed
+# into neko.bundle). A pack maps contexts to lines:
+#
+#   {"lines": {
+#       "greeting": ["hi hi", {"text": "mew~", "weight": 3}],
+#       "chatter": {"LOW": ["purr"], "HIGH": ["pet me?"]}
+#   }}
+#
+# A plain list applies at every attention level; a dict gives lines per
+# level. Lines are strings or {"text", "weight"} (weight defaults to 1).
+# Packs are merged, so a new file can add lines to any context.
+def default_dialogue_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "dialogue")
+
+
+_default_engine = None
+
+
+def default_engine():
+    # The packs shipped next to the code, compiled once and shared
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = DialogueEngine.from_dir()
+    return _default_engine
+
+
+def compile_pack(data):
+    # Pack JSON -> {(context, level): [(text, weight), ...]}. Raises
+    # ValueError for anything that isn't shaped like a pack, so a typo in a
+    # hand-edited file is refused as a whole instead of crashing her.
+    if not isinstance(data, dict):
+        raise ValueError("a pack must be a JSON object")
+    contexts = data.get("lines", {})
+    if not isinstance(contexts, dict):
+        raise ValueError('"lines" must map contexts to lines')
+    table = {}
+    for context, lines in contexts.items():
+        if isinstance(lines, dict):
+            by_level = {level: lines.get(level, []) for level in LEVELS}
+        else:
+            by_level = {level: lines for level in LEVELS}
+        for level, pool in by_level.items():
+            if not isinstance(pool, list):
+                raise ValueError(f"{context}: lines must be a list")
+            entries = []
+            for line in pool:
+                text, weight = compile_line(context, line)
+                if weight > 0:
+                    entries.append((text, weight))
+            if entries:
+                table.setdefault((context, level), []).extend(entries)
+    return table
+
+
+def compile_line(context, line):
+    if isinstance(line, str):
+        return line, 1.0
+    if not isinstance(line, dict) or not isinstance(line.get("text"), str):
+        raise ValueError(f"{context}: a line is a string or {{\"text\", \"weight\"}}, not {line!r}")
+    try:
+        weight = float(line.get("weight", 1.0))
+    except (TypeError, ValueError):
+        weight = math.nan
+    if not math.isfinite(weight):
+        raise ValueError(f"{context}: bad weight {line.get('weight')!r}")
+    return line["text"], weight
+
+
+# Walker/Vose alias table: after an O(n) build, each draw is one uniform
+# index plus one biased coin flip, whatever the weights are.
+class AliasTable:
+    __slots__ = ("items", "prob", "alias")
+
+    def __init__(self, entries):
+        self.items = [text for text, _ in entries]
+        n = len(entries)
+        total = sum(weight for _, weight in entries)
+        scaled = [weight * n / total for _, weight in entries]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left is 1.0 up to rounding error
+
+    def __len__(self):
+        return len(self.items)
+
+    def sample(self, rng):
+        i = int(rng.random() * len(self.items))
+        if rng.random() >= self.prob[i]:
+            i = self.alias[i]
+        return self.items[i]
+
+
+# Compiled, merged dialogue. Each pack is compiled on its own; reloading one
+# pack rebuilds only the (context, level) tables it touches.
+class DialogueEngine:
+    # Redraws before giving up on avoiding a recent line
+    MAX_REDRAWS = 8
+
+    def __init__(self):
+        self.packs = {}
+        self.tables = {}
+        self.compiles = 0
+
+    @classmethod
+    def from_dir(cls, directory=None):
+        engine = cls()
+        engine.load_dir(directory or default_dialogue_dir())
+        return engine
+
+    # --- Loading ---
+
+    def load_pack(self, name, data):
+        old = self.packs.get(name, {})
+        self.packs[name] = compile_pack(data)
+        self.compiles += 1
+        self._rebuild(set(old) | set(self.packs[name]))
+
+    def remove_pack(self, name):
+        old = self.packs.pop(name, None)
+        if old is not None:
+            self._rebuild(set(old))
+
+    def load_dir(self, directory):
+        # Loads every pack in directory; returns the names loaded
+        names = []
+        try:
+            files = sorted(os.listdir(directory))
+        except OSError:
+            return names
+        for filename in files:
+            if filename.endswith(PACK_SUFFIX):
+                name = self.load_file(os.path.join(directory, filename))
+                if name is not None:
+                    names.append(name)
+        return names
+
+    def load_file(self, path):
+        # (Re)compiles one pack file. A missing file removes its pack; a
+        # broken one (unreadable, bad JSON, or not shaped like a pack)
+        # leaves the last good version in place.
+        name = pack_name(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.load_pack(name, data)
+        except FileNotFoundError:
+            self.remove_pack(name)
+            return None
+        except (OSError, ValueError):
+            return None
+        return name
+
+    def _rebuild(self, keys):
+        for key in keys:
+            entries = []
+            for pack in self.packs.values():
+                entries.extend(pack.get(key, ()))
+            if entries:
+                self.tables[key] = AliasTable(entries)
+            else:
+                self.tables.pop(key, None)
+
+    # --- Sampling ---
+
+    def has(self, context, level="LOW"):
+        return (context, level) in self.tables
+
+    def choose(self, context, level, rng, recent=None):
+        # Weighted pick for (context, level), avoiding the lines in recent
+        # (a deque of the last lines said). A pool too small to avoid all of
+        # them avoids as many of the latest as it can, so any pool of two or
+        # more never says the same line twice running.
+        table = self.tables.get((context, level))
+        if table is None:
+            return None
+        line = table.sample(rng)
+        if recent is not None:
+            avoid = min(len(recent), len(table) - 1)
+            if avoid > 0:
+                avoided = set(recent) if avoid == len(recent) else set(list(recent)[-avoid:])
+                redraws = self.MAX_REDRAWS
+                while line in avoided and redraws:
+                    line = table.sample(rng)
+                    redraws -= 1
+                if line in avoided:
+                    # Unlucky with a heavily weighted line: take the first allowed one
+                    line = next((item for item in table.items if item not in avoided), line)
+            recent.append(line)
+        return line
+
+    def lines(self):
+        return sum(len(table) for table in self.tables.values())
+
+
+def pack_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
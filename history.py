@@ -0,0 +1,363 @@
+import os
+import sys
+import math
+import time
+import struct
+import zlib
+from array import array
+
+
+# How her mood and your window switching evolve over weeks, in constant
+# memory. Every SAMPLE_INTERVAL the recorder reads each series' source and
+# the sample lands in the current minute; finished minutes roll up into
+# hours and finished hours into days. Each resolution is a fixed ring of
+# float32 min/mean/max arrays, so a pet that has run for a year holds
+# exactly as much as one started a minute ago.
+#
+# (name, bucket width in seconds, buckets kept)
+RESOLUTIONS = (
+    ("minute", 60, 24 * 60),    # a day of minutes
+    ("hour", 3600, 30 * 24),    # a month of hours
+    ("day", 86400, 365),        # a year of days
+)
+
+HISTORY_NAME = "history.bin"
+
+# File: magic, version, series count, then per series its name and per
+# resolution the ring header, the unfinished bucket and the three arrays
+# (float32, little-endian); crc32 of everything after the header at the end
+_HEADER = struct.Struct("<4sHH")
+_MAGIC = b"NKHS"
+_VERSION = 1
+_NAME = struct.Struct("<B")
+_RING = struct.Struct("<IIq")
+_PENDING = struct.Struct("<qdddI")
+_CRC = struct.Struct("<I")
+_NO_BUCKET = -1
+
+NAN = float("nan")
+
+
+class Ring:
+    # The last `capacity` buckets of `width` seconds. Bucket n covers
+    # [n * width, (n + 1) * width) in wall-clock seconds; buckets nobody
+    # wrote (she wasn't running) are NaN.
+    __slots__ = ("width", "capacity", "mins", "means", "maxs", "newest")
+
+    def __init__(self, width, capacity):
+        self.width = width
+        self.capacity = capacity
+        self.mins = array("f", [NAN]) * capacity
+        self.means = array("f", [NAN]) * capacity
+        self.maxs = array("f", [NAN]) * capacity
+        self.newest = None
+
+    def put(self, bucket, lo, mean, hi):
+        if self.newest is not None:
+            if bucket < self.newest - self.capacity:
+                return
+            # Clear what was skipped, at most one lap of the ring
+            for skipped in range(max(self.newest + 1, bucket - self.capacity + 1), bucket):
+                self._set(skipped, NAN, NAN, NAN)
+        self._set(bucket, lo, mean, hi)
+        if self.newest is None or bucket > self.newest:
+            self.newest = bucket
+
+    def _set(self, bucket, lo, mean, hi):
+        slot = bucket % self.capacity
+        self.mins[slot] = lo
+        self.means[slot] = mean
+        self.maxs[slot] = hi
+
+    def window(self, count, end=None):
+        # (mins, means, maxs) for the count buckets up to end, oldest first
+        count = min(count, self.capacity)
+        mins, means, maxs = array("f", [NAN]) * count, array("f", [NAN]) * count, array("f", [NAN]) * count
+        if self.newest is None:
+            return mins, means, maxs
+        end = self.newest if end is None else end
+        for i in range(count):
+            bucket = end - count + 1 + i
+            if self.newest - self.capacity < bucket <= self.newest:
+                slot = bucket % self.capacity
+                mins[i], means[i], maxs[i] = self.mins[slot], self.means[slot], self.maxs[slot]
+        return mins, means, maxs
+
+
+class _Pending:
+    # The bucket still filling up at one resolution
+    __slots__ = ("bucket", "lo", "total", "hi", "n")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bucket = None
+        self.lo = self.total = self.hi = 0.0
+        self.n = 0
+
+    def add(self, lo, total, hi, n):
+        if self.n == 0:
+            self.lo, self.hi = lo, hi
+        else:
+            self.lo, self.hi = min(self.lo, lo), max(self.hi, hi)
+        self.total += total
+        self.n += n
+
+    def mean(self):
+        return self.total / self.n if self.n else NAN
+
+
+class Series:
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.rings = {name: Ring(width, capacity) for name, width, capacity in resolutions}
+        self.order = [name for name, _, _ in resolutions]
+        self.pending = {name: _Pending() for name in self.order}
+
+    def add(self, t, value):
+        self._add(0, t, value, value, value, 1)
+
+    def _add(self, level, t, lo, total, hi, n):
+        name = self.order[level]
+        ring = self.rings[name]
+        pending = self.pending[name]
+        bucket = int(t // ring.width)
+        if pending.bucket is not None and bucket != pending.bucket:
+            self._close(level)
+        if pending.bucket is None:
+            pending.bucket = bucket
+        pending.add(lo, total, hi, n)
+
+    def _close(self, level):
+        # A finished bucket goes into its ring and counts towards the next
+        # resolution up, weighted by how many samples it holds
+        name = self.order[level]
+        ring = self.rings[name]
+        pending = self.pending[name]
+        if pending.n:
+            ring.put(pending.bucket, pending.lo, pending.mean(), pending.hi)
+            if level + 1 < len(self.order):
+                self._add(level + 1, pending.bucket * ring.width, pending.lo, pending.total, pending.hi,
+                          pending.n)
+        pending.reset()
+
+    def window(self, resolution, count, now=None):
+        # The last count buckets up to now, the unfinished one included
+        ring = self.rings[resolution]
+        pending = self.pending[resolution]
+        end = int(now // ring.width) if now is not None else pending.bucket
+        if end is None:
+            end = ring.newest
+        if end is None:
+            return ring.window(count)
+        mins, means, maxs = ring.window(count, end)
+        if pending.n and end - count < pending.bucket <= end:
+            i = pending.bucket - end + count - 1
+            mins[i], means[i], maxs[i] = pending.lo, pending.mean(), pending.hi
+        return mins, means, maxs
+
+
+class History:
+    def __init__(self, names, resolutions=RESOLUTIONS):
+        self.resolutions = resolutions
+        self.series = {name: Series(resolutions) for name in names}
+        self.samples = 0
+
+    def add(self, t, values):
+        for name, value in values.items():
+            series = self.series.get(name)
+            if series is not None and value is not None and not math.isnan(value):
+                series.add(t, value)
+        self.samples += 1
+
+    # --- Persistence ---
+
+    def encode(self):
+        body = []
+        for name, series in self.series.items():
+            encoded = name.encode("utf-8")
+            body.append(_NAME.pack(len(encoded)) + encoded)
+            for resolution in series.order:
+                ring = series.rings[resolution]
+                pending = series.pending[resolution]
+                body.append(_RING.pack(ring.width, ring.capacity,
+                                       _NO_BUCKET if ring.newest is None else ring.newest))
+                body.append(_PENDING.pack(_NO_BUCKET if pending.bucket is None else pending.bucket,
+                                          pending.lo, pending.total, pending.hi, pending.n))
+                for values in (ring.mins, ring.means, ring.maxs):
+                    body.append(_little_endian(values).tobytes())
+        body = b"".join(body)
+        return _HEADER.pack(_MAGIC, _VERSION, len(self.series)) + body + _CRC.pack(zlib.crc32(body))
+
+    def decode(self, blob):
+        # Restores every known series whose layout still matches; returns
+        # False (leaving everything empty) for a damaged or foreign file
+        if len(blob) < _HEADER.size + _CRC.size:
+            return False
+        magic, version, count = _HEADER.unpack_from(blob)
+        body = blob[_HEADER.size:-_CRC.size]
+        (crc,) = _CRC.unpack(blob[-_CRC.size:])
+        if magic != _MAGIC or version != _VERSION or zlib.crc32(body) != crc:
+            return False
+        try:
+            offset = 0
+            for _ in range(count):
+                (length,) = _NAME.unpack_from(body, offset)
+                offset += _NAME.size
+                name = body[offset:offset + length].decode("utf-8")
+                offset += length
+                restored = Series(self.resolutions)
+                matches = True
+                for level in range(len(self.resolutions)):
+                    width, capacity, newest = _RING.unpack_from(body, offset)
+                    offset += _RING.size
+                    bucket, lo, total, hi, n = _PENDING.unpack_from(body, offset)
+                    offset += _PENDING.size
+                    arrays = []
+                    for _ in range(3):
+                        values = array("f")
+                        values.frombytes(body[offset:offset + capacity * values.itemsize])
+                        offset += capacity * values.itemsize
+                        if len(values) != capacity:
+                            raise ValueError("truncated ring")
+                        arrays.append(_little_endian(values))
+                    if level >= len(restored.order):
+                        matches = False
+                        continue
+                    resolution = restored.order[level]
+                    ring = restored.rings[resolution]
+                    if (width, capacity) != (ring.width, ring.capacity):
+                        matches = False
+                        continue
+                    ring.mins, ring.means, ring.maxs = arrays
+                    ring.newest = None if newest == _NO_BUCKET else newest
+                    pending = restored.pending[resolution]
+                    if bucket != _NO_BUCKET:
+                        pending.bucket, pending.lo, pending.total, pending.hi, pending.n = bucket, lo, total, hi, n
+                if matches and name in self.series:
+                    self.series[name] = restored
+        except (struct.error, UnicodeDecodeError, ValueError):
+            self.series = {name: Series(self.resolutions) for name in self.series}
+            return False
+        return True
+
+    def load(self, path):
+        try:
+            with open(path, "rb") as f:
+                return self.decode(f.read())
+        except OSError:
+            return False
+
+
+def _little_endian(values):
+    if sys.byteorder == "little":
+        return values
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped
+
+
+def _number(value):
+    return value is not None and not math.isnan(value)
+
+
+def write_history(path, blob):
+    # Whole-file replace, so a crash mid-write leaves the last good copy.
+    # Runs on a worker thread with a blob encoded on the GUI thread.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Samples each source (name -> callable returning a float) on a scheduler
+# timer, and hands save(blob) an encoded copy every SAVE_INTERVAL. Times are
+# wall-clock so buckets line up across restarts.
+#
+# While she rests (asleep, hidden, you're away) the recorder is paused and
+# wakes nobody. Back within one interval, it simply carries on with its
+# cadence. After longer, the gap is filled with a straight line from the
+# last sample to a new one, which is close to what the meter did: it rises
+# at a steady rate while she sleeps and jumps forward in one step on your
+# return. Series named in decay (name -> time constant in seconds) fade
+# exponentially from the last sample instead, as the switching rate does
+# when nothing switches. Long gaps are filled more coarsely, MAX_FILL
+# samples at most.
+class HistoryRecorder:
+    SAMPLE_INTERVAL = 30000  # ms
+    SAVE_INTERVAL = 3600.0   # seconds
+    MAX_FILL = 2880          # a day of samples
+
+    def __init__(self, history, scheduler, sources, save=None, clock=time.time, decay=None):
+        self.history = history
+        self.sources = sources
+        self.decay = decay or {}
+        self.save = save
+        self.clock = clock
+        self.last_saved = clock()
+        self.last = None  # (time, values) of the latest sample
+        self.paused = False
+        self.timer = scheduler.timer(self.sample)
+
+    def start(self):
+        self.sample()
+        if not self.paused:
+            self.timer.start(self.SAMPLE_INTERVAL)
+
+    def stop(self):
+        self.timer.stop()
+
+    def pause(self):
+        self.paused = True
+        self.timer.stop()
+
+    def resume(self):
+        if not self.paused:
+            return
+        self.paused = False
+        now = self.clock()
+        interval = self.SAMPLE_INTERVAL / 1000.0
+        if self.last is not None and 0.0 <= now - self.last[0] < interval:
+            self.timer.start((interval - (now - self.last[0])) * 1000)
+            return
+        values = self.read()
+        self.fill(now, values)
+        self.record(now, values)
+        self.timer.start(self.SAMPLE_INTERVAL)
+
+    def fill(self, now, values):
+        if self.last is None:
+            return
+        then, before = self.last
+        gap = now - then
+        step = max(self.SAMPLE_INTERVAL / 1000.0, gap / self.MAX_FILL)
+        for i in range(1, int(gap / step)):
+            f = i * step / gap
+            filled = {}
+            for name, a in before.items():
+                if not _number(a) or not _number(values.get(name)):
+                    continue
+                if name in self.decay:
+                    filled[name] = a * math.exp(-i * step / self.decay[name])
+                else:
+                    filled[name] = a + (values[name] - a) * f
+            self.history.add(then + i * step, filled)
+
+    def read(self):
+        return {name: source() for name, source in self.sources.items()}
+
+    def sample(self):
+        self.record(self.clock(), self.read())
+        if self.timer.interval != self.SAMPLE_INTERVAL and not self.paused:
+            # First sample after a short pause: back to the usual cadence
+            self.timer.start(self.SAMPLE_INTERVAL)
+
+    def record(self, now, values):
+        self.history.add(now, values)
+        self.last = (now, values)
+        if self.save is not None and now - self.last_saved >= self.SAVE_INTERVAL:
+            self.last_saved = now
+            self.save(self.history.encode())
@@ -1,39 +1,91 @@
+import time
+process_started = time.perf_counter()
+
 import sys
-import random
+
+if __name__ == "__main__":
+    # Control commands, and launches while she's already running, go to
+    # the running instance before any Qt is loaded
+    import control
+    status = control.run_client(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
+import math
 import os
-import winshell
-import win32gui
-from win32com.client import Dispatch
-from enum import Enum, auto
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, 
-    QMenu, QSystemTrayIcon, QStyle, QGridLayout
+    QMenu, QSystemTrayIcon, QStyle, QGridLayout,
+    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox
+)
+from PySide6.QtCore import Qt, QTimer, QPoint, QEvent, QObject, Signal
+from PySide6.QtGui import QIcon, QCursor
+from window_source import open_foreground_source
+from scheduler import Scheduler
+from brain import NekoBrain, NekoView
+from sprites import SpriteStore, SpriteReloader, LOOKS
+from bundle import open_bundle
+from animation import SpriteView
+from bubble import BubbleView, BubbleCache
+from startup import StartupTimer
+from persistence import StateStore, default_state_dir
+from metrics import REGISTRY, ProcessSampler, StallDetector, timed
+from profiler import PROFILER, default_profile_dir
+from presence import open_presence_service
+from dialogue import DialogueEngine, PACK_SUFFIX, pack_name
+from watcher import FileWatcher
+from control import ControlServer
+from workers import WorkerPool
+from history import History, HistoryRecorder, HISTORY_NAME, write_history
+from sparkline import Sparkline
+from cursor import CursorTracker
+from recording import SessionRecorder, default_trace_dir, dialogue_fingerprint
+import platform_adapter
+
+# (label, resolution, buckets) for the History tab
+HISTORY_RANGES = (
+    ("Last hour", "minute", 60),
+    ("Last day", "minute", 24 * 60),
+    ("Last month", "hour", 30 * 24),
+    ("Last year", "day", 365),
 )
-from PySide6.QtCore import Qt, QTimer, QPoint
-from PySide6.QtGui import QPixmap, QIcon
-
-class NekoState(Enum):
-    IDLE = auto()
-    TALKING = auto()
-    SLEEPING = auto()
-    PEEKING = auto()
 
 class StatsWindow(QWidget):
+    # Everything on screen comes from metrics pushed by the registry, which
+    # only runs its sampling timer while this window is showing
+    metrics_changed = Signal(object)
+
     def __init__(self, neko_ref):
         super().__init__()
         self.neko = neko_ref
+        self.metrics = self.neko.metrics
+        self.metrics_changed.connect(self.update_stats)
         self.init_ui()
         
-        # Timer to refresh stats periodically
-        self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.update_stats)
-        self.refresh_timer.start(1000) # Every 1 second
+    def set_neko(self, neko_ref):
+        # Show another pet's stats
+        self.neko = neko_ref
+        self.update_stats(self.metrics)
         
     def init_ui(self):
         self.setWindowTitle("Neko Stats")
-        self.setFixedSize(250, 180)
+        self.setFixedSize(300, 400)
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.Tool)
+        # Nothing worth keeping around while it's closed
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.init_behavior_tab(), "Neko")
+        self.tabs.addTab(self.init_performance_tab(), "Performance")
+        self.tabs.addTab(self.init_history_tab(), "History")
+        self.tabs.currentChanged.connect(lambda index: self.update_stats(self.metrics))
         
+        layout = QVBoxLayout()
+        layout.addWidget(self.tabs)
+        self.setLayout(layout)
+        
+    def init_behavior_tab(self):
+        tab = QWidget()
         layout = QGridLayout()
         
         self.lbl_attention = QLabel("Attention Meter:")
@@ -51,79 +103,228 @@ class StatsWindow(QWidget):
         self.lbl_lines = QLabel("Lines Spoken:")
         self.val_lines = QLabel("0")
         
+        self.lbl_switching = QLabel("Window Switching:")
+        self.val_switching = QLabel("-")
+        
         # Styling
         font = self.lbl_attention.font()
         font.setPointSize(10)
         
-        for lbl in [self.lbl_attention, self.val_attention, self.lbl_level, self.val_level,
-                    self.lbl_pets, self.val_pets, self.lbl_sleeps, self.val_sleeps,
-                    self.lbl_lines, self.val_lines]:
+        rows = [(self.lbl_attention, self.val_attention), (self.lbl_level, self.val_level),
+                (self.lbl_pets, self.val_pets), (self.lbl_sleeps, self.val_sleeps),
+                (self.lbl_lines, self.val_lines), (self.lbl_switching, self.val_switching)]
+        for row, (lbl, val) in enumerate(rows):
             lbl.setFont(font)
-            
-        layout.addWidget(self.lbl_attention, 0, 0)
-        layout.addWidget(self.val_attention, 0, 1)
+            val.setFont(font)
+            layout.addWidget(lbl, row, 0)
+            layout.addWidget(val, row, 1)
+        layout.setRowStretch(len(rows), 1)
         
-        layout.addWidget(self.lbl_level, 1, 0)
-        layout.addWidget(self.val_level, 1, 1)
+        tab.setLayout(layout)
+        return tab
         
-        layout.addWidget(self.lbl_pets, 2, 0)
-        layout.addWidget(self.val_pets, 2, 1)
-        
-        layout.addWidget(self.lbl_sleeps, 3, 0)
-        layout.addWidget(self.val_sleeps, 3, 1)
-        
-        layout.addWidget(self.lbl_lines, 4, 0)
-        layout.addWidget(self.val_lines, 4, 1)
-        
-        self.setLayout(layout)
-        self.update_stats()
+    def init_performance_tab(self):
+        tab = QWidget()
+        layout = QGridLayout()
         
-    def update_stats(self):
-        self.val_attention.setText(f"{self.neko.attention_meter:.1f} / 100")
-        self.val_level.setText(self.neko.attention_level)
-        self.val_pets.setText(str(self.neko.stats_pets_received))
-        self.val_sleeps.setText(str(self.neko.stats_times_slept))
-        self.val_lines.setText(str(self.neko.stats_lines_spoken))
-
-class NekoWidget(QWidget):
-    def __init__(self):
+        self.lbl_wakeups_min = QLabel("Wakeups / Min:")
+        self.val_wakeups_min = QLabel("0")
+        
+        self.lbl_wakeups = QLabel("Wakeups / Hour:")
+        self.val_wakeups = QLabel("0")
+        
+        self.lbl_memory = QLabel("Memory (RSS):")
+        self.val_memory = QLabel("-")
+        
+        self.lbl_cpu = QLabel("CPU:")
+        self.val_cpu = QLabel("-")
+        
+        self.lbl_bubbles = QLabel("Bubble Cache Hits:")
+        self.val_bubbles = QLabel("0%")
+        
+        self.lbl_startup = QLabel("Startup:")
+        self.val_startup = QLabel("-")
+        
+        self.lbl_stalls = QLabel("GUI Stalls (>16 ms):")
+        self.val_stalls = QLabel("0")
+        
+        self.lbl_cursor = QLabel("Cursor Tracking:")
+        self.val_cursor = QLabel("off")
+        
+        rows = [(self.lbl_wakeups_min, self.val_wakeups_min), (self.lbl_wakeups, self.val_wakeups),
+                (self.lbl_memory, self.val_memory), (self.lbl_cpu, self.val_cpu),
+                (self.lbl_bubbles, self.val_bubbles), (self.lbl_startup, self.val_startup),
+                (self.lbl_stalls, self.val_stalls), (self.lbl_cursor, self.val_cursor)]
+        for row, (lbl, val) in enumerate(rows):
+            layout.addWidget(lbl, row, 0)
+            layout.addWidget(val, row, 1)
+        
+        # Per-handler latency, slowest total first
+        self.handlers = QTableWidget(0, 4)
+        self.handlers.setHorizontalHeaderLabels(["Handler", "Calls", "p50", "p99"])
+        self.handlers.verticalHeader().hide()
+        self.handlers.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.handlers.setSelectionMode(QTableWidget.NoSelection)
+        header = self.handlers.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, 4):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        layout.addWidget(self.handlers, len(rows), 0, 1, 2)
+        
+        tab.setLayout(layout)
+        return tab
+        
+    def init_history_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout()
+        
+        self.history_range = QComboBox()
+        for label, _, _ in HISTORY_RANGES:
+            self.history_range.addItem(label)
+        self.history_range.currentIndexChanged.connect(lambda index: self.update_history(force=True))
+        layout.addWidget(self.history_range)
+        
+        # (series, chart, caption, summary label, unit)
+        self.charts = []
+        for name, caption, color, high, unit in (("attention", "Attention", "#d0783c", 100.0, ""),
+                                                 ("switching", "Window Switching", "#4a7fc1", None, " / min")):
+            header = QGridLayout()
+            title = QLabel(caption + ":")
+            summary = QLabel("-")
+            summary.setAlignment(Qt.AlignRight)
+            header.addWidget(title, 0, 0)
+            header.addWidget(summary, 0, 1)
+            chart = Sparkline(color, high=high)
+            layout.addLayout(header)
+            layout.addWidget(chart)
+            self.charts.append((name, chart, summary, unit))
+        layout.addStretch(1)
+        self.history_drawn = None
+        
+        tab.setLayout(layout)
+        return tab
+        
+    def update_history(self, force=False):
+        # Redrawn only when a new sample came in (every few seconds at most)
+        history = self.neko.history
+        key = (id(history), history.samples)
+        if key == self.history_drawn and not force:
+            return
+        self.history_drawn = key
+        _, resolution, count = HISTORY_RANGES[self.history_range.currentIndex()]
+        now = time.time()
+        for name, chart, summary, unit in self.charts:
+            mins, means, maxs = history.series[name].window(resolution, count, now)
+            chart.set_data(mins, means, maxs)
+            seen = [(lo, mean, hi) for lo, mean, hi in zip(mins, means, maxs) if not math.isnan(mean)]
+            if seen:
+                average = sum(mean for _, mean, _ in seen) / len(seen)
+                summary.setText(f"{min(lo for lo, _, _ in seen):.1f} / {average:.1f} / "
+                                f"{max(hi for _, _, hi in seen):.1f}{unit}")
+                summary.setToolTip("min / mean / max")
+            else:
+                summary.setText("-")
+        
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.metrics.subscribe(self.metrics_changed.emit)
+        
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.metrics.unsubscribe(self.metrics_changed.emit)
+        
+    def update_stats(self, metrics):
+        brain = self.neko.brain
+        self.val_attention.setText(f"{brain.attention_meter:.1f} / 100")
+        self.val_level.setText(brain.attention_level)
+        self.val_pets.setText(str(brain.stats_pets_received))
+        self.val_sleeps.setText(str(brain.stats_times_slept))
+        self.val_lines.setText(str(brain.stats_lines_spoken))
+        self.val_switching.setText(f"{brain.switch_rate.per_minute():.1f} / min")
+        if brain.window_source is not None:
+            apps = brain.window_source.apps
+            self.val_switching.setToolTip(f"{brain.switch_rate.switches} switches, "
+                                          f"{apps.hits}/{apps.hits + apps.misses} app lookups cached")
+        
+        # Only the visible tab is worth filling in
+        if self.tabs.currentIndex() == 2:
+            self.update_history()
+        if self.tabs.currentIndex() != 1:
+            return
+        self.val_wakeups_min.setText(f"{brain.scheduler.wakeups_per_minute():.0f}")
+        self.val_wakeups.setText(f"{brain.scheduler.wakeups_per_hour():.0f}")
+        rss = metrics.gauges.get("process.rss_mb")
+        if rss is not None:
+            self.val_memory.setText(f"{rss.value:.1f} MB")
+        cpu = metrics.gauges.get("process.cpu_percent")
+        if cpu is not None:
+            self.val_cpu.setText(f"{cpu.value:.1f}% ({metrics.gauge('process.cpu_seconds').value:.1f} s total)")
+        bubbles = self.neko.bubble.cache
+        self.val_bubbles.setText(f"{bubbles.hit_rate() * 100:.0f}% ({len(bubbles)} cached)")
+        startup = self.neko.startup
+        self.val_startup.setText(f"{startup.total() * 1000:.0f} ms")
+        self.val_startup.setToolTip(startup.summary())
+        stalls = self.neko.app.stall_detector
+        if stalls is not None:
+            self.val_stalls.setText(f"{stalls.stalls} (longest {stalls.longest * 1000:.0f} ms)" if stalls.stalls else "0")
+            self.val_stalls.setToolTip(f"Longest in {stalls.worst}" if stalls.worst else "")
+        
+        tracker = self.neko.cursor_tracker
+        cost = metrics.histograms.get("cursor.sample")
+        self.val_cursor.setText(tracker.describe() + (f", {format_latency(cost.percentile(50))}" if cost else ""))
+        self.val_cursor.setToolTip(f"{tracker.samples} samples, {tracker.changes} turns"
+                                   + (f", {cost.total * 1000:.1f} ms in total" if cost else ""))
+        
+        histograms = sorted(metrics.histogram_list(), key=lambda h: h.total, reverse=True)
+        self.handlers.setRowCount(len(histograms))
+        for row, histogram in enumerate(histograms):
+            cells = [histogram.name, str(histogram.count),
+                     format_latency(histogram.percentile(50)), format_latency(histogram.percentile(99))]
+            for column, text in enumerate(cells):
+                item = self.handlers.item(row, column)
+                if item is None:
+                    self.handlers.setItem(row, column, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+
+def format_latency(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 0.001:
+        return f"{seconds * 1e6:.0f} µs"
+    return f"{seconds * 1000:.1f} ms"
+
+# A thin Qt view over NekoBrain: it draws what the brain asks for and feeds
+# it mouse and window events. All behavior lives in brain.py, and everything
+# pets can share (sprites, scheduler, window watcher, tray) lives in NekoApp.
+class NekoWidget(QWidget, NekoView):
+    def __init__(self, app, index=0):
         super().__init__()
         
-        self.state = NekoState.IDLE
+        self.app = app
+        self.index = index
         self.drag_position = QPoint()
-        
-        self.last_active_window = 0
-        self.window_change_count = 0
-        
-        # --- NEW: Attention Meter System ---
-        self.attention_meter = 0.0  # 0 to 100
-        self.high_attention_unanswered_time = 0
-        self.giving_up = False
-        self.is_manually_hidden = False
-        self.temp_unhidden_for_dialogue = False
-        
-        self.stats_pets_received = 0
-        self.stats_times_slept = 0
-        self.stats_lines_spoken = 0
-        self.stats_window = None
-        # -----------------------------------
+        self.context_menu = None
+        self.scheduler = app.scheduler
+        self.sprites = app.sprites
+        self.sprites_dpr = app.sprites_dpr
+        self.metrics = app.metrics
+        self.startup = app.startup
         
         self.init_ui()
-        self.load_assets()
-        self.init_timers()
-        self.init_tray()
         
-        # Initial position - bottom right
-        self.position_to_bottom_right()
+        self.init_state_store()
+        self.brain = NekoBrain(view=self, scheduler=self.scheduler, window_source=app.window_source,
+                               dialogue=app.dialogue, store=self.state_store, recorder=app.recorder)
         
-        # Start the inactivity/sleep tracking
-        self.reset_sleep_timer()
-        
-        # Startup greeting timer (5 seconds)
-        QTimer.singleShot(5000, self.do_greeting)
-        
-        # Ensure it runs on startup
-        self.setup_autostart()
+        # Pick up where she left off: stats, attention (advanced by the time
+        # she was closed) and position. First launch starts bottom right.
+        saved = self.state_store.load() if self.state_store else {}
+        offline = max(0.0, time.time() - saved["saved_at"]) if "saved_at" in saved else 0.0
+        self.brain.restore_state(saved, offline)
+        if not self.restore_position(saved):
+            self.position_to_bottom_right()
+        self.init_history()
         
         # Enable mouse tracking so enterEvent detects hover without clicking
         self.setMouseTracking(True)
@@ -137,496 +338,566 @@ class NekoWidget(QWidget):
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
         
-        # Speech bubble
-        self.bubble = QLabel("")
-        self.bubble.setAlignment(Qt.AlignCenter)
-        self.bubble.setStyleSheet("""
-            QLabel {
-                background-color: rgba(255, 255, 255, 220);
-                border: 2px solid #aaa;
-                border-radius: 12px;
-                padding: 6px 12px;
-                font-family: 'Segoe UI', Arial;
-                font-weight: bold;
-                font-size: 13px;
-                color: #333;
-            }
-        """)
-        
-        # Prevent layout from shifting when the bubble hides/shows
-        size_policy = self.bubble.sizePolicy()
-        size_policy.setRetainSizeWhenHidden(True)
-        self.bubble.setSizePolicy(size_policy)
-        
-        self.bubble.hide()
-        
-        # Neko image
-        self.neko_image = QLabel()
-        self.neko_image.setAlignment(Qt.AlignCenter)
+        # Neko image, painted and animated by the sprite view. Rendered
+        # frames are shared by every pet.
+        self.neko_image = SpriteView(self.sprites, self.scheduler, size=self.sprites.size, frames=self.app.frames)
+        self.neko_image.set_dpr(self.sprites_dpr)
+        
+        # Where she looks. The brain decides how closely (set_tracking) and
+        # only a new direction reaches the sprite.
+        self.cursor_tracker = CursorTracker(self.scheduler, self.cursor_position, self.gaze_anchor,
+                                            self.neko_image.set_gaze)
+        
+        # Speech bubble: cached pre-rendered pixmaps blitted into the space
+        # above her, so a new line never restyles or relayouts the window
+        self.bubble = BubbleView(160, 200 - self.neko_image.height(), cache=self.app.bubble_cache)
+        self.bubble.set_dpr(self.sprites_dpr)
         
         self.layout.addWidget(self.bubble)
         self.layout.addWidget(self.neko_image)
-        self.layout.setAlignment(self.bubble, Qt.AlignBottom | Qt.AlignHCenter)
         self.layout.setAlignment(self.neko_image, Qt.AlignTop | Qt.AlignHCenter)
         
         self.setLayout(self.layout)
         
         self.setFixedSize(160, 200)
 
-    def load_assets(self):
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        
-        idle_path = os.path.join(base_path, 'assets', 'neko_idle.png')
-        sleep_path = os.path.join(base_path, 'assets', 'neko_sleep.png')
-        happy_path = os.path.join(base_path, 'assets', 'neko_happy.png')
-        peek_path = os.path.join(base_path, 'assets', 'neko_peek.png')
-        curious_path = os.path.join(base_path, 'assets', 'neko_curious.png')
-        agitated_path = os.path.join(base_path, 'assets', 'neko_agitated.png')
-        
-        self.idle_pixmap = QPixmap(idle_path)
-        self.sleep_pixmap = QPixmap(sleep_path)
-        self.happy_pixmap = QPixmap(happy_path)
-        self.peek_pixmap = QPixmap(peek_path)
-        self.curious_pixmap = QPixmap(curious_path)
-        self.agitated_pixmap = QPixmap(agitated_path)
-        
-        # Scale if necessary
-        if not self.idle_pixmap.isNull():
-            self.idle_pixmap = self.idle_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        if not self.sleep_pixmap.isNull():
-            self.sleep_pixmap = self.sleep_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        if not self.happy_pixmap.isNull():
-            self.happy_pixmap = self.happy_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        if not self.peek_pixmap.isNull():
-            self.peek_pixmap = self.peek_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        if not self.curious_pixmap.isNull():
-            self.curious_pixmap = self.curious_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        if not self.agitated_pixmap.isNull():
-            self.agitated_pixmap = self.agitated_pixmap.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-
-        self.set_image(self.idle_pixmap)
-
-    def set_image(self, pixmap):
-        if not pixmap.isNull():
-            self.neko_image.setPixmap(pixmap)
-        else:
-            self.neko_image.setText("[NEKO]")
-            self.neko_image.setStyleSheet("color: white; background-color: black; padding: 10px;")
-
-    def init_timers(self):
-        # Speech bubble timer
-        self.bubble_timer = QTimer(self)
-        self.bubble_timer.setSingleShot(True)
-        self.bubble_timer.timeout.connect(self.hide_bubble)
-        
-        # Random dialogue timer (every 2-5 minutes)
-        self.dialogue_timer = QTimer(self)
-        self.dialogue_timer.timeout.connect(self.random_dialogue)
-        self.set_next_dialogue_timer()
-        
-        # Sleep timer (3 minutes of inactivity)
-        self.sleep_timer = QTimer(self)
-        self.sleep_timer.setSingleShot(True)
-        self.sleep_timer.timeout.connect(self.go_to_sleep)
-        
-        # Active window tracker (polls every 2 seconds to reduce noise)
-        self.window_tracker_timer = QTimer(self)
-        self.window_tracker_timer.timeout.connect(self.check_active_window)
-        self.window_tracker_timer.start(2000)
-        
-        # Window change reset timer
-        self.window_change_reset_timer = QTimer(self)
-        self.window_change_reset_timer.setSingleShot(True)
-        self.window_change_reset_timer.timeout.connect(self.reset_window_change_count)
-        
-        # Peek back-to-sleep timer
-        self.peek_timer = QTimer(self)
-        self.peek_timer.setSingleShot(True)
-        self.peek_timer.timeout.connect(self.end_peek)
-        
-        # --- NEW: Attention Tracker Update Loop ---
-        self.attention_tracker_timer = QTimer(self)
-        self.attention_tracker_timer.timeout.connect(self.update_attention)
-        self.attention_tracker_timer.start(10000)  # Every 10 seconds
-
-    def set_next_dialogue_timer(self):
-        if self.attention_level == "HIGH":
-            # 15 to 30 seconds
-            ms = random.randint(15000, 30000)
-        elif self.attention_level == "MEDIUM":
-            # 30 to 60 seconds
-            ms = random.randint(30000, 60000)
-        else:
-            # 1 to 2 minutes
-            ms = random.randint(60000, 120000)
-        self.dialogue_timer.start(ms)
-
-    def reset_sleep_timer(self):
-        if self.attention_level == "HIGH":
-            self.sleep_timer.start(90000) # Resist sleeping (1.5 minutes)
-        elif self.attention_level == "MEDIUM":
-            self.sleep_timer.start(45000) # (45 seconds)
-        else:
-            self.sleep_timer.start(30000) # (30 seconds)
-            
-        if self.state in [NekoState.SLEEPING, NekoState.PEEKING]:
-            self.wake_up()
-
-    def check_active_window(self):
-        # We track window changes in IDLE and TALKING
-        if self.state not in [NekoState.SLEEPING, NekoState.PEEKING, NekoState.IDLE, NekoState.TALKING]:
+    def init_state_store(self):
+        state_dir = default_state_dir()
+        if not state_dir:
+            self.state_store = None
             return
-            
-        current_window = win32gui.GetForegroundWindow()
-        
-        if current_window and self.last_active_window and current_window != self.last_active_window:
-            
-            # Action if IDLE or TALKING
-            if self.state in [NekoState.IDLE, NekoState.TALKING]:
-                self.window_change_count += 1
-                self.reset_sleep_timer()  # Keep it awake like an interaction
-                
-                if self.window_change_count == 3:
-                    # Speak on 3rd window switch (more stable than 2)
-                    self.set_image(self.curious_pixmap)
-                    lines = [
-                        "Are you working?", "ooh, new app", "whatcha lookin at?", 
-                        "switchy switchy", "working hard?", "so many windows!"
-                    ]
-                    self.say(random.choice(lines))
-                    # Wait 8 seconds to turn back to idle (or get dizzy if 3 more changes)
-                    self.window_change_reset_timer.start(8000)
-                    
-                elif self.window_change_count >= 6:
-                    # Agitated state! Fast switching within the 8 seconds
-                    self.set_image(self.agitated_pixmap)
-                    lines = [
-                        "wat r u doin?!", "my head's spinnin!", "slow down >_<", 
-                        "too many screens!", "stahp switchin!", "ahhhhhhh!"
-                    ]
-                    self.say(random.choice(lines))
-                    self.window_change_count = 0  # Reset after scolding
-                    self.window_change_reset_timer.stop()
-            
-            # Action if SLEEPING or PEEKING
-            else:
-                self.window_change_count += 1
-                
-                # Start timer for full wake reset
-                if self.window_change_count == 1:
-                    self.window_change_reset_timer.start(12000)
-                    
-                if self.window_change_count >= 3:
-                    # Wake up fully if frantic typing/switching is happening
-                    self.wake_up()
-                    self.say(random.choice(["woah, meow 0w0", "slow down!", "what's going on?", "you woke me -w-"]))
-                    self.window_change_count = 0
-                    self.window_change_reset_timer.stop()
-                elif self.window_change_count >= 1 and self.state == NekoState.SLEEPING:
-                    # Just peek if it's a minor change
-                    self.start_peek()
-                
-        self.last_active_window = current_window
+        # The first pet keeps the original location; the rest get their own
+        if self.index:
+            state_dir = os.path.join(state_dir, f"pet-{self.index}")
+        self.state_store = StateStore(state_dir, self.scheduler, self.collect_state)
+        QApplication.instance().aboutToQuit.connect(self.state_store.close)
+
+    def init_history(self):
+        # Minute, hour and day rollups of her mood and your window
+        # switching, kept next to her state
+        self.history = History(("attention", "switching"))
+        self.history_path = os.path.join(self.state_store.directory, HISTORY_NAME) if self.state_store else None
+        if self.history_path:
+            self.history.load(self.history_path)
+        self.history_recorder = HistoryRecorder(self.history, self.scheduler, {
+            "attention": lambda: self.brain.attention_meter,
+            "switching": self.brain.switch_rate.per_minute,
+        }, save=self.save_history if self.history_path else None,
+            decay={"switching": self.brain.switch_rate.tau})
+        self.history_recorder.start()
+        if self.history_path:
+            QApplication.instance().aboutToQuit.connect(self.close_history)
+
+    def save_history(self, blob):
+        self.app.workers.submit(write_history, self.history_path, blob, name="save_history")
+
+    def close_history(self):
+        self.history_recorder.stop()
+        try:
+            write_history(self.history_path, self.history.encode())
+        except OSError:
+            pass
+
+    def collect_state(self):
+        state = self.brain.export_state()
+        state["x"] = self.x()
+        state["y"] = self.y()
+        return state
+
+    def restore_position(self, saved):
+        if "x" not in saved or "y" not in saved:
+            return False
+        pos = QPoint(int(saved["x"]), int(saved["y"]))
+        # The screen she was on may be gone
+        if QApplication.screenAt(pos + QPoint(self.width() // 2, self.height() // 2)) is None:
+            return False
+        self.move(pos)
+        return True
+
+    def moveEvent(self, event):
+        super().moveEvent(event)
+        if getattr(self, "state_store", None) is not None:
+            self.state_store.mark_dirty()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        window = self.windowHandle()
+        if window is not None and not getattr(self, "screen_tracking", False):
+            window.screenChanged.connect(self.on_screen_changed)
+            self.screen_tracking = True
+
+    def on_screen_changed(self, screen):
+        dpr = self.devicePixelRatioF()
+        if dpr == self.sprites_dpr:
+            return
+        self.sprites_dpr = dpr
+        self.neko_image.set_dpr(dpr)
+        self.bubble.set_dpr(dpr)
+        self.app.release_unused_dprs()
 
-    def update_attention(self):
-        if self.giving_up:
-            return  # Paused attention math while ignoring
+    # NekoView
+    def set_look(self, look):
+        self.neko_image.set_look(look)
 
-        # Base increase
-        delta = 2.0 # Way faster base increase
-        
-        # Modifiers based on states
-        if self.state in [NekoState.IDLE, NekoState.TALKING]:
-            if self.window_change_count > 0:
-                delta += 4.0  # Watching you be busy rapidly scales it
-            else:
-                delta += 1.0  # You are also idle
-        elif self.state == NekoState.SLEEPING:
-            delta += 0.8  # Slow increase while sleeping
-            
-        self.attention_meter += delta
-        
-        # Clamp bounds
-        if self.attention_meter > 100.0:
-            self.attention_meter = 100.0
-            
-        # Track decay if at HIGH
-        if self.attention_level == "HIGH":
-            self.high_attention_unanswered_time += 10
-            
-            # 5 minutes of no interaction at max level = decay (300 seconds)
-            if self.high_attention_unanswered_time >= 300:
-                self.trigger_giving_up()
-        else:
-            self.high_attention_unanswered_time = 0
-            
-    def trigger_giving_up(self):
-        self.giving_up = True
-        self.attention_meter = 10.0  # Drop back down to sad/content range
-        self.high_attention_unanswered_time = 0
-        if self.state in [NekoState.IDLE, NekoState.TALKING]:
-             self.say("...nevermind")
-             QTimer.singleShot(4000, self.go_to_sleep)
-
-    @property
-    def attention_level(self):
-        if self.attention_meter <= 30:
-            return "LOW"
-        elif self.attention_meter <= 70:
-            return "MEDIUM"
-        else:
-            return "HIGH"
-
-    def reset_window_change_count(self):
-        self.window_change_count = 0
-
-    def start_peek(self):
-        self.state = NekoState.PEEKING
-        self.set_image(self.peek_pixmap)
-        self.setWindowOpacity(0.9)
-        self.peek_timer.start(3000)  # Peek for 3 seconds then go back to sleep
-
-    def end_peek(self):
-        if self.state == NekoState.PEEKING:
-            self.go_to_sleep()
-
-    def do_greeting(self):
-        greetings = ["mrrp… hello", "you’re back, meow", "hi hi", "mew~", "oh! there you are"]
-        self.say(random.choice(greetings))
-
-    def random_dialogue(self):
-        # If sleeping, there's a chance it wakes up just to talk
-        if self.state == NekoState.SLEEPING:
-            # Only wake occasionally if attention is high/medium
-            if self.attention_level == "LOW" and random.random() < 0.8:
-                self.set_next_dialogue_timer()
-                return # stays asleep
-
-            self.wake_up()
-            lines = [
-                "m... mrrp?", "i'm awake now", "where am i...",
-                "just checking in", "is it time for treats?"
-            ]
-        else:
-            if self.attention_level == "HIGH":
-                lines = [
-                    "hey…", "mrrp?", "look at me", "pet me?", 
-                    "you forgot me", "i’m still here", "pay attention to me!",
-                    "notice me...", "don't ignore me", "i want pets!", 
-                    "play with me?", "meow meow meow!!"
-                ]
-            elif self.attention_level == "MEDIUM":
-                lines = [
-                    "mew?", "what are you doing", "i’m watching you", 
-                    "busy?", "needs pets", "whatcha doing there", 
-                    "interesting...", "i'm bored", "is that work?", 
-                    "can I help?", "hmmm"
-                ]
-            else:
-                lines = [
-                    "mrrp", "comfy…", "i’m here", "needs muffins",
-                    "so cozy", "warm...", "zzz...", "peaceful", 
-                    "good human", "purr"
-                ]
-                
-        self.say(random.choice(lines))
-        self.set_next_dialogue_timer()
+    def set_opacity(self, opacity):
+        # Baked into her cached frames; fading the whole window would make
+        # the compositor blend the bubble and every animation frame too
+        self.neko_image.set_opacity(opacity)
 
-    def pet_reaction(self):
-        self.stats_pets_received += 1
-        
-        # Satisfaction Event
-        dropped_a_lot = False
-        if self.attention_meter >= 25.0:
-            dropped_a_lot = True
+    def show_bubble(self, text):
+        self.bubble.show_text(text)
 
-        self.attention_meter = max(0.0, self.attention_meter - 25.0)
-        self.giving_up = False # Reset from sad state
-        self.high_attention_unanswered_time = 0
+    def hide_bubble(self):
+        self.bubble.clear()
 
-        if dropped_a_lot:
-            lines = ["purrr…", "hehe", "that’s nice", "stay…"]
+    def set_visible(self, visible):
+        if visible:
+            self.show()
         else:
-            lines = ["mrrrow~", "hehe meow", "again again", "more pets pls"]
-            
-        self.set_image(self.happy_pixmap)
-        self.say(random.choice(lines))
+            self.hide()
 
-    def wake_up(self):
-        self.state = NekoState.IDLE
-        self.setWindowOpacity(1.0)
-        self.set_image(self.idle_pixmap)
-        
-        wake_lines = ["m… meow?", "did i sleep", "oh hi", "i was dreaming"]
-        self.say(random.choice(wake_lines))
+    def set_suspended(self, suspended):
+        self.neko_image.set_suspended(suspended)
 
-    def go_to_sleep(self):
-        self.stats_times_slept += 1
-        self.state = NekoState.SLEEPING
-        self.set_image(self.sleep_pixmap)
-        self.setWindowOpacity(0.7)
-        self.hide_bubble()
+    def set_power_saving(self, power_saving):
+        self.neko_image.set_power_saving(power_saving)
+        self.cursor_tracker.set_power_saving(power_saving)
 
-    def say(self, text):
-        self.stats_lines_spoken += 1
-        
-        if self.is_manually_hidden:
-            self.show()
-            self.temp_unhidden_for_dialogue = True
+    def set_tracking(self, mode):
+        self.cursor_tracker.set_mode(mode)
 
-        self.bubble.setText(text)
-        self.bubble.show()
-        self.state = NekoState.TALKING
-        self.bubble_timer.start(4000)
-        self.reset_sleep_timer()
+    def set_resting(self, resting):
+        if resting:
+            self.history_recorder.pause()
+        else:
+            self.history_recorder.resume()
 
-    def hide_bubble(self):
-        self.bubble.hide()
-        if self.state == NekoState.TALKING:
-            self.state = NekoState.IDLE
-            self.set_image(self.idle_pixmap)
-            
-        if self.temp_unhidden_for_dialogue:
-            self.hide()
-            self.temp_unhidden_for_dialogue = False
+    def cursor_position(self):
+        pos = QCursor.pos()
+        return pos.x(), pos.y()
+
+    def gaze_anchor(self):
+        centre = self.neko_image.mapToGlobal(self.neko_image.rect().center())
+        return centre.x(), centre.y()
 
     # Window Movement & Interaction
+    @timed()
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.drag_position = event.globalPosition().toPoint() - self.frameGeometry().topLeft()
             event.accept()
-            
-            # If she's temporarily unhidden for dialogue and user clicks her, unhide her completely.
-            if self.temp_unhidden_for_dialogue:
-                self.is_manually_hidden = False
-                self.temp_unhidden_for_dialogue = False
-            
-            # Interaction Logic
-            if self.state == NekoState.SLEEPING:
-                self.reset_sleep_timer()
-                self.giving_up = False
-            else:
-                self.pet_reaction()
-                self.reset_sleep_timer()
+            self.brain.pressed()
                 
         elif event.button() == Qt.RightButton:
             self.show_context_menu(event.globalPosition().toPoint())
 
+    @timed()
     def mouseMoveEvent(self, event):
         if event.buttons() == Qt.LeftButton:
             self.move(event.globalPosition().toPoint() - self.drag_position)
             event.accept()
-            self.reset_sleep_timer()
+            self.brain.dragged()
 
+    @timed()
     def enterEvent(self, event):
         # Hover tracking for waking up
-        self.reset_sleep_timer()
+        self.brain.hovered()
         super().enterEvent(event)
 
     def position_to_bottom_right(self):
+        # Pets line up leftwards from the bottom right corner, then stack
+        # upwards when a row is full
         screen = QApplication.primaryScreen().availableGeometry()
-        x = screen.width() - self.width() - 50
-        y = screen.height() - self.height() - 50
+        per_row = max(1, (screen.width() - 100) // self.width())
+        row, column = divmod(self.index, per_row)
+        x = screen.width() - self.width() * (column + 1) - 50
+        y = screen.height() - self.height() * (row + 1) - 50
         self.move(x, y)
 
     def hide_neko(self):
-        self.is_manually_hidden = True
-        self.hide()
+        self.brain.hide()
 
     def show_neko(self):
-        self.is_manually_hidden = False
-        self.temp_unhidden_for_dialogue = False
-        self.show()
+        self.brain.show()
 
     def open_stats_window(self):
-        if not self.stats_window:
-            self.stats_window = StatsWindow(self)
-        self.stats_window.show()
-        self.stats_window.raise_()
+        self.app.open_stats_window(self)
 
     def show_context_menu(self, pos):
-        menu = QMenu(self)
-        if self.is_manually_hidden:
-            toggle_action = menu.addAction("Unhide")
-        else:
-            toggle_action = menu.addAction("Hide")
+        # Built on the first right-click and reused for the rest of her
+        # life; only the toggle's text changes. popup() rather than exec()
+        # so no nested event loop runs while it's open.
+        if self.context_menu is None:
+            self.context_menu = QMenu(self)
+            self.toggle_action = self.context_menu.addAction("Hide")
+            stats_action = self.context_menu.addAction("Stats")
+            exit_action = self.context_menu.addAction("Exit")
             
-        stats_action = menu.addAction("Stats")
-        exit_action = menu.addAction("Exit")
+            self.toggle_action.triggered.connect(self.toggle_hidden)
+            stats_action.triggered.connect(lambda: self.open_stats_window())
+            exit_action.triggered.connect(QApplication.quit)
+        self.toggle_action.setText("Unhide" if self.brain.is_manually_hidden else "Hide")
+        self.context_menu.popup(pos)
+
+    def toggle_hidden(self):
+        if self.brain.is_manually_hidden:
+            self.show_neko()
+        else:
+            self.hide_neko()
+
+# Everything the pets in one process share: the scheduler and its one
+# QTimer, the sprite store and rendered frames, the bubble cache, the
+# foreground window source (whose events fan out to every brain), the
+# presence service and a single tray icon.
+class NekoApp(QObject):
+    # Carries focus changes from the window source's thread to the GUI thread
+    focus_changed = Signal(object)
+
+    def __init__(self, pets=1, startup=None, instance_lock=None, clock=None, recorder=None):
+        super().__init__()
         
-        action = menu.exec(pos)
-        if action == toggle_action:
-            if self.is_manually_hidden:
-                self.show_neko()
-            else:
-                self.hide_neko()
-        elif action == stats_action:
-            self.open_stats_window()
-        elif action == exit_action:
-            QApplication.quit()
+        # Every deadline and decay runs off this clock; tools/bench.py
+        # passes a VirtualClock to fast-forward simulated hours
+        self.clock = clock or time.monotonic
+        # --record: a SessionRecorder every brain reports to
+        self.recorder = recorder
+        
+        self.pets = []
+        self.stats_window = None
+        self.presence = None
+        # Only the instance holding the lock answers control commands
+        self.instance_lock = instance_lock
+        self.control_server = None
+        self.startup = startup if startup is not None else StartupTimer()
+        
+        self.init_timers()
+        self.load_assets()
+        self.startup.mark("assets")
+        self.init_recorder()
+        self.init_window_source()
+        self.init_tray()
+        
+        for _ in range(max(1, pets)):
+            self.add_pet()
+        self.init_presence()
+        self.startup.mark("setup")
+        
+        # Everything not needed for the first frame waits until it's drawn
+        self.pets[0].neko_image.installEventFilter(self)
+
+    def add_pet(self):
+        pet = NekoWidget(self, index=len(self.pets))
+        self.pets.append(pet)
+        self.focus_changed.connect(pet.brain.focus_changed)
+        pet.brain.start()
+        if self.presence is not None:
+            pet.brain.set_on_battery(self.presence.on_battery)
+            pet.brain.set_present(self.presence.present)
+        pet.show()
+        return pet
+
+    def eventFilter(self, obj, event):
+        if obj is self.pets[0].neko_image and event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            self.startup.mark("first paint")
+            if "--startup-timing" in sys.argv:
+                self.startup.report()
+            # Runs once the event loop is turning
+            QTimer.singleShot(0, PROFILER.wrap(self.setup_autostart))
+            QTimer.singleShot(0, PROFILER.wrap(self.prefetch_sprites))
+            self.stall_detector = StallDetector()
+            QTimer.singleShot(0, PROFILER.wrap(self.watch_dialogue))
+            QTimer.singleShot(0, PROFILER.wrap(self.watch_assets))
+            if self.instance_lock is not None:
+                QTimer.singleShot(0, PROFILER.wrap(self.init_control_server))
+        return super().eventFilter(obj, event)
+
+    @timed()
+    def load_assets(self):
+        if getattr(sys, 'frozen', False):
+            base_path = sys._MEIPASS
+        else:
+            base_path = os.path.dirname(os.path.abspath(__file__))
+        
+        # Sprites come pre-scaled for this screen's pixel ratio from the
+        # mapped asset bundle or a disk cache; loose PNGs in assets/ override
+        # the bundle, and the rarely shown ones load when first needed
+        self.bundle = open_bundle()
+        self.asset_dir = os.path.join(base_path, 'assets')
+        self.sprites = SpriteStore(self.asset_dir, bundle=self.bundle)
+        self.sprites_dpr = QApplication.primaryScreen().devicePixelRatio()
+        self.sprites.preload(self.sprites_dpr)
+        self.asset_watcher = None
+        self.frames = {}
+        self.bubble_cache = BubbleCache()
+        self.load_dialogue(base_path)
+
+    def load_dialogue(self, base_path):
+        # Packs from the bundle, each overridden by a loose dialogue/*.json
+        # of the same name, all compiled into one engine every pet shares
+        self.dialogue_dir = os.path.join(base_path, 'dialogue')
+        self.bundled_packs = self.bundle.dialogue_packs() if self.bundle else {}
+        self.dialogue = DialogueEngine()
+        for name, pack in self.bundled_packs.items():
+            self.dialogue.load_pack(name, pack)
+        self.dialogue.load_dir(self.dialogue_dir)
+        self.dialogue_watcher = None
+
+    def watch_dialogue(self):
+        # Edit a pack while she runs and only that pack is recompiled
+        if os.path.isdir(self.dialogue_dir):
+            self.dialogue_watcher = FileWatcher(self.dialogue_dir, self.scheduler,
+                                                self.on_dialogue_changed, suffixes=(PACK_SUFFIX,))
+            QApplication.instance().aboutToQuit.connect(self.dialogue_watcher.close)
+
+    def on_dialogue_changed(self, paths):
+        for path in paths:
+            if self.dialogue.load_file(path) is None and not os.path.exists(path):
+                # Deleted: fall back to the bundled pack, if there is one
+                bundled = self.bundled_packs.get(pack_name(path))
+                if bundled is not None:
+                    self.dialogue.load_pack(pack_name(path), bundled)
+
+    def watch_assets(self):
+        # A PNG dropped into assets/ replaces that look while she runs:
+        # decoded off the GUI thread, then swapped in whole
+        if not os.path.isdir(self.asset_dir):
+            return
+        self.sprite_reloader = SpriteReloader(self.sprites, self.workers, self)
+        self.sprite_reloader.reloaded.connect(self.on_sprite_reloaded)
+        self.asset_watcher = FileWatcher(self.asset_dir, self.scheduler, self.on_assets_changed, suffixes=(".png",))
+        QApplication.instance().aboutToQuit.connect(self.asset_watcher.close)
+
+    def on_assets_changed(self, paths):
+        for path in paths:
+            look = self.sprites.look_for_path(path)
+            if look is None:
+                continue
+            # Looks not decoded yet are read fresh when first needed
+            dprs = self.sprites.loaded_dprs(look)
+            if dprs:
+                self.sprite_reloader.request(look, dprs)
+
+    def on_sprite_reloaded(self, look):
+        for pet in self.pets:
+            pet.neko_image.sprite_changed(look)
+
+    def release_unused_dprs(self):
+        # Forget sprites and frames for pixel ratios no pet is on any more;
+        # they are a disk read away if one comes back
+        in_use = {round(pet.sprites_dpr, 2) for pet in self.pets}
+        for dpr in {dpr for _, dpr in self.sprites.loaded()} - in_use:
+            self.sprites.drop_dpr(dpr)
+        for key in [k for k in self.frames if round(k[1], 2) not in in_use]:
+            del self.frames[key]
+
+    def init_timers(self):
+        # Every brain's timers are deadlines in one scheduler, which owns
+        # the only real QTimer in the process
+        self.scheduler = Scheduler(clock=self.clock, slack=NekoBrain.SLACK_AWAKE)
+        self.scheduler_timer = QTimer(self)
+        self.scheduler_timer.setSingleShot(True)
+        self.scheduler_timer.setTimerType(Qt.PreciseTimer)
+        self.scheduler_timer.timeout.connect(self.scheduler.run_due)
+        self.scheduler.bind(self.arm_scheduler_timer)
+        
+        # Every scheduler job and @timed handler is timed into the metrics
+        # registry, which only samples and publishes while someone (the
+        # Stats window) listens
+        self.metrics = REGISTRY
+        self.metrics.enable()
+        self.scheduler.metrics = self.metrics
+        self.metrics.bind(self.scheduler)
+        self.metrics.add_sampler(ProcessSampler())
+        if PROFILER.enabled:
+            self.scheduler.tracer = PROFILER
+        
+        # Blocking OS calls run here; results come back on the GUI thread
+        self.workers = WorkerPool(self.scheduler, parent=self)
+        QApplication.instance().aboutToQuit.connect(self.workers.shutdown)
+        self.stall_detector = None
+
+    def init_recorder(self):
+        # Started once the dialogue is loaded, so the trace can say which
+        # packs her lines came from; chunks are appended off the GUI thread
+        if self.recorder is None:
+            return
+        self.recorder.write = lambda drain: self.workers.submit(drain, name="write_trace")
+        self.recorder.start(self.clock, dialogue_fingerprint(self.dialogue))
+        self.scheduler.recorder = self.recorder
+        QApplication.instance().aboutToQuit.connect(self.recorder.close)
+
+    def arm_scheduler_timer(self, delay):
+        if delay is None:
+            self.scheduler_timer.stop()
+        else:
+            self.scheduler_timer.start(math.ceil(delay * 1000))
+
+    def init_window_source(self):
+        # Active window tracker: the source pushes focus changes to us, and
+        # focus_changed hands them to every pet
+        self.window_source = open_foreground_source(self.focus_changed.emit, self.scheduler, self.workers)
+        QApplication.instance().aboutToQuit.connect(self.window_source.stop)
+
+    def init_presence(self):
+        # Idle time, screen lock and battery, polled on the scheduler
+        self.presence = open_presence_service(self.scheduler, self.on_presence_changed)
+        QApplication.instance().aboutToQuit.connect(self.presence.stop)
+
+    def on_presence_changed(self, present, on_battery):
+        for pet in self.pets:
+            pet.brain.set_on_battery(on_battery)
+            pet.brain.set_present(present)
+
+    def init_control_server(self):
+        # Second launches and `main.py show|hide|pet|stats` talk to this
+        self.control_server = ControlServer(self.handle_command)
+        if self.control_server.listen():
+            QApplication.instance().aboutToQuit.connect(self.control_server.close)
+        else:
+            self.control_server = None
+
+    def handle_command(self, request):
+        command = request.get("command")
+        if command in ("launch", "show"):
+            self.show_all()
+        elif command == "hide":
+            self.hide_all()
+        elif command == "pet":
+            for pet in self.pets:
+                pet.brain.pressed()
+        elif command == "stats":
+            return self.stats_reply()
+        else:
+            return {"ok": False, "error": f"unknown command {command!r}"}
+        return {"ok": True}
+
+    def stats_reply(self):
+        rss = platform_adapter.process_rss()
+        return {
+            "ok": True,
+            "wakeups_per_minute": self.scheduler.wakeups_per_minute(),
+            "rss_mb": (rss or 0) / (1024 * 1024),
+            "pets": [{
+                "state": pet.brain.state.name,
+                "attention": pet.brain.attention_meter,
+                "level": pet.brain.attention_level,
+                "pets": pet.brain.stats_pets_received,
+                "slept": pet.brain.stats_times_slept,
+                "lines": pet.brain.stats_lines_spoken,
+                "hidden": pet.brain.is_manually_hidden,
+            } for pet in self.pets],
+        }
+
+    def hide_all(self):
+        for pet in self.pets:
+            pet.hide_neko()
+
+    def show_all(self):
+        for pet in self.pets:
+            pet.show_neko()
+
+    def open_stats_window(self, pet=None):
+        if not self.stats_window:
+            self.stats_window = StatsWindow(pet or self.pets[0])
+            self.stats_window.destroyed.connect(self.on_stats_window_closed)
+        elif pet is not None:
+            self.stats_window.set_neko(pet)
+        self.stats_window.show()
+        self.stats_window.raise_()
+
+    def on_stats_window_closed(self):
+        # Deleted on close (its tables and labels too); the next Stats click
+        # builds a fresh one
+        self.stats_window = None
 
     def init_tray(self):
         self.tray_icon = QSystemTrayIcon(self)
         
         icon = QApplication.style().standardIcon(QStyle.SP_ComputerIcon)
-        if not self.idle_pixmap.isNull():
-            icon = QIcon(self.idle_pixmap)
+        idle_pixmap = self.sprites.get("idle", self.sprites_dpr)
+        if not idle_pixmap.isNull():
+            icon = QIcon(idle_pixmap)
         
         self.tray_icon.setIcon(icon)
         
-        tray_menu = QMenu()
-        show_action = tray_menu.addAction("Show Neko")
-        hide_action = tray_menu.addAction("Hide Neko")
-        stats_action = tray_menu.addAction("Stats")
-        exit_action = tray_menu.addAction("Exit")
-        
-        show_action.triggered.connect(self.show_neko)
-        hide_action.triggered.connect(self.hide_neko)
-        stats_action.triggered.connect(self.open_stats_window)
+        self.tray_menu = QMenu()
+        show_action = self.tray_menu.addAction("Show Neko")
+        hide_action = self.tray_menu.addAction("Hide Neko")
+        add_action = self.tray_menu.addAction("Add Neko")
+        stats_action = self.tray_menu.addAction("Stats")
+        if PROFILER.enabled:
+            profile_action = self.tray_menu.addAction("Save Profile")
+            profile_action.triggered.connect(self.save_profile)
+        exit_action = self.tray_menu.addAction("Exit")
+        
+        show_action.triggered.connect(self.show_all)
+        hide_action.triggered.connect(self.hide_all)
+        add_action.triggered.connect(self.add_pet)
+        stats_action.triggered.connect(lambda: self.open_stats_window())
         exit_action.triggered.connect(QApplication.quit)
         
-        self.tray_icon.setContextMenu(tray_menu)
+        self.tray_icon.setContextMenu(self.tray_menu)
         self.tray_icon.show()
 
+    def save_profile(self):
+        trace_path, _ = PROFILER.dump(default_profile_dir())
+        self.tray_icon.showMessage("Neko", f"Profile saved to {os.path.dirname(trace_path)}")
+
     def setup_autostart(self):
+        # Ensure it runs on startup. Checking or writing the login entry can
+        # block (a COM dispatch on Windows), so it runs off the GUI thread.
+        self.workers.submit(platform_adapter.ensure_autostart, name="autostart", timeout=60.0)
+
+    def prefetch_sprites(self):
+        # The looks that weren't needed for the first frame are decoded in
+        # the background, so set_look() never waits on a PNG
+        for look in LOOKS:
+            if look not in {l for l, _ in self.sprites.loaded()}:
+                self.workers.submit(self.sprites.load_image, look, self.sprites_dpr, key=("sprite", look),
+                                    name="prefetch_sprite",
+                                    on_done=lambda image, look=look: self.sprites.put(look, self.sprites_dpr, image))
+
+def pet_count(argv):
+    # --pets N
+    if "--pets" in argv:
         try:
-            startup_path = winshell.startup()
-            shortcut_path = os.path.join(startup_path, "DesktopNeko.lnk")
-            
-            if not os.path.exists(shortcut_path):
-                shell = Dispatch('WScript.Shell')
-                shortcut = shell.CreateShortCut(shortcut_path)
-                
-                if getattr(sys, 'frozen', False):
-                    # If running as PyInstaller executable
-                    shortcut.Targetpath = sys.executable
-                    shortcut.Arguments = ""
-                    shortcut.WorkingDirectory = os.path.dirname(sys.executable)
-                else:
-                    # If running as Python script
-                    pythonw_path = sys.executable.replace("python.exe", "pythonw.exe")
-                    shortcut.Targetpath = pythonw_path if os.path.exists(pythonw_path) else sys.executable
-                    
-                    script_path = os.path.abspath(__file__)
-                    shortcut.Arguments = f'"{script_path}"'
-                    shortcut.WorkingDirectory = os.path.dirname(script_path)
-                
-                # Use python icon or just default
-                shortcut.IconLocation = sys.executable
-                shortcut.save()
-        except Exception as e:
-            pass # Ignore print in noconsole mode
+            return max(1, int(argv[argv.index("--pets") + 1]))
+        except (IndexError, ValueError):
+            pass
+    return 1
 
 if __name__ == "__main__":
+    startup = StartupTimer(started=process_started)
+    startup.mark("imports")
+    
+    # --profile: record spans for every scheduler job and widget event and
+    # write them out on exit (or from the tray menu)
+    if "--profile" in sys.argv:
+        PROFILER.enable()
+        for widget_class in (NekoWidget, StatsWindow, SpriteView, BubbleView):
+            PROFILER.instrument_widget(widget_class)
+    
+    # One instance per session: if another launch got the lock first,
+    # hand this launch to it once its server is up
+    instance_lock = control.acquire_instance_lock()
+    if instance_lock is None:
+        sys.exit(0 if control.wait_for_instance() else 1)
+    
     app = QApplication(sys.argv)
+    app.setApplicationName("DesktopNeko")
     
     # Needs to stay running when main window hides
     QApplication.setQuitOnLastWindowClosed(False)
+    startup.mark("qt")
+    
+    # --record: write down everything her brain hears, for tools/replay.py
+    recorder = None
+    if "--record" in sys.argv:
+        recorder = SessionRecorder(os.path.join(default_trace_dir(), time.strftime("neko-%Y%m%d-%H%M%S.trace")))
     
-    neko = NekoWidget()
-    neko.show()
+    neko_app = NekoApp(pets=pet_count(sys.argv), startup=startup, instance_lock=instance_lock, recorder=recorder)
+    if PROFILER.enabled:
+        app.aboutToQuit.connect(lambda: PROFILER.dump(default_profile_dir()))
     
     sys.exit(app.exec())
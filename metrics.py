@@ -0,0 +1,314 @@
+import sys
+import math
+import time
+import functools
+import threading
+
+from profiler import PROFILER
+
+
+# Process-wide metrics: counters, gauges and latency histograms, plus
+# samplers for things that have to be polled (memory, CPU time). Nothing
+# is pushed anywhere until someone subscribes. Then a scheduler timer runs
+# the samplers once per PUBLISH_INTERVAL and, if anything changed since
+# the last round, notifies the subscribers. With no subscribers the
+# registry schedules nothing at all.
+#
+# Worker threads record too (workers.py), so creating a metric and
+# recording into it happen under the registry's lock, and readers on the
+# GUI thread iterate over a list from histogram_list() rather than the live
+# dict. Recording only flips a dirty flag; notifications always happen on
+# the scheduler's (GUI) thread.
+
+class Counter:
+    __slots__ = ("name", "value", "registry")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.value = 0
+        self.registry = registry
+
+    def inc(self, n=1):
+        with self.registry.lock:
+            self.value += n
+        self.registry.changed()
+
+
+class Gauge:
+    __slots__ = ("name", "value", "registry")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.value = 0.0
+        self.registry = registry
+
+    def set(self, value):
+        if value != self.value:
+            self.value = value
+            self.registry.changed()
+
+
+class Histogram:
+    # Log-scale latency buckets: BUCKETS_PER_DOUBLING per power of two of
+    # microseconds, from 1 us up to about 17 s. Percentiles are the upper
+    # edge of the bucket they fall in (within 19%), which is plenty to tell
+    # a 200 us handler from a 20 ms one.
+    BUCKETS_PER_DOUBLING = 4
+    BUCKETS = 24 * BUCKETS_PER_DOUBLING + 1
+
+    __slots__ = ("name", "counts", "count", "total", "max", "registry")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.registry = registry
+
+    def observe(self, seconds):
+        micros = seconds * 1e6
+        if micros <= 1.0:
+            index = 0
+        else:
+            index = min(self.BUCKETS - 1, int(math.log2(micros) * self.BUCKETS_PER_DOUBLING) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.registry.changed()
+
+    def percentile(self, p):
+        # Seconds; None until something was observed
+        if self.count == 0:
+            return None
+        rank = p / 100.0 * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                upper = 2.0 ** (index / self.BUCKETS_PER_DOUBLING) / 1e6
+                return min(upper, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class MetricsRegistry:
+    PUBLISH_INTERVAL = 1000  # ms
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.samplers = []
+        # Whether @timed records at all. NekoApp turns it on; headless runs
+        # (simulations, replays, tests) leave it off and @timed handlers
+        # cost one flag check.
+        self.enabled = False
+        self.lock = threading.Lock()
+        self._subscribers = []
+        self._dirty = False
+        self.scheduler = None
+        self.publish_timer = None
+        # watcher(name, seconds) sees every duration as it is recorded
+        self.watchers = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def bind(self, scheduler):
+        self.scheduler = scheduler
+        self.publish_timer = scheduler.timer(self.publish)
+        if self._subscribers:
+            self._start()
+
+    def counter(self, name):
+        metric = self.counters.get(name)
+        if metric is None:
+            with self.lock:
+                metric = self.counters.get(name)
+                if metric is None:
+                    metric = self.counters[name] = Counter(name, self)
+        return metric
+
+    def gauge(self, name):
+        metric = self.gauges.get(name)
+        if metric is None:
+            with self.lock:
+                metric = self.gauges.get(name)
+                if metric is None:
+                    metric = self.gauges[name] = Gauge(name, self)
+        return metric
+
+    def histogram(self, name):
+        metric = self.histograms.get(name)
+        if metric is None:
+            with self.lock:
+                metric = self.histograms.get(name)
+                if metric is None:
+                    metric = self.histograms[name] = Histogram(name, self)
+        return metric
+
+    def observe(self, name, seconds):
+        histogram = self.histogram(name)
+        with self.lock:
+            histogram.observe(seconds)
+        # Outside the lock: watchers may record something themselves
+        if self.watchers:
+            for watcher in self.watchers:
+                watcher(name, seconds)
+
+    def histogram_list(self):
+        # A list that worker threads adding histograms can't change under you
+        with self.lock:
+            return list(self.histograms.values())
+
+    def add_sampler(self, sampler):
+        # sampler(registry) runs before each publish while subscribed
+        self.samplers.append(sampler)
+
+    # --- Subscriptions ---
+
+    def subscribe(self, callback):
+        # callback(registry) runs after a batch of changes
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+        if len(self._subscribers) == 1:
+            self._start()
+        else:
+            # New subscribers want the current picture right away
+            callback(self)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+        if not self._subscribers and self.publish_timer is not None:
+            self.publish_timer.stop()
+
+    def changed(self):
+        self._dirty = True
+
+    def publish(self):
+        for sampler in self.samplers:
+            sampler(self)
+        if not self._dirty:
+            return
+        self._dirty = False
+        for callback in list(self._subscribers):
+            callback(self)
+
+    def _start(self):
+        if self.publish_timer is None:
+            return
+        self._dirty = True
+        self.publish()
+        self.publish_timer.start(self.PUBLISH_INTERVAL)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def timed(name=None, registry=None):
+    # Decorator: record every call's duration in a histogram named after
+    # the function (or name), and as a span when --profile is on. With the
+    # registry and the profiler both off it just calls through.
+    def decorate(fn):
+        metric_name = name or fn.__qualname__
+        target = registry or REGISTRY
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not target.enabled and not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                if PROFILER.enabled:
+                    return PROFILER.call(metric_name, fn, *args, **kwargs)
+                return fn(*args, **kwargs)
+            finally:
+                target.observe(metric_name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def callback_name(callback):
+    # Readable name for a scheduler job: the function a ScheduledTimer
+    # wraps, or the callable itself
+    owner = getattr(callback, "__self__", None)
+    inner = getattr(owner, "callback", None)
+    if inner is not None:
+        callback = inner
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+# Notices when the GUI thread was blocked for longer than a frame. Every
+# @timed handler and scheduler job already reports its duration; anything
+# over THRESHOLD on the thread that created the detector is a stall:
+# counted, recorded as "gui.stall" and logged with the name of what
+# blocked. Nested handlers report once, under the innermost name.
+# Timer lateness is not a stall: after a suspend, or when the OS just
+# didn't run the process, timers fire late with nothing of hers to blame.
+# Adds no timers or wakeups.
+class StallDetector:
+    THRESHOLD = 0.016  # seconds, one frame at 60 Hz
+    IGNORED = ("gui.stall", "scheduler.lateness")
+
+    def __init__(self, registry=None, log=True):
+        self.registry = registry or REGISTRY
+        self.log = log
+        self.thread = threading.get_ident()
+        self.stalls = 0
+        self.longest = 0.0
+        self.worst = None
+        self._reported_until = 0.0
+        self.registry.watchers.append(self.check)
+
+    def stop(self):
+        if self.check in self.registry.watchers:
+            self.registry.watchers.remove(self.check)
+
+    def check(self, name, seconds):
+        if seconds < self.THRESHOLD or name in self.IGNORED or threading.get_ident() != self.thread:
+            return
+        now = time.perf_counter()
+        if now - seconds < self._reported_until:
+            # Part of a stall already reported (an outer handler)
+            self._reported_until = now
+            return
+        self._reported_until = now
+        self.stalls += 1
+        if seconds > self.longest:
+            self.longest = seconds
+            self.worst = name
+        self.registry.observe("gui.stall", seconds)
+        # pythonw and --noconsole builds have no stderr
+        if self.log and sys.stderr is not None:
+            print(f"GUI thread blocked for {seconds * 1000:.1f} ms in {name}", file=sys.stderr)
+
+
+class ProcessSampler:
+    # Resident memory and CPU usage, as gauges
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._last = None
+
+    def __call__(self, registry):
+        from platform_adapter import process_rss
+
+        rss = process_rss()
+        if rss is not None:
+            registry.gauge("process.rss_mb").set(round(rss / (1024 * 1024), 1))
+
+        now, cpu = self.clock(), time.process_time()
+        registry.gauge("process.cpu_seconds").set(round(cpu, 2))
+        if self._last is not None:
+            wall = now - self._last[0]
+            if wall > 0:
+                registry.gauge("process.cpu_percent").set(round((cpu - self._last[1]) / wall * 100.0, 1))
+        self._last = (now, cpu)
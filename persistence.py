@@ -0,0 +1,270 @@
+import os
+import time
+import queue
+import struct
+import threading
+import zlib
+
+
+# What survives a restart: her attention, whether she gave up on you, the
+# lifetime stats and where she was sitting. Every value is stored as a
+# float64 under a one-byte field id, so new fields can be appended without
+# breaking old files (unknown ids are skipped on load).
+FIELDS = ("attention", "giving_up", "pets", "slept", "lines", "give_ups", "x", "y", "saved_at")
+_FIELD_IDS = {name: i for i, name in enumerate(FIELDS)}
+
+# Journal record: field id, value, crc32 of the first two. A torn write at
+# the tail fails the check and everything from there on is ignored.
+_RECORD = struct.Struct("<Bd")
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _RECORD.size + _CRC.size
+
+# Snapshot: magic, version, record count, records, crc32 of the records
+_SNAPSHOT_HEADER = struct.Struct("<4sHH")
+_SNAPSHOT_MAGIC = b"NKST"
+_SNAPSHOT_VERSION = 1
+
+JOURNAL_NAME = "state.journal"
+SNAPSHOT_NAME = "state.snapshot"
+
+
+def default_state_dir():
+    from PySide6.QtCore import QStandardPaths
+
+    location = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    return location or None
+
+
+def encode_record(field_id, value):
+    body = _RECORD.pack(field_id, value)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def decode_records(blob):
+    # (field id, value) pairs up to the first damaged record, and how many
+    # bytes were good
+    records = []
+    offset = 0
+    while offset + RECORD_SIZE <= len(blob):
+        body = blob[offset:offset + _RECORD.size]
+        (crc,) = _CRC.unpack_from(blob, offset + _RECORD.size)
+        if zlib.crc32(body) != crc:
+            break
+        records.append(_RECORD.unpack(body))
+        offset += RECORD_SIZE
+    return records, offset
+
+
+def _apply(state, records):
+    for field_id, value in records:
+        if field_id < len(FIELDS):
+            state[FIELDS[field_id]] = value
+
+
+def _fsync_dir(directory):
+    # Makes a rename durable on POSIX; not possible (or needed) on Windows
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Append-only store for her state. Changes are never written as they
+# happen: mark_dirty() starts a flush timer on the shared scheduler, and
+# when it fires, the current state is read from source(), diffed against
+# what was last saved, and only the changed fields go to a writer thread.
+# The writer appends them with one fsync per batch and, once the journal
+# gets long, folds everything into a fresh snapshot and truncates the
+# journal. Loading is one small snapshot read plus a replay of the journal
+# tail.
+#
+# Fields the writer couldn't write (disk full, permissions) are marked dirty
+# again and go out, with their latest values, on the next flush; a failed
+# compaction is tried again then too.
+class StateStore:
+    FLUSH_DELAY = 5000  # ms between the first change and the write
+    COMPACT_AFTER = 512  # journal records before a new snapshot
+
+    def __init__(self, directory, scheduler=None, source=None):
+        self.directory = directory
+        self.scheduler = scheduler
+        self.source = source
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+
+        self._saved = {}
+        self._journal_records = 0
+        self._queue = None
+        self._writer = None
+        # Handed back by the writer when a write fails
+        self._lock = threading.Lock()
+        self._unwritten = set()
+        self._compact_pending = False
+        self.flush_timer = scheduler.timer(self.flush, single_shot=True) if scheduler else None
+
+        self.flushes = 0
+        self.records_written = 0
+        self.compactions = 0
+        self.load_seconds = 0.0
+
+    # --- Loading ---
+
+    def load(self):
+        started = time.perf_counter()
+        state = {}
+        _apply(state, self._read_snapshot())
+
+        try:
+            with open(self.journal_path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            blob = b""
+        records, good = decode_records(blob)
+        _apply(state, records)
+        self._journal_records = len(records)
+        if good != len(blob):
+            # Drop the torn tail so new records don't land behind it
+            try:
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good)
+            except OSError:
+                pass
+
+        self._saved = dict(state)
+        self.load_seconds = time.perf_counter() - started
+        return state
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            return []
+        if len(blob) < _SNAPSHOT_HEADER.size + _CRC.size:
+            return []
+        magic, version, count = _SNAPSHOT_HEADER.unpack_from(blob)
+        body = blob[_SNAPSHOT_HEADER.size:-_CRC.size]
+        (crc,) = _CRC.unpack(blob[-_CRC.size:])
+        if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION or zlib.crc32(body) != crc:
+            return []
+        return [_RECORD.unpack_from(body, i * _RECORD.size) for i in range(min(count, len(body) // _RECORD.size))]
+
+    # --- Saving ---
+
+    def mark_dirty(self):
+        # Coalesce: the first change starts the timer, later ones ride along
+        if self.flush_timer is not None and not self.flush_timer.is_active():
+            self.flush_timer.start(self.FLUSH_DELAY)
+
+    def flush(self):
+        if self.flush_timer is not None:
+            self.flush_timer.stop()
+        if self.source is None:
+            return
+        state = dict(self.source())
+        with self._lock:
+            unwritten, self._unwritten = self._unwritten, set()
+            compact, self._compact_pending = self._compact_pending, False
+        changes = {k: float(v) for k, v in state.items() if k in _FIELD_IDS and self._saved.get(k) != float(v)}
+        if not changes and not unwritten:
+            if compact:
+                with self._lock:
+                    self._compact_pending = True
+            return
+        for k in unwritten:
+            if k not in changes and k in self._saved:
+                changes[k] = self._saved[k]
+        changes["saved_at"] = time.time()
+        self._saved.update(changes)
+
+        self._journal_records += len(changes)
+        snapshot = None
+        if compact or self._journal_records >= self.COMPACT_AFTER:
+            snapshot = dict(self._saved)
+            self._journal_records = 0
+
+        self.flushes += 1
+        self.records_written += len(changes)
+        self._ensure_writer()
+        self._queue.put((changes, snapshot))
+
+    def close(self):
+        # Final flush, then wait for the writer to finish
+        self.flush()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=2.0)
+            self._writer = None
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, name="state-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            changes, snapshot = item
+            # Batches that queued up behind a slow disk go out in one write
+            try:
+                while True:
+                    more = self._queue.get_nowait()
+                    if more is None:
+                        self._queue.put(None)
+                        break
+                    changes = dict(changes, **more[0])
+                    snapshot = more[1] or snapshot
+            except queue.Empty:
+                pass
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                self._append(changes)
+            except OSError:
+                # Nothing got out: the next flush sends it again
+                with self._lock:
+                    self._unwritten.update(changes)
+                    self._compact_pending = self._compact_pending or snapshot is not None
+                continue
+            if snapshot is not None:
+                try:
+                    self._write_snapshot(dict(snapshot, **changes))
+                except OSError:
+                    # The journal still has everything; compact next time
+                    with self._lock:
+                        self._compact_pending = True
+
+    def _append(self, changes):
+        data = b"".join(encode_record(_FIELD_IDS[k], v) for k, v in changes.items())
+        with open(self.journal_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_snapshot(self, state):
+        body = b"".join(_RECORD.pack(_FIELD_IDS[k], v) for k, v in state.items())
+        header = _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(state))
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header + body + _CRC.pack(zlib.crc32(body)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_dir(self.directory)
+        # Everything in the journal is now in the snapshot. The journal was
+        # appended first, so if we stop before this its last value for each
+        # field is the snapshot's and replaying it on load changes nothing.
+        self._truncate_journal()
+        self.compactions += 1
+
+    def _truncate_journal(self):
+        with open(self.journal_path, "wb") as f:
+            os.fsync(f.fileno())
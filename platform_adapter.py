@@ -0,0 +1,105 @@
+import os
+import sys
+
+
+# Everything OS-specific that isn't window tracking (see window_source.py):
+# autostart and process statistics. Platform modules are imported inside
+# the functions that need them, so importing this costs nothing and she
+# starts on any OS; features without a backend simply do nothing.
+
+APP_NAME = "DesktopNeko"
+
+
+def launch_command():
+    # (program, arguments, working directory) that starts her again
+    if getattr(sys, 'frozen', False):
+        # If running as PyInstaller executable
+        return sys.executable, [], os.path.dirname(sys.executable)
+
+    # If running as Python script
+    program = sys.executable
+    if sys.platform == 'win32':
+        pythonw_path = sys.executable.replace("python.exe", "pythonw.exe")
+        if os.path.exists(pythonw_path):
+            program = pythonw_path
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    return program, [script_path], os.path.dirname(script_path)
+
+
+def ensure_autostart():
+    # Creates the Windows startup shortcut if it is missing; other platforms
+    # are left alone. Blocking (COM), so call it from a worker thread.
+    # Returns True if a shortcut was written.
+    try:
+        if sys.platform == 'win32':
+            return _ensure_windows_shortcut()
+    except Exception:
+        pass
+    return False
+
+
+def _ensure_windows_shortcut():
+    import winshell
+    import pythoncom
+    from win32com.client import Dispatch
+
+    shortcut_path = os.path.join(winshell.startup(), f"{APP_NAME}.lnk")
+    if os.path.exists(shortcut_path):
+        return False
+
+    program, arguments, working_dir = launch_command()
+    # COM has to be initialised on every thread that uses it
+    pythoncom.CoInitialize()
+    try:
+        shell = Dispatch('WScript.Shell')
+        shortcut = shell.CreateShortCut(shortcut_path)
+        shortcut.Targetpath = program
+        shortcut.Arguments = " ".join(f'"{arg}"' for arg in arguments)
+        shortcut.WorkingDirectory = working_dir
+        # Use python icon or just default
+        shortcut.IconLocation = sys.executable
+        shortcut.save()
+    finally:
+        pythoncom.CoUninitialize()
+    return True
+
+
+def process_rss():
+    # Resident set size of this process in bytes, or None if unknown
+    try:
+        if sys.platform == 'win32':
+            return _windows_rss()
+        if sys.platform.startswith('linux'):
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        import resource
+        # Peak rather than current, but the best macOS offers without psutil
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except Exception:
+        return None
+
+
+def _windows_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
@@ -0,0 +1,243 @@
+import os
+import sys
+
+
+# Is anyone there, and are we on battery? Providers answer from the OS
+# (input idle time, screen lock, power source); the PresenceService polls
+# them on the shared scheduler and tells its listeners when the user leaves
+# or comes back and when the machine goes on or off battery.
+#
+# A provider's read() returns whatever it knows as a dict with any of
+#   idle_seconds: seconds since the last keyboard/mouse input
+#   locked:       the session is locked or the screen saver is up
+#   on_battery:   running on battery power
+# and leaves out what it can't tell. Facts from several providers are
+# merged, first provider wins.
+class PresenceProvider:
+    def read(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class FakePresenceProvider(PresenceProvider):
+    # For tests and simulations: set() stands in for the OS
+    def __init__(self, idle_seconds=0.0, locked=False, on_battery=False):
+        self.facts = {"idle_seconds": idle_seconds, "locked": locked, "on_battery": on_battery}
+
+    def set(self, **facts):
+        self.facts.update(facts)
+
+    def read(self):
+        return dict(self.facts)
+
+
+class WindowsPresenceProvider(PresenceProvider):
+    # GetLastInputInfo for idle time, OpenInputDesktop (which fails while
+    # the secure desktop is up) for lock, GetSystemPowerStatus for battery
+    DESKTOP_SWITCHDESKTOP = 0x0100
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+        class SYSTEM_POWER_STATUS(ctypes.Structure):
+            _fields_ = [
+                ("ACLineStatus", ctypes.c_ubyte),
+                ("BatteryFlag", ctypes.c_ubyte),
+                ("BatteryLifePercent", ctypes.c_ubyte),
+                ("SystemStatusFlag", ctypes.c_ubyte),
+                ("BatteryLifeTime", wintypes.DWORD),
+                ("BatteryFullLifeTime", wintypes.DWORD),
+            ]
+
+        self._ctypes = ctypes
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.GetTickCount.restype = wintypes.DWORD
+        self._user32.OpenInputDesktop.restype = wintypes.HANDLE
+        self._last_input = LASTINPUTINFO()
+        self._last_input.cbSize = ctypes.sizeof(LASTINPUTINFO)
+        self._power = SYSTEM_POWER_STATUS()
+
+    def read(self):
+        ctypes = self._ctypes
+        facts = {}
+        if self._user32.GetLastInputInfo(ctypes.byref(self._last_input)):
+            # Both tick counts wrap every 49.7 days; the DWORD math still works
+            elapsed = (self._kernel32.GetTickCount() - self._last_input.dwTime) & 0xFFFFFFFF
+            facts["idle_seconds"] = elapsed / 1000.0
+
+        desktop = self._user32.OpenInputDesktop(0, False, self.DESKTOP_SWITCHDESKTOP)
+        if desktop:
+            facts["locked"] = not self._user32.SwitchDesktop(desktop)
+            self._user32.CloseDesktop(desktop)
+        else:
+            facts["locked"] = True
+
+        if self._kernel32.GetSystemPowerStatus(ctypes.byref(self._power)):
+            # 0 = offline, 1 = online, 255 = unknown
+            if self._power.ACLineStatus in (0, 1):
+                facts["on_battery"] = self._power.ACLineStatus == 0
+        return facts
+
+
+class X11PresenceProvider(PresenceProvider):
+    # MIT-SCREEN-SAVER extension: time since input, and whether the screen
+    # saver (or a locker that drives it) is active
+    def __init__(self, display_name=None):
+        from Xlib import display
+        from Xlib.ext import screensaver
+
+        self._screensaver = screensaver
+        self._display = display.Display(display_name)
+        if not self._display.has_extension("MIT-SCREEN-SAVER"):
+            self._display.close()
+            raise OSError("no MIT-SCREEN-SAVER extension")
+        self._root = self._display.screen().root
+
+    def read(self):
+        info = self._root.screensaver_query_info()
+        return {
+            "idle_seconds": info.idle / 1000.0,
+            "locked": info.state == self._screensaver.StateOn,
+        }
+
+    def close(self):
+        self._display.close()
+
+
+class SysfsBatteryProvider(PresenceProvider):
+    # Linux: on battery when no mains supply is online and a battery is
+    # discharging
+    POWER_SUPPLY_DIR = "/sys/class/power_supply"
+
+    def __init__(self, power_supply_dir=None):
+        self.power_supply_dir = power_supply_dir or self.POWER_SUPPLY_DIR
+        if not os.path.isdir(self.power_supply_dir):
+            raise OSError("no power supply information")
+
+    def _read(self, supply, name):
+        try:
+            with open(os.path.join(self.power_supply_dir, supply, name)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def read(self):
+        mains_online = False
+        discharging = False
+        for supply in os.listdir(self.power_supply_dir):
+            kind = self._read(supply, "type")
+            if kind == "Mains" and self._read(supply, "online") == "1":
+                mains_online = True
+            elif kind == "Battery" and self._read(supply, "status") == "Discharging":
+                discharging = True
+        return {"on_battery": discharging and not mains_online}
+
+
+# Polls its providers on the scheduler and reports two things to listeners:
+# callback(present, on_battery), whenever either changes.
+#
+# Polling is analytical rather than periodic while the user is around: if
+# they've been idle for 40 s, nothing can make them "away" for another
+# AWAY_AFTER - 40 s, so that's when the next poll runs (capped at
+# PRESENT_POLL so lock and battery changes are still noticed). While they
+# are away it polls every AWAY_POLL to catch them coming back.
+class PresenceService:
+    AWAY_AFTER = 300.0  # seconds of no input
+    PRESENT_POLL = 60.0
+    AWAY_POLL = 5.0
+    MIN_POLL = 1.0
+
+    def __init__(self, providers, scheduler):
+        self.providers = list(providers)
+        self.scheduler = scheduler
+        self.present = True
+        self.on_battery = False
+        self.facts = {}
+        self._listeners = []
+        self.poll_timer = scheduler.timer(self.poll, single_shot=True)
+        self.polls = 0
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def start(self):
+        self.poll()
+
+    def stop(self):
+        self.poll_timer.stop()
+        for provider in self.providers:
+            try:
+                provider.close()
+            except Exception:
+                pass
+
+    def read(self):
+        facts = {}
+        for provider in self.providers:
+            try:
+                found = provider.read()
+            except Exception:
+                continue
+            for key, value in found.items():
+                facts.setdefault(key, value)
+        return facts
+
+    def poll(self):
+        self.polls += 1
+        self.facts = self.read()
+        idle = self.facts.get("idle_seconds")
+        present = not self.facts.get("locked", False) and (idle is None or idle < self.AWAY_AFTER)
+        on_battery = bool(self.facts.get("on_battery", False))
+
+        if present:
+            delay = self.PRESENT_POLL
+            if idle is not None:
+                delay = min(delay, self.AWAY_AFTER - idle)
+            delay = max(self.MIN_POLL, delay)
+        else:
+            delay = self.AWAY_POLL
+        self.poll_timer.start(delay * 1000)
+
+        if present != self.present or on_battery != self.on_battery:
+            self.present = present
+            self.on_battery = on_battery
+            for callback in list(self._listeners):
+                callback(present, on_battery)
+
+
+def open_presence_service(scheduler, callback=None):
+    # Every provider that works on this machine, subscribed to callback and
+    # started. With none, she always thinks you are there and plugged in.
+    candidates = []
+    if sys.platform == 'win32':
+        candidates.append(WindowsPresenceProvider)
+    else:
+        if os.environ.get('DISPLAY'):
+            candidates.append(X11PresenceProvider)
+        if sys.platform.startswith('linux'):
+            candidates.append(SysfsBatteryProvider)
+
+    providers = []
+    for factory in candidates:
+        try:
+            providers.append(factory())
+        except Exception:
+            continue
+
+    service = PresenceService(providers, scheduler)
+    if callback is not None:
+        service.subscribe(callback)
+    if providers:
+        service.start()
+    return service
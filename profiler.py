@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+
+
+# Span profiler behind --profile. Spans (one per scheduler job, event
+# handler or wrapped callback) go into a bounded ring buffer, so a long
+# session keeps only the most recent CAPACITY of them, and can be written
+# out as a Chrome trace (chrome://tracing, Perfetto, speedscope) and as
+# collapsed stacks for flamegraph.pl / inferno.
+#
+# When profiling is off nothing is instrumented at all: wrap() hands back
+# the function unchanged, instrument_widget() is never called, and the
+# scheduler skips its tracer branch. tools/bench_profiler.py measures both.
+class Profiler:
+    CAPACITY = 200000
+
+    def __init__(self, capacity=None, clock=time.perf_counter_ns):
+        self.capacity = capacity or self.CAPACITY
+        self.clock = clock
+        self.enabled = False
+        # (stack path, start ns, duration ns, self ns, thread id)
+        self.spans = deque(maxlen=self.capacity)
+        self.dropped = 0
+        self._local = threading.local()
+        self.started_ns = clock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        # Spans recorded so far are kept; wrap() stops wrapping from here on
+        self.enabled = False
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def begin(self, name):
+        # Frame: name, path, start, time spent in children
+        stack = self._stack()
+        path = stack[-1][1] + ";" + name if stack else name
+        stack.append([name, path, self.clock(), 0])
+
+    def end(self):
+        end = self.clock()
+        stack = self._stack()
+        name, path, start, children = stack.pop()
+        duration = end - start
+        if stack:
+            stack[-1][3] += duration
+        if len(self.spans) == self.capacity:
+            self.dropped += 1
+        self.spans.append((path, start, duration, duration - children, threading.get_ident()))
+
+    def call(self, name, fn, *args, **kwargs):
+        self.begin(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.end()
+
+    def wrap(self, fn, name=None):
+        if not self.enabled:
+            return fn
+        span_name = name or getattr(fn, "__qualname__", None) or repr(fn)
+
+        def wrapper(*args, **kwargs):
+            return self.call(span_name, fn, *args, **kwargs)
+        return wrapper
+
+    def instrument_widget(self, cls):
+        # Every Qt event the widget class handles becomes a span named after
+        # the class and event type (NekoWidget.MouseButtonPress, ...)
+        original = cls.event
+        profiler = self
+
+        def event(widget, e):
+            profiler.begin(f"{cls.__name__}.{e.type().name}")
+            try:
+                return original(widget, e)
+            finally:
+                profiler.end()
+        cls.event = event
+
+    # --- Export ---
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for path, start, duration, _, tid in self.spans:
+            events.append({
+                "name": path.rsplit(";", 1)[-1],
+                "cat": "neko",
+                "ph": "X",
+                "ts": (start - self.started_ns) / 1000.0,
+                "dur": duration / 1000.0,
+                "pid": pid,
+                "tid": tid,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"dropped_spans": self.dropped}}
+
+    def collapsed_stacks(self):
+        # Self time per stack in microseconds, heaviest first
+        totals = {}
+        for path, _, _, self_ns, _ in self.spans:
+            totals[path] = totals.get(path, 0) + self_ns
+        lines = [f"{path} {ns // 1000}" for path, ns in sorted(totals.items(), key=lambda kv: -kv[1]) if ns >= 1000]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, directory, prefix="neko-profile"):
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        trace_path = os.path.join(directory, f"{prefix}-{stamp}.trace.json")
+        stacks_path = os.path.join(directory, f"{prefix}-{stamp}.collapsed")
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        with open(stacks_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed_stacks())
+        if sys.stderr is not None:
+            print(f"Profile: {len(self.spans)} spans written to {trace_path} and {stacks_path}", file=sys.stderr)
+        return trace_path, stacks_path
+
+
+PROFILER = Profiler()
+
+
+def default_profile_dir():
+    from PySide6.QtCore import QStandardPaths
+
+    location = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    return os.path.join(location or os.getcwd(), "profiles")
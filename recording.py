@@ -0,0 +1,288 @@
+import os
+import sys
+import time
+import zlib
+import random
+import struct
+import threading
+from collections import deque
+
+
+# Opt-in session recording behind --record, for behavior bugs that only show
+# up after hours of real use ("she woke up five times in a minute"). Every
+# input a brain gets goes into a compact binary log: focus changes (from
+# check_active_window), clicks, drags and hovers (from the widget's mouse
+# events), hide/show, presence and battery changes, and every scheduler
+# wakeup, plus each pet's RNG seed and the state she started from. Her state
+# changes and lines go in too, so tools/replay.py can run the inputs through
+# fresh brains under a VirtualClock and check they tell the same story.
+#
+# Window handles and application names are never written, only numbers
+# saying which events share a window or an application.
+#
+# The log is bounded: at LIMIT bytes recording stops with an END record,
+# since a replay always has to start from the beginning. Records are
+# buffered and appended FLUSH_BYTES at a time, or once the oldest has waited
+# FLUSH_INTERVAL, so a crash loses at most the last minute. Appends go
+# through write(fn), which main.py points at the worker pool; None appends
+# right away.
+
+# File: header (magic, version, wall-clock start, dialogue fingerprint), then
+# records of seconds since the start (float64), kind and pet, followed by a
+# payload that depends on the kind
+_HEADER = struct.Struct("<4sHdI")
+_MAGIC = b"NKTR"
+_VERSION = 1
+_RECORD = struct.Struct("<dBB")
+
+# Record kinds
+START = 1     # seed, attention, giving up, pets, naps, lines, give-ups
+FOCUS = 2     # window, app (0 for none)
+PRESS = 3
+DRAG = 4
+HOVER = 5
+HIDE = 6
+SHOW = 7
+PRESENT = 8   # present
+BATTERY = 9   # on battery
+WAKEUP = 10   # the scheduler's timer fired
+STATE = 11    # NekoState value
+LINE = 12     # text id
+TEXT = 13     # text id, length, then that many bytes of UTF-8
+END = 14      # END_STOPPED or END_FULL
+
+END_STOPPED = 0
+END_FULL = 1
+
+_PAYLOADS = {
+    START: struct.Struct("<IdBIIII"),
+    FOCUS: struct.Struct("<II"),
+    PRESENT: struct.Struct("<B"),
+    BATTERY: struct.Struct("<B"),
+    STATE: struct.Struct("<B"),
+    LINE: struct.Struct("<I"),
+    TEXT: struct.Struct("<IH"),
+    END: struct.Struct("<B"),
+}
+_EMPTY = struct.Struct("<")
+
+KIND_NAMES = {
+    START: "start", FOCUS: "focus", PRESS: "press", DRAG: "drag", HOVER: "hover", HIDE: "hide",
+    SHOW: "show", PRESENT: "present", BATTERY: "battery", WAKEUP: "wakeup", STATE: "state",
+    LINE: "line", TEXT: "text", END: "end",
+}
+INPUTS = (FOCUS, PRESS, DRAG, HOVER, HIDE, SHOW, PRESENT, BATTERY)
+
+
+def dialogue_fingerprint(engine):
+    # Same packs in the same order give the same draws from the same seed
+    crc = 0
+    for key in sorted(engine.tables):
+        table = engine.tables[key]
+        crc = zlib.crc32(repr((key, table.items, table.prob, table.alias)).encode("utf-8"), crc)
+    return crc
+
+
+class SessionRecorder:
+    LIMIT = 16 * 1024 * 1024
+    FLUSH_BYTES = 64 * 1024
+    FLUSH_INTERVAL = 60.0  # seconds
+
+    def __init__(self, path, limit=None):
+        self.path = path
+        self.limit = limit or self.LIMIT
+        self.clock = None
+        self.started_at = None
+        self.recording = False
+        self.full = False
+        self.write = None
+        self.size = 0
+        self.records = 0
+        self.pets = {}
+        self.windows = {}
+        self.apps = {}
+        self.texts = {}
+        self.buffer = bytearray()
+        self.buffered_since = None
+        self._chunks = deque()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def start(self, clock, fingerprint=0):
+        self.clock = clock
+        self.started_at = clock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "wb")
+        self.recording = True
+        self._append(_HEADER.pack(_MAGIC, _VERSION, time.time(), fingerprint))
+        self.flush()
+        if sys.stderr is not None:
+            print(f"Recording to {self.path}", file=sys.stderr)
+
+    def stop(self, reason=END_STOPPED):
+        if not self.recording:
+            return
+        # Always fits: _record() keeps room for it
+        self._append(_RECORD.pack(self.clock() - self.started_at, END, 0) + _PAYLOADS[END].pack(reason))
+        self.recording = False
+        self.full = reason == END_FULL
+        self.flush()
+
+    def close(self):
+        # On quit: everything still buffered is written before returning
+        write, self.write = self.write, None
+        self.stop()
+        self.flush()
+        self.write = write
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # --- Called by the brains and the scheduler ---
+
+    def started(self, brain):
+        # A brain is about to start: give it a seed of its own and note
+        # where it starts from
+        if not self.recording:
+            return
+        seed = random.SystemRandom().getrandbits(32)
+        brain.random.seed(seed)
+        pet = self.pets.setdefault(brain, len(self.pets))
+        state = brain.export_state()
+        self._record(START, pet, seed, state["attention"], state["giving_up"] > 0.0, state["pets"],
+                     state["slept"], state["lines"], state["give_ups"])
+
+    def input(self, brain, kind, *payload):
+        if not self.recording:
+            return
+        if kind == FOCUS:
+            window, app = payload
+            payload = (self._number(self.windows, window), self._number(self.apps, app))
+        self._record(kind, self.pets.get(brain, 0), *payload)
+
+    def wakeup(self, now):
+        if self.recording:
+            self._record(WAKEUP, 0, now=now)
+
+    def state_changed(self, brain, state):
+        if self.recording:
+            self._record(STATE, self.pets.get(brain, 0), state.value)
+
+    def said(self, brain, text):
+        if not self.recording:
+            return
+        number = self.texts.get(text)
+        if number is None:
+            number = self.texts[text] = len(self.texts) + 1
+            encoded = text.encode("utf-8")[:0xFFFF]
+            self._record(TEXT, 0, number, len(encoded), extra=encoded)
+        self._record(LINE, self.pets.get(brain, 0), number)
+
+    # --- Writing ---
+
+    def _number(self, table, value):
+        # 0 for "none", otherwise the same number every time for one value
+        if not value:
+            return 0
+        number = table.get(value)
+        if number is None:
+            number = table[value] = len(table) + 1
+        return number
+
+    def _record(self, kind, pet, *payload, now=None, extra=b""):
+        if not self.recording:
+            return
+        if now is None:
+            now = self.clock()
+        data = _RECORD.pack(now - self.started_at, kind, pet) + _PAYLOADS.get(kind, _EMPTY).pack(*payload) + extra
+        if self.size + len(data) + _RECORD.size + _PAYLOADS[END].size > self.limit:
+            self.stop(END_FULL)
+            return
+        self._append(data)
+        self.records += 1
+
+    def _append(self, data):
+        now = self.clock()
+        if not self.buffer:
+            self.buffered_since = now
+        self.buffer += data
+        self.size += len(data)
+        if len(self.buffer) >= self.FLUSH_BYTES or now - self.buffered_since >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            with self._lock:
+                self._chunks.append(bytes(self.buffer))
+            self.buffer.clear()
+        if self.write is None:
+            self.drain()
+        else:
+            self.write(self.drain)
+
+    def drain(self):
+        # Appends every pending chunk, oldest first; runs on whichever
+        # thread gets there first, so chunks never land out of order
+        with self._lock:
+            if self._file is None:
+                return
+            while self._chunks:
+                self._file.write(self._chunks.popleft())
+            self._file.flush()
+
+
+class Trace:
+    # A recorded session as read back: records are (t, kind, pet, payload)
+    # in order, with TEXT records folded into texts
+    def __init__(self, started, fingerprint):
+        self.started = started
+        self.fingerprint = fingerprint
+        self.records = []
+        self.texts = {}
+        self.end = None  # END_STOPPED, END_FULL, or None if cut short (a crash)
+
+    def duration(self):
+        return self.records[-1][0] if self.records else 0.0
+
+
+def read_trace(path):
+    with open(path, "rb") as f:
+        blob = f.read()
+    if len(blob) < _HEADER.size:
+        raise ValueError(f"{path}: not a trace")
+    magic, version, started, fingerprint = _HEADER.unpack_from(blob)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path}: not a version {_VERSION} trace")
+    trace = Trace(started, fingerprint)
+    offset = _HEADER.size
+    try:
+        while offset < len(blob):
+            t, kind, pet = _RECORD.unpack_from(blob, offset)
+            offset += _RECORD.size
+            payload_struct = _PAYLOADS.get(kind, _EMPTY)
+            payload = payload_struct.unpack_from(blob, offset)
+            offset += payload_struct.size
+            if kind == TEXT:
+                number, length = payload
+                text = blob[offset:offset + length]
+                if len(text) != length:
+                    break
+                offset += length
+                trace.texts[number] = text.decode("utf-8", "replace")
+                continue
+            trace.records.append((t, kind, pet, payload))
+            if kind == END:
+                trace.end = payload[0]
+                break
+    except struct.error:
+        # The last record was cut off mid-write
+        pass
+    return trace
+
+
+def default_trace_dir():
+    from PySide6.QtCore import QStandardPaths
+
+    location = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    return os.path.join(location or os.getcwd(), "traces")
@@ -0,0 +1,278 @@
+import sys
+import time
+import heapq
+import itertools
+from collections import deque
+
+
+# One deadline heap behind a single OS timer. Everything that used to own a
+# QTimer registers a deadline here instead; the scheduler arms its one timer
+# for the earliest deadline and, when it fires, runs every job that falls
+# inside the slack window so nearby deadlines share a single wakeup.
+#
+# The scheduler itself knows nothing about Qt: bind() hands it a function
+# that (re)arms the real timer, and run_due() is what that timer calls.
+# With a VirtualClock, run_until() plays the OS timer's part instead.
+class _Entry:
+    __slots__ = ("deadline", "seq", "callback", "cancelled")
+
+    def __init__(self, deadline, seq, callback):
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class ScheduledTimer:
+    # Drop-in for the QTimer calls the widget makes: start(msec), stop(),
+    # is_active(). Restarting simply replaces the pending deadline.
+    def __init__(self, scheduler, callback, single_shot=False):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.single_shot = single_shot
+        self.interval = 0
+        self._entry = None
+
+    def start(self, msec=None):
+        if msec is not None:
+            self.interval = msec
+        self.stop()
+        self._entry = self.scheduler.call_later(self.interval / 1000.0, self._fire)
+
+    def stop(self):
+        if self._entry is not None:
+            self.scheduler.cancel(self._entry)
+            self._entry = None
+
+    def is_active(self):
+        return self._entry is not None
+
+    def remaining(self):
+        if self._entry is None:
+            return None
+        return max(0.0, self._entry.deadline - self.scheduler.clock())
+
+    def _fire(self):
+        self._entry = None
+        if not self.single_shot:
+            self._entry = self.scheduler.call_later(self.interval / 1000.0, self._fire)
+        self.callback()
+
+
+class Scheduler:
+    # Below this many live entries we never bother compacting the heap
+    COMPACT_MIN = 64
+
+    def __init__(self, clock=time.monotonic, slack=0.05):
+        self.clock = clock
+        self.slack = slack
+        self._heap = []
+        self._seq = itertools.count()
+        self._cancelled = 0
+        self._arm = None
+        self._armed_for = None
+        self._running = False
+        self._slack_requests = {}
+        # A MetricsRegistry to time every job into, and a Profiler to
+        # record each job as a span, if set
+        self.metrics = None
+        self.tracer = None
+        # A SessionRecorder to note every wakeup in, if recording
+        self.recorder = None
+
+        self.started_at = clock()
+        self.last_wakeup = None
+        self.wakeup_count = 0
+        self._recent_wakeups = deque()
+
+    def bind(self, arm):
+        # arm(delay_seconds) must (re)start the OS timer; arm(None) stops it
+        self._arm = arm
+        self._armed_for = None
+        self._rearm()
+
+    def set_slack(self, seconds, owner=None):
+        # With several owners (one per pet) the tightest request wins
+        if owner is not None:
+            self._slack_requests[owner] = seconds
+            seconds = min(self._slack_requests.values())
+        if seconds == self.slack:
+            return
+        self.slack = seconds
+        self._armed_for = None
+        self._rearm()
+
+    def call_at(self, deadline, callback):
+        entry = _Entry(deadline, next(self._seq), callback)
+        heapq.heappush(self._heap, entry)
+        self._rearm()
+        return entry
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.clock() + delay, callback)
+
+    def cancel(self, entry):
+        if entry.cancelled:
+            return
+        entry.cancelled = True
+        self._cancelled += 1
+        # Restarted timers leave dead entries behind; rebuild once they
+        # outnumber the live ones so drags cannot grow the heap forever.
+        if (not self._running and self._cancelled > self.COMPACT_MIN
+                and self._cancelled * 2 > len(self._heap)):
+            self._heap = [e for e in self._heap if not e.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        self._rearm()
+
+    def timer(self, callback, single_shot=False):
+        return ScheduledTimer(self, callback, single_shot)
+
+    def single_shot(self, msec, callback):
+        return self.call_later(msec / 1000.0, callback)
+
+    def next_deadline(self):
+        self._drop_cancelled()
+        return self._heap[0].deadline if self._heap else None
+
+    def pending(self):
+        return len(self._heap) - self._cancelled
+
+    def run_due(self):
+        # Called by the OS timer. Counts as one wakeup no matter how many
+        # jobs it ends up running.
+        now = self.clock()
+        self.wakeup_count += 1
+        self.last_wakeup = now
+        self._recent_wakeups.append(now)
+        # Only the last hour is ever asked about; without this the log grows
+        # for as long as nobody has the stats open
+        self._forget_wakeups(now)
+        if self.recorder is not None:
+            self.recorder.wakeup(now)
+        if self.metrics is not None and self._armed_for is not None:
+            # How long the event loop kept this wakeup waiting
+            self.metrics.observe("scheduler.lateness", max(0.0, now - self._armed_for))
+        self._armed_for = None
+
+        self._running = True
+        # Jobs scheduled by the jobs we run only get pulled into this wakeup
+        # if they are already due; otherwise a job that keeps rescheduling
+        # itself inside the slack window would never let us return.
+        first_new = next(self._seq)
+        deferred = []
+        try:
+            horizon = now + self.slack
+            while True:
+                self._drop_cancelled()
+                if not self._heap or self._heap[0].deadline > horizon:
+                    break
+                entry = heapq.heappop(self._heap)
+                if entry.seq > first_new and entry.deadline > now:
+                    deferred.append(entry)
+                    continue
+                entry.cancelled = True
+                try:
+                    if self.metrics is None and self.tracer is None:
+                        entry.callback()
+                    else:
+                        self._run_instrumented(entry.callback)
+                except Exception:
+                    sys.excepthook(*sys.exc_info())
+        finally:
+            for entry in deferred:
+                heapq.heappush(self._heap, entry)
+            self._running = False
+            self._rearm()
+
+    def _run_instrumented(self, callback):
+        from metrics import callback_name
+
+        name = "timer:" + callback_name(callback)
+        if self.tracer is not None:
+            self.tracer.begin(name)
+        started = time.perf_counter()
+        try:
+            callback()
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe(name, time.perf_counter() - started)
+            if self.tracer is not None:
+                self.tracer.end()
+
+    def run_until(self, deadline):
+        # Simulation driver for a VirtualClock: jump from wakeup to wakeup,
+        # exactly as the OS timer would have fired, up to deadline
+        while True:
+            wake_at = self._wake_time()
+            if wake_at is None or wake_at > deadline:
+                break
+            self.clock.advance_to(wake_at)
+            self.run_due()
+        self.clock.advance_to(deadline)
+
+    def _forget_wakeups(self, now):
+        while self._recent_wakeups and self._recent_wakeups[0] < now - 3600.0:
+            self._recent_wakeups.popleft()
+
+    def wakeups_per_hour(self):
+        now = self.clock()
+        self._forget_wakeups(now)
+        uptime = now - self.started_at
+        if uptime >= 3600.0:
+            return float(len(self._recent_wakeups))
+        if uptime <= 0:
+            return 0.0
+        # Less than an hour of data: extrapolate what we have
+        return len(self._recent_wakeups) * 3600.0 / uptime
+
+    def wakeups_per_minute(self):
+        now = self.clock()
+        count = 0
+        for t in reversed(self._recent_wakeups):
+            if t < now - 60.0:
+                break
+            count += 1
+        return float(count)
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    def _wake_time(self):
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        # Never wake more than once per slack window
+        if self.last_wakeup is not None:
+            deadline = max(deadline, self.last_wakeup + self.slack)
+        return deadline
+
+    def _rearm(self):
+        if self._arm is None or self._running:
+            return
+        wake_at = self._wake_time()
+        if wake_at == self._armed_for:
+            return
+        self._armed_for = wake_at
+        if wake_at is None:
+            self._arm(None)
+        else:
+            self._arm(max(0.0, wake_at - self.clock()))
+
+
+class VirtualClock:
+    # A monotonic clock that only moves when told to
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, t):
+        if t > self.now:
+            self.now = t
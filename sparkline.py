@@ -0,0 +1,108 @@
+import math
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QPainter, QPainterPath, QColor, QPen, QPolygonF
+
+
+# A small chart of one history window: the mean as a line over a faint
+# min-max band. Long windows are squeezed to one column per pixel (min of
+# mins, mean of means, max of maxs), so a year of days costs the same to
+# draw as an hour of minutes. Gaps (she wasn't running) break the line.
+class Sparkline(QWidget):
+    BAND_ALPHA = 60
+
+    def __init__(self, color, low=0.0, high=None, parent=None):
+        super().__init__(parent)
+        self.color = QColor(color)
+        # A fixed scale (attention is 0-100), or None to fit the data
+        self.low = low
+        self.high = high
+        self.data = None
+        self.columns = []
+        self.setMinimumHeight(40)
+
+    def set_data(self, mins, means, maxs):
+        self.data = (mins, means, maxs)
+        self.columns = self.squeeze(max(1, self.width()))
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.data is not None:
+            self.columns = self.squeeze(max(1, self.width()))
+
+    def squeeze(self, width):
+        # [(lo, mean, hi) or None] with at most width entries
+        mins, means, maxs = self.data
+        n = len(means)
+        count = min(n, width)
+        columns = []
+        for c in range(count):
+            start, end = c * n // count, max(c * n // count + 1, (c + 1) * n // count)
+            lows = [v for v in mins[start:end] if not math.isnan(v)]
+            averages = [v for v in means[start:end] if not math.isnan(v)]
+            highs = [v for v in maxs[start:end] if not math.isnan(v)]
+            if averages:
+                columns.append((min(lows), sum(averages) / len(averages), max(highs)))
+            else:
+                columns.append(None)
+        return columns
+
+    def paintEvent(self, event):
+        if not self.columns:
+            return
+        known = [column for column in self.columns if column is not None]
+        if not known:
+            return
+        high = self.high if self.high is not None else max(1.0, max(hi for _, _, hi in known))
+        span = (high - self.low) or 1.0
+        height = self.height() - 2
+        step = self.width() / max(1, len(self.columns) - 1) if len(self.columns) > 1 else 0.0
+
+        def y(value):
+            value = min(high, max(self.low, value))
+            return 1 + height - (value - self.low) / span * height
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        band = QColor(self.color)
+        band.setAlpha(self.BAND_ALPHA)
+        line = QPainterPath()
+        run = []
+
+        def flush_band():
+            if len(run) > 1:
+                polygon = QPolygonF([QPointF(x, y(hi)) for x, _, _, hi in run] +
+                                    [QPointF(x, y(lo)) for x, lo, _, _ in reversed(run)])
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(band)
+                painter.drawPolygon(polygon)
+            elif run:
+                # A lone bucket between gaps: a dot, since a line needs two
+                x, _, mean, _ = run[0]
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(self.color)
+                painter.drawEllipse(QPointF(x, y(mean)), 1.5, 1.5)
+            run.clear()
+
+        pen_down = False
+        for i, column in enumerate(self.columns):
+            x = i * step
+            if column is None:
+                flush_band()
+                pen_down = False
+                continue
+            lo, mean, hi = column
+            run.append((x, lo, mean, hi))
+            if pen_down:
+                line.lineTo(x, y(mean))
+            else:
+                line.moveTo(x, y(mean))
+                pen_down = True
+        flush_band()
+
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(QPen(self.color, 1.5))
+        painter.drawPath(line)
+        painter.end()
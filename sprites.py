@@ -0,0 +1,291 @@
+import os
+import struct
+import hashlib
+
+from PySide6.QtCore import Qt, QStandardPaths, QObject, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+
+LOOKS = ("idle", "sleep", "happy", "peek", "curious", "agitated")
+
+# Shown often enough to be worth having ready before the first paint. The
+# rest (peek, curious, agitated) are decoded the first time she needs them.
+EAGER_LOOKS = ("idle", "sleep", "happy")
+
+# Cache file: magic, version, width, height, device pixel ratio x 100,
+# followed by width * height premultiplied ARGB32 pixels
+_HEADER = struct.Struct("<4sHHHH")
+_MAGIC = b"NKSP"
+_VERSION = 1
+
+
+def source_hash(data):
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def render_sprite(data, size, dpr):
+    # PNG bytes -> premultiplied image scaled to size logical pixels at dpr
+    image = QImage.fromData(data)
+    if image.isNull():
+        return None
+    target = round(size * dpr)
+    image = image.scaled(target, target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+
+
+def default_cache_dir():
+    location = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+    if not location:
+        return None
+    return os.path.join(location, "sprites")
+
+
+# Ready-to-blit sprites. Each look is scaled once per device pixel ratio into
+# a premultiplied image and kept both in memory and on disk, keyed by the
+# source PNG's hash, the target size and the DPR. Later launches (and the
+# same DPR on another screen) skip PNG decoding and smooth scaling entirely.
+#
+# With an AssetBundle, pre-scaled pixels come straight out of the mapped
+# bundle. A loose PNG in asset_dir still wins if it differs from the one
+# the bundle was built from.
+class SpriteStore:
+    def __init__(self, asset_dir, size=64, cache_dir=None, bundle=None):
+        self.asset_dir = asset_dir
+        self.size = size
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.bundle = bundle
+        self._pixmaps = {}
+        self._hashes = {}
+        self.decodes = 0
+        self.cache_hits = 0
+        self.bundle_hits = 0
+
+    def source_path(self, look):
+        return os.path.join(self.asset_dir, f"neko_{look}.png")
+
+    def preload(self, dpr=1.0):
+        for look in EAGER_LOOKS:
+            self.get(look, dpr)
+
+    def get(self, look, dpr=1.0):
+        key = (look, round(dpr, 2))
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = self._load(look, key[1])
+            self._pixmaps[key] = pixmap
+        return pixmap
+
+    def drop_dpr(self, dpr):
+        # Forget sprites for a screen she has left; they are a disk read
+        # away if she comes back
+        dpr = round(dpr, 2)
+        for key in [k for k in self._pixmaps if k[1] == dpr]:
+            del self._pixmaps[key]
+
+    def loaded(self):
+        return sorted(self._pixmaps)
+
+    def look_for_path(self, path):
+        name = os.path.basename(path)
+        for look in LOOKS:
+            if name == f"neko_{look}.png":
+                return look
+        return None
+
+    # --- Hot reload ---
+    #
+    # prepare() does the slow part (read, decode, scale, write the disk
+    # cache) and only builds QImages, so it is safe on a worker thread.
+    # install() then swaps the results in on the GUI thread in one go.
+
+    def prepare(self, look, dprs):
+        # -> (source hash, {dpr: QImage}) with only the frames that decoded.
+        # Hash None if the PNG is gone, with the bundled sprite in its place
+        # if the bundle has one.
+        try:
+            with open(self.source_path(look), "rb") as f:
+                data = f.read()
+        except OSError:
+            images = {dpr: self.bundled_image(look, dpr) for dpr in dprs}
+            return None, {dpr: image for dpr, image in images.items() if image is not None}
+        digest = source_hash(data)
+        images = {}
+        for dpr in dprs:
+            image = self._render(data, dpr)
+            if image is None:
+                # Half-written, or not a PNG at all
+                continue
+            self._write_cache(look, self._cache_path(look, dpr, digest), image, dpr)
+            image.setDevicePixelRatio(dpr)
+            images[dpr] = image
+        return digest, images
+
+    def install(self, look, digest, images):
+        # GUI thread only. Swaps in the frames that decoded; any other frame
+        # of this look keeps its old pixmap, so a PNG that's deleted (with no
+        # bundled copy) or doesn't decode never leaves her invisible.
+        if not images:
+            return False
+        for dpr, image in images.items():
+            self._pixmaps[(look, dpr)] = QPixmap.fromImage(image)
+        if digest is None:
+            self._hashes.pop(look, None)
+        else:
+            self._hashes[look] = digest
+        return True
+
+    def loaded_dprs(self, look):
+        return sorted(dpr for l, dpr in self._pixmaps if l == look)
+
+    def _load(self, look, dpr):
+        image = self.load_image(look, dpr)
+        if image is None:
+            # The PNG is missing or broken: the bundled sprite, else this
+            # look at another pixel ratio, rather than nothing
+            image = self.bundled_image(look, dpr)
+        if image is None:
+            for (other_look, _), pixmap in self._pixmaps.items():
+                if other_look == look and not pixmap.isNull():
+                    return pixmap
+            return QPixmap()
+        return QPixmap.fromImage(image)
+
+    def bundled_image(self, look, dpr):
+        # The bundle's own copy of a sprite, whatever is in asset_dir; safe
+        # off the GUI thread like load_image()
+        if self.bundle is None or self.bundle.sprite_hash(look, self.size) is None:
+            return None
+        image = self.bundle.sprite_image(look, self.size, dpr)
+        if image is None:
+            image = self._render(bytes(self.bundle.sprite_png(look, self.size)), dpr)
+            if image is None:
+                return None
+            image.setDevicePixelRatio(dpr)
+        return image
+
+    def load_image(self, look, dpr):
+        # The sprite as a QImage (None if there is none); QImages are safe
+        # to build off the GUI thread, so prefetching can use this too
+        dpr = round(dpr, 2)
+        data = self._read_source(look)
+
+        bundled_hash = self.bundle.sprite_hash(look, self.size) if self.bundle else None
+        if bundled_hash is not None and (data is None or self._hashes[look] == bundled_hash):
+            image = self.bundle.sprite_image(look, self.size, dpr)
+            if image is not None:
+                self.bundle_hits += 1
+                return image
+            if data is None:
+                # No pre-scaled copy for this DPR; scale the bundled PNG
+                data = bytes(self.bundle.sprite_png(look, self.size))
+                self._hashes[look] = bundled_hash
+
+        if data is None:
+            return None
+
+        cache_path = self._cache_path(look, dpr)
+        image = self._read_cache(cache_path)
+        if image is not None:
+            self.cache_hits += 1
+        else:
+            image = self._render(data, dpr)
+            if image is None:
+                return None
+            self._write_cache(look, cache_path, image, dpr)
+
+        image.setDevicePixelRatio(dpr)
+        return image
+
+    def put(self, look, dpr, image):
+        # GUI thread: add a sprite prefetched with load_image(), unless it
+        # was needed (and loaded) in the meantime
+        key = (look, round(dpr, 2))
+        if key not in self._pixmaps and image is not None:
+            self._pixmaps[key] = QPixmap.fromImage(image)
+
+    def _read_source(self, look):
+        try:
+            with open(self.source_path(look), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._hashes[look] = source_hash(data)
+        return data
+
+    def _render(self, data, dpr):
+        image = render_sprite(data, self.size, dpr)
+        if image is not None:
+            self.decodes += 1
+        return image
+
+    def _cache_path(self, look, dpr, digest=None):
+        if not self.cache_dir:
+            return None
+        name = f"{look}-{digest or self._hashes[look]}-{self.size}-{int(dpr * 100)}.argb"
+        return os.path.join(self.cache_dir, name)
+
+    def _read_cache(self, path):
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+        if len(blob) < _HEADER.size:
+            return None
+        magic, version, width, height, _ = _HEADER.unpack_from(blob)
+        pixels = blob[_HEADER.size:]
+        if magic != _MAGIC or version != _VERSION or len(pixels) != width * height * 4:
+            return None
+        # copy() detaches the image from the bytes object it was built on
+        return QImage(pixels, width, height, width * 4, QImage.Format_ARGB32_Premultiplied).copy()
+
+    def _write_cache(self, look, path, image, dpr):
+        if path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Entries for an older version of this PNG will never be read again
+            current = os.path.basename(path).split("-")[1]
+            for name in os.listdir(self.cache_dir):
+                parts = name.split("-")
+                if parts[0] == look and len(parts) == 4 and parts[1] != current:
+                    os.remove(os.path.join(self.cache_dir, name))
+
+            width, height = image.width(), image.height()
+            header = _HEADER.pack(_MAGIC, _VERSION, width, height, int(dpr * 100))
+            # 32-bit pixels mean rows are never padded
+            pixels = bytes(image.constBits())[:width * height * 4]
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(pixels)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+# Re-decodes sprites whose PNGs changed on the worker pool and installs
+# each one on the GUI thread when it's ready. A newer save of the same PNG
+# cancels a decode still waiting for it, so the last save always wins.
+class SpriteReloader(QObject):
+    # look, once its new pixmaps are in the store
+    reloaded = Signal(str)
+    DECODE_TIMEOUT = 10.0  # seconds
+
+    def __init__(self, store, workers, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.workers = workers
+        self.reloads = 0
+
+    def request(self, look, dprs):
+        self.workers.submit(self.store.prepare, look, tuple(dprs), key=("sprite", look),
+                            name="decode_sprite", timeout=self.DECODE_TIMEOUT,
+                            on_done=lambda prepared: self._install(look, *prepared))
+
+    def _install(self, look, digest, images):
+        if self.store.install(look, digest, images):
+            self.reloads += 1
+            self.reloaded.emit(look)
@@ -0,0 +1,30 @@
+import sys
+import time
+
+
+# Wall-clock phases from process start to her first frame. main.py marks
+# each phase as it finishes; report() prints the breakdown when there is a
+# console, and the Stats window shows it too.
+class StartupTimer:
+    def __init__(self, clock=time.perf_counter, started=None):
+        self.clock = clock
+        self.started = clock() if started is None else started
+        self.last = self.started
+        self.phases = []
+
+    def mark(self, name):
+        now = self.clock()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.started
+
+    def summary(self):
+        parts = [f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases]
+        return ", ".join(parts) + f" (total {self.total() * 1000:.0f} ms)"
+
+    def report(self):
+        # pythonw and --noconsole builds have no stderr
+        if sys.stderr is not None:
+            print(f"Startup: {self.summary()}", file=sys.stderr)
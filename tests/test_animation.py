@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from animation import SpriteView, ANIMATIONS
+from scheduler import Scheduler, VirtualClock
+from sprites import SpriteStore
+
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+@pytest.fixture
+def view(qapp, tmp_path):
+    scheduler = Scheduler(clock=VirtualClock(), slack=0.0)
+    sprites = SpriteStore(ASSETS, cache_dir=str(tmp_path))
+    view = SpriteView(sprites, scheduler)
+    view.show()
+    yield view
+    view.close()
+
+
+def test_sleep_settles_into_a_still_frame(view):
+    scheduler = view.scheduler
+    view.set_look("sleep")
+    scheduler.run_until(3600.0)
+    sleep = ANIMATIONS["sleep"]
+    assert scheduler.wakeup_count == sleep.frames * sleep.loops
+    assert not view.frame_timer.is_active()
+    assert view.frame == 0
+
+
+def test_idle_fidgets_with_rests_between(view):
+    scheduler = view.scheduler
+    scheduler.run_until(60.0)
+    idle = ANIMATIONS["idle"]
+    # One loop (frames, then a rest) takes rest + frames / fps seconds
+    loop = idle.rest + idle.frames / idle.fps
+    assert idle.frames <= scheduler.wakeup_count <= (60.0 / loop + 1) * idle.frames
+
+
+def test_nothing_is_scheduled_while_suspended(view):
+    view.set_suspended(True)
+    view.set_look("happy")
+    view.scheduler.run_until(60.0)
+    assert view.scheduler.wakeup_count == 0
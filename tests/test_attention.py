@@ -0,0 +1,74 @@
+import math
+
+from attention import AttentionMeter, SwitchRate, GIVE_UP_AFTER, METER_MAX
+from scheduler import VirtualClock
+
+
+def test_meter_rises_linearly_and_caps():
+    clock = VirtualClock()
+    meter = AttentionMeter(clock=clock)
+    meter.set_rate(1.0)
+    clock.advance_to(20.0)
+    assert meter.value() == 20.0
+    assert meter.level() == "LOW"
+    clock.advance_to(50.0)
+    assert meter.level() == "MEDIUM"
+    clock.advance_to(500.0)
+    assert meter.value() == METER_MAX
+    assert meter.level() == "HIGH"
+
+
+def test_next_event_is_the_next_crossing_then_the_give_up():
+    clock = VirtualClock()
+    meter = AttentionMeter(clock=clock, value=10.0)
+    meter.set_rate(2.0)
+    assert meter.next_event() == 10.0  # 10 -> 30
+    clock.advance_to(10.5)
+    assert meter.next_event() == 30.0  # 30 -> 70
+    clock.advance_to(30.5)
+    assert meter.next_event() == 30.0 + GIVE_UP_AFTER
+
+
+def test_pausing_freezes_the_meter_and_the_give_up():
+    clock = VirtualClock()
+    meter = AttentionMeter(clock=clock, value=80.0)
+    meter.set_rate(1.0)
+    assert meter.give_up_deadline() == GIVE_UP_AFTER
+    clock.advance_to(5.0)
+    meter.set_paused(True)
+    clock.advance_to(100.0)
+    assert meter.value() == 85.0
+    assert meter.give_up_deadline() is None
+    assert meter.next_event() is None
+    meter.set_paused(False)
+    assert meter.give_up_deadline() == 100.0 + GIVE_UP_AFTER
+
+
+def test_interaction_restarts_the_give_up_countdown():
+    clock = VirtualClock()
+    meter = AttentionMeter(clock=clock, value=90.0)
+    clock.advance_to(200.0)
+    meter.reset_unanswered()
+    assert meter.give_up_deadline() == 200.0 + GIVE_UP_AFTER
+
+
+def test_switch_rate_decays_by_e_every_tau():
+    clock = VirtualClock()
+    rate = SwitchRate(clock=clock, tau=10.0)
+    rate.add()
+    rate.add()
+    clock.advance_to(10.0)
+    assert math.isclose(rate.value(), 2.0 / math.e)
+    assert math.isclose(rate.time_below(0.5), 10.0 * math.log(2.0 / 0.5))
+    clock.advance_to(rate.time_below(0.5))
+    assert math.isclose(rate.value(), 0.5)
+
+
+def test_steady_switching_settles_near_its_rate():
+    clock = VirtualClock()
+    rate = SwitchRate(clock=clock, tau=10.0)
+    for i in range(100):
+        clock.advance_to(i * 6.0)
+        rate.add()
+    # One switch every 6 s is about 10 a minute
+    assert 9.0 < rate.per_minute() < 15.0
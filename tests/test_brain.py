@@ -0,0 +1,196 @@
+import random
+
+from brain import NekoBrain, NekoState, NekoView
+from dialogue import DialogueEngine
+from scheduler import Scheduler, VirtualClock
+from window_source import FakeWindowSource
+
+
+CONTEXTS = ("greeting", "chatter", "sleep_talk", "curious", "agitated", "woken", "wake",
+            "pet_satisfied", "pet_more", "give_up")
+
+
+class RecordingView(NekoView):
+    def __init__(self):
+        self.looks = []
+        self.said = []
+        self.visible = True
+        self.suspended = False
+        self.resting = []
+
+    def set_look(self, look):
+        self.looks.append(look)
+
+    def show_bubble(self, text):
+        self.said.append(text)
+
+    def set_visible(self, visible):
+        self.visible = visible
+
+    def set_suspended(self, suspended):
+        self.suspended = suspended
+
+    def set_resting(self, resting):
+        self.resting.append(resting)
+
+
+def make_brain(attention=0.0, seed=1):
+    # Every context has one line, its own name, so view.said shows which
+    # context each line came from
+    engine = DialogueEngine()
+    engine.load_pack("test", {"lines": {context: [context] for context in CONTEXTS}})
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=NekoBrain.SLACK_AWAKE)
+    source = FakeWindowSource()
+    view = RecordingView()
+    brain = NekoBrain(view=view, scheduler=scheduler, window_source=source, rng=random.Random(seed),
+                      dialogue=engine)
+    source.subscribe(brain.focus_changed)
+    brain.attention_meter = attention
+    brain.start()
+    return brain, scheduler, source, view
+
+
+def test_greets_then_goes_quiet():
+    brain, scheduler, _, view = make_brain()
+    assert brain.state == NekoState.IDLE
+    scheduler.run_until(5.1)
+    assert brain.state == NekoState.TALKING
+    assert view.said == ["greeting"]
+    scheduler.run_until(9.2)
+    assert brain.state == NekoState.IDLE
+
+
+def test_falls_asleep_when_left_alone():
+    brain, scheduler, _, view = make_brain()
+    scheduler.run_until(50.0)
+    assert brain.state == NekoState.SLEEPING
+    assert brain.stats_times_slept == 1
+    assert view.looks[-1] == "sleep"
+
+
+def test_one_switch_makes_her_peek_then_sleep_again():
+    brain, scheduler, source, view = make_brain()
+    source.focus(1)
+    scheduler.run_until(50.0)
+    assert brain.state == NekoState.SLEEPING
+    source.focus(2)
+    assert brain.state == NekoState.PEEKING
+    assert view.looks[-1] == "peek"
+    scheduler.run_until(54.0)
+    assert brain.state == NekoState.SLEEPING
+
+
+def test_quick_switches_wake_her():
+    brain, scheduler, source, view = make_brain()
+    source.focus(1)
+    scheduler.run_until(50.0)
+    source.focus(2)
+    assert brain.state == NekoState.PEEKING
+    scheduler.run_until(50.5)
+    source.focus(3)
+    scheduler.run_until(51.0)
+    source.focus(4)
+    assert brain.state == NekoState.TALKING
+    assert view.said[-2:] == ["wake", "woken"]
+
+
+def test_a_burst_of_switches_gets_a_curious_then_agitated_line():
+    brain, scheduler, source, view = make_brain()
+    scheduler.run_until(10.0)
+    for i, t in enumerate((10.0, 10.5, 11.0, 11.5), 1):
+        scheduler.run_until(t)
+        source.focus(i)
+    assert "curious" in view.said
+    assert "agitated" not in view.said
+    for i, t in enumerate((12.0, 12.5), 5):
+        scheduler.run_until(t)
+        source.focus(i)
+    assert view.said[-1] == "agitated"
+
+
+def test_petting_drops_attention():
+    brain, scheduler, _, view = make_brain(attention=60.0)
+    scheduler.run_until(10.0)
+    before = brain.attention_meter
+    brain.pressed()
+    assert brain.attention_meter == before - NekoBrain.PET_DROP
+    assert brain.stats_pets_received == 1
+    assert view.said[-1] == "pet_satisfied"
+
+
+def test_gives_up_after_being_ignored_at_high():
+    brain, scheduler, _, view = make_brain(attention=80.0)
+    scheduler.run_until(299.0)
+    assert brain.stats_give_ups == 0
+    scheduler.run_until(301.0)
+    assert brain.stats_give_ups == 1
+    assert brain.giving_up
+    assert brain.attention_level == "LOW"
+
+
+def test_away_freezes_her_and_she_carries_on_when_back():
+    brain, scheduler, source, view = make_brain()
+    scheduler.run_until(10.0)
+    said = len(view.said)
+    brain.set_present(False)
+    assert brain.state == NekoState.IDLE
+    assert brain.stats_times_slept == 0
+    assert view.suspended and source.suspended
+    frozen = brain.attention_meter
+    wakeups = scheduler.wakeup_count
+    scheduler.run_until(3600.0)
+    assert brain.attention_meter == frozen
+    assert scheduler.wakeup_count == wakeups
+    brain.set_present(True)
+    assert not view.suspended
+    assert brain.state == NekoState.IDLE
+    assert len(view.said) == said
+    assert brain.stats_times_slept == 0
+    assert brain.attention_meter > frozen
+    # Back to the usual inactivity countdown
+    assert brain.sleep_timer.is_active()
+
+
+def test_asleep_when_they_leave_she_is_still_asleep_when_back():
+    brain, scheduler, source, view = make_brain()
+    source.focus(1)
+    scheduler.run_until(50.0)
+    source.focus(2)
+    assert brain.state == NekoState.PEEKING
+    brain.set_present(False)
+    assert brain.state == NekoState.SLEEPING
+    assert view.looks[-1] == "sleep"
+    scheduler.run_until(600.0)
+    brain.set_present(True)
+    assert brain.state == NekoState.SLEEPING
+    assert brain.stats_times_slept == 1
+    assert "wake" not in view.said
+
+
+def test_hidden_she_only_shows_to_talk():
+    brain, scheduler, _, view = make_brain()
+    brain.hide()
+    assert not view.visible
+    scheduler.run_until(5.1)
+    assert view.visible and brain.temp_unhidden_for_dialogue
+    scheduler.run_until(9.2)
+    assert not view.visible
+    brain.show()
+    assert view.visible
+
+
+def test_view_hears_when_she_rests():
+    brain, scheduler, source, view = make_brain()
+    scheduler.run_until(50.0)
+    assert view.resting == [True]  # asleep
+    source.focus(1)
+    brain.pressed()
+    assert view.resting == [True, False]
+    brain.hide()
+    assert view.resting[-1] is True
+    brain.show()
+    brain.set_present(False)
+    assert view.resting[-2:] == [False, True]
+    brain.set_present(True)
+    assert view.resting[-1] is False
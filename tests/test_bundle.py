@@ -0,0 +1,57 @@
+import os
+import json
+import shutil
+
+import pytest
+
+from bundle import ALIGN, PRESCALED_DPRS, AssetBundle, build
+
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+@pytest.fixture
+def bundle(qapp, tmp_path):
+    assets = tmp_path / "assets"
+    shutil.copytree(ASSETS, assets)
+    os.remove(assets / "neko_agitated.png")
+    dialogue = tmp_path / "dialogue"
+    dialogue.mkdir()
+    (dialogue / "extra.json").write_text(json.dumps({"lines": {"chatter": ["mrrp"]}}), encoding="utf-8")
+    path = str(tmp_path / "neko.bundle")
+    build(str(assets), path, dialogue_dir=str(dialogue))
+    bundle = AssetBundle(path)
+    yield bundle
+    bundle.close()
+
+
+def test_sprites_and_packs_read_back(bundle):
+    assert "agitated" not in bundle.index["sprites"]
+    with open(os.path.join(ASSETS, "neko_idle.png"), "rb") as f:
+        assert bytes(bundle.sprite_png("idle", 64)) == f.read()
+    # Only at the size it was built for
+    assert bundle.sprite_png("idle", 32) is None
+    assert bundle.dialogue_packs() == {"extra": {"lines": {"chatter": ["mrrp"]}}}
+
+
+def test_prescaled_images_read_in_place(bundle):
+    for dpr in PRESCALED_DPRS:
+        image = bundle.sprite_image("sleep", 64, dpr)
+        assert not image.isNull()
+        assert image.width() == round(64 * dpr)
+        assert image.devicePixelRatio() == dpr
+    assert bundle.sprite_image("sleep", 64, 3.0) is None
+
+
+def test_blobs_are_aligned(bundle):
+    for entry in bundle.index["sprites"].values():
+        assert entry["png"][0] % ALIGN == 0
+        for offset, _, _, _ in entry["pixels"].values():
+            assert offset % ALIGN == 0
+
+
+def test_anything_else_is_refused(tmp_path):
+    path = tmp_path / "neko.bundle"
+    path.write_bytes(b"PK\x03\x04" + b"\0" * 60)
+    with pytest.raises(ValueError):
+        AssetBundle(str(path))
@@ -0,0 +1,65 @@
+import sys
+import time
+import threading
+
+import pytest
+
+import control
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="Unix socket tests")
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_names_live_in_the_runtime_dir(runtime_dir):
+    assert control.server_name().startswith(str(runtime_dir))
+    assert control.lock_path().startswith(str(runtime_dir))
+
+
+def test_nobody_listening(capsys):
+    assert control.request("stats") is None
+    # A plain launch goes on to start Neko; a command has nobody to ask
+    assert control.run_client([]) is None
+    assert control.run_client(["pet"]) == 1
+    assert "isn't running" in capsys.readouterr().err
+
+
+def test_commands_reach_the_running_instance(qapp, capsys):
+    from PySide6.QtCore import QCoreApplication, QEvent
+
+    seen = []
+
+    def handle(request):
+        seen.append(request)
+        if request["command"] == "hide":
+            raise RuntimeError("no pets")
+        return {"ok": True, "pets": [], "wakeups_per_minute": 3.0, "rss_mb": 40.0}
+
+    server = control.ControlServer(handle)
+    assert server.listen()
+    replies = {}
+
+    def client():
+        replies["stats"] = control.run_client(["stats"])
+        replies["hide"] = control.request("hide")
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    while thread.is_alive():
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+    # Let the finished connections delete themselves before the server goes
+    QCoreApplication.processEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    server.close()
+
+    assert [request["command"] for request in seen] == ["stats", "hide"]
+    assert server.requests == 2
+    assert replies["stats"] == 0
+    assert "0 pet(s), 3 wakeups/min, 40.0 MB" in capsys.readouterr().out
+    assert replies["hide"] == {"ok": False, "error": "no pets"}
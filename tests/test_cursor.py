@@ -0,0 +1,47 @@
+from cursor import CursorTracker
+from metrics import MetricsRegistry
+from scheduler import Scheduler, VirtualClock
+
+
+def make_tracker(cursor):
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    seen = []
+    tracker = CursorTracker(scheduler, lambda: cursor[0], lambda: (500, 500), seen.append,
+                            registry=MetricsRegistry())
+    return tracker, scheduler, seen
+
+
+def test_only_bucket_changes_are_passed_on():
+    cursor = [(900, 500)]
+    tracker, scheduler, seen = make_tracker(cursor)
+    tracker.set_mode("smooth")
+    scheduler.run_until(1.0)
+    cursor[0] = (520, 480)  # inside the dead zone
+    scheduler.run_until(2.0)
+    cursor[0] = (100, 100)
+    scheduler.run_until(3.0)
+    assert seen == [(1, 0), (0, 0), (-1, -1)]
+    tracker.set_mode(None)
+    assert seen[-1] is None
+
+
+def test_a_still_cursor_is_sampled_less_and_less():
+    cursor = [(900, 500)]
+    tracker, scheduler, _ = make_tracker(cursor)
+    tracker.set_mode("smooth")
+    scheduler.run_until(30.0)
+    assert tracker.interval == CursorTracker.STILL_INTERVAL
+    samples = tracker.samples
+    scheduler.run_until(70.0)
+    assert tracker.samples - samples == 10
+    cursor[0] = (901, 500)
+    scheduler.run_until(scheduler.clock() + tracker.timer.remaining())
+    assert tracker.interval == CursorTracker.INTERVALS["smooth"]
+
+
+def test_off_it_never_samples():
+    tracker, scheduler, seen = make_tracker([(0, 0)])
+    scheduler.run_until(60.0)
+    assert tracker.samples == 0 and scheduler.wakeup_count == 0
+    assert seen == []
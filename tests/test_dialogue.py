@@ -0,0 +1,87 @@
+import json
+import random
+from collections import deque
+
+import pytest
+
+from dialogue import DialogueEngine, compile_pack
+
+
+PACK = {"lines": {"greeting": ["hi", {"text": "mew~", "weight": 3}],
+                  "chatter": {"LOW": ["purr"], "HIGH": ["pet me?"]}}}
+
+
+def write_pack(path, data):
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+
+
+def test_compiles_lines_per_level():
+    table = compile_pack(PACK)
+    assert table[("greeting", "LOW")] == [("hi", 1.0), ("mew~", 3.0)]
+    assert table[("chatter", "HIGH")] == [("pet me?", 1.0)]
+    assert ("chatter", "MEDIUM") not in table
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    "hello",
+    {"lines": ["hi"]},
+    {"lines": {"greeting": "hi"}},
+    {"lines": {"greeting": [{"weight": 2}]}},
+    {"lines": {"greeting": [{"text": "hi", "weight": "lots"}]}},
+    {"lines": {"greeting": [{"text": "hi", "weight": None}]}},
+    {"lines": {"greeting": [42]}},
+])
+def test_malformed_packs_are_refused(data):
+    with pytest.raises(ValueError):
+        compile_pack(data)
+
+
+@pytest.mark.parametrize("contents", [
+    "{not json",
+    [],
+    {"lines": {"greeting": [{"weight": 2}]}},
+    {"lines": {"greeting": [{"text": "hi", "weight": "lots"}]}},
+])
+def test_a_malformed_pack_file_keeps_the_previous_pack(tmp_path, contents):
+    path = tmp_path / "core.json"
+    write_pack(path, PACK)
+    engine = DialogueEngine()
+    assert engine.load_file(str(path)) == "core"
+
+    write_pack(path, contents)
+    assert engine.load_file(str(path)) is None
+    assert engine.has("greeting")
+    assert engine.tables[("greeting", "LOW")].items == ["hi", "mew~"]
+
+
+def test_a_deleted_pack_file_removes_its_lines(tmp_path):
+    path = tmp_path / "core.json"
+    write_pack(path, PACK)
+    engine = DialogueEngine()
+    engine.load_file(str(path))
+    path.unlink()
+    assert engine.load_file(str(path)) is None
+    assert not engine.has("greeting")
+
+
+@pytest.mark.parametrize("size", [2, 3, 4, 6])
+def test_never_repeats_a_recent_line(size):
+    engine = DialogueEngine()
+    # One line much more likely than the rest, to tempt repeats
+    lines = [{"text": "heavy", "weight": 50}] + [f"line {i}" for i in range(size - 1)]
+    engine.load_pack("test", {"lines": {"chatter": lines}})
+    recent = deque(maxlen=4)
+    rng = random.Random(3)
+    said = [engine.choose("chatter", "LOW", rng, recent) for _ in range(500)]
+    window = min(4, size - 1)
+    for i in range(window, len(said)):
+        assert said[i] not in said[i - window:i]
+
+
+def test_a_single_line_pool_still_speaks():
+    engine = DialogueEngine()
+    engine.load_pack("test", {"lines": {"wake": ["mrr?"]}})
+    recent = deque(maxlen=4)
+    rng = random.Random(0)
+    assert [engine.choose("wake", "HIGH", rng, recent) for _ in range(3)] == ["mrr?"] * 3
@@ -0,0 +1,93 @@
+import math
+
+from history import History, HistoryRecorder
+from scheduler import Scheduler, VirtualClock
+
+
+def make_recorder(value):
+    clock = VirtualClock(1_000_020.0)  # wall-clock-like, on a minute boundary
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    history = History(("attention",))
+    recorder = HistoryRecorder(history, scheduler, {"attention": lambda: value[0]}, clock=clock)
+    return recorder, history, scheduler, clock
+
+
+def test_samples_every_interval():
+    value = [10.0]
+    recorder, history, scheduler, clock = make_recorder(value)
+    recorder.start()
+    scheduler.run_until(clock() + 300.0)
+    assert history.samples == 11
+    assert scheduler.wakeup_count == 10
+
+
+def test_paused_it_wakes_nobody():
+    value = [10.0]
+    recorder, history, scheduler, clock = make_recorder(value)
+    recorder.start()
+    recorder.pause()
+    samples = history.samples
+    scheduler.run_until(clock() + 8 * 3600.0)
+    assert scheduler.wakeup_count == 0
+    assert history.samples == samples
+
+
+def test_resume_fills_the_gap_with_a_straight_line():
+    value = [10.0]
+    recorder, history, scheduler, clock = make_recorder(value)
+    recorder.start()
+    recorder.pause()
+    clock.advance_to(clock() + 600.0)
+    value[0] = 30.0
+    recorder.resume()
+    _, means, _ = history.series["attention"].window("minute", 11, clock())
+    assert [round(m) for m in means] == [10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30]
+    # And it samples on its own again
+    samples = history.samples
+    scheduler.run_until(clock() + 60.0)
+    assert history.samples == samples + 2
+
+
+def test_switching_fades_through_the_gap():
+    clock = VirtualClock(1_000_020.0)
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    history = History(("switching",))
+    value = [6.0]
+    recorder = HistoryRecorder(history, scheduler, {"switching": lambda: value[0]}, clock=clock,
+                               decay={"switching": 10.0})
+    recorder.start()
+    recorder.pause()
+    clock.advance_to(clock() + 600.0)
+    value[0] = 0.0
+    recorder.resume()
+    _, means, _ = history.series["switching"].window("minute", 11, clock())
+    # Mostly gone within the first minute, not a straight line down to 0
+    assert math.isclose(means[0], 6.0 * (1 + math.exp(-3.0)) / 2, rel_tol=1e-6)
+    assert means[1] < 0.01
+    assert all(later < earlier for earlier, later in zip(means, means[1:]))
+
+
+def test_long_gaps_are_filled_coarsely():
+    value = [10.0]
+    recorder, history, scheduler, clock = make_recorder(value)
+    recorder.start()
+    recorder.pause()
+    clock.advance_to(clock() + 30 * 86400.0)
+    recorder.resume()
+    assert history.samples <= HistoryRecorder.MAX_FILL + 3
+    _, means, _ = history.series["attention"].window("day", 31, clock())
+    assert not any(math.isnan(m) for m in means)
+
+
+def test_a_short_pause_keeps_the_cadence():
+    value = [10.0]
+    recorder, history, scheduler, clock = make_recorder(value)
+    start = clock()
+    recorder.start()
+    scheduler.run_until(start + 40.0)
+    recorder.pause()
+    clock.advance_to(start + 50.0)
+    recorder.resume()
+    assert history.samples == 2
+    scheduler.run_until(start + 150.0)
+    assert history.samples == 6  # at 60, 90, 120 and 150
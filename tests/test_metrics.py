@@ -0,0 +1,49 @@
+import threading
+
+from metrics import MetricsRegistry, StallDetector
+
+
+def test_percentiles_fall_in_the_right_bucket():
+    registry = MetricsRegistry()
+    for _ in range(99):
+        registry.observe("handler", 0.0002)
+    registry.observe("handler", 0.02)
+    histogram = registry.histograms["handler"]
+    assert histogram.count == 100
+    assert 0.0002 <= histogram.percentile(50) < 0.0002 * 1.19
+    assert histogram.percentile(100) == 0.02
+
+
+def test_workers_can_record_while_the_gui_reads():
+    registry = MetricsRegistry()
+    threads = 4
+    calls = 5000
+
+    def work(n):
+        for i in range(calls):
+            registry.observe(f"worker:{n}:{i % 50}", 0.001)
+            registry.counter("jobs").inc()
+
+    workers = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    while any(worker.is_alive() for worker in workers):
+        # What the Stats window does once a second
+        sorted(registry.histogram_list(), key=lambda h: h.total)
+    for worker in workers:
+        worker.join()
+
+    assert sum(h.count for h in registry.histogram_list()) == threads * calls
+    assert registry.counter("jobs").value == threads * calls
+
+
+def test_stall_detector_blames_handlers_not_late_timers():
+    registry = MetricsRegistry()
+    detector = StallDetector(registry, log=False)
+    registry.observe("scheduler.lateness", 0.035)
+    registry.observe("NekoBrain.random_dialogue", 0.005)
+    assert detector.stalls == 0
+    registry.observe("NekoBrain.random_dialogue", 0.030)
+    assert detector.stalls == 1
+    assert detector.worst == "NekoBrain.random_dialogue"
+    assert registry.histograms["gui.stall"].count == 1
@@ -0,0 +1,85 @@
+from persistence import StateStore
+
+
+def make_store(directory, state):
+    store = StateStore(str(directory), source=lambda: state)
+    store.load()
+    return store
+
+
+def reload(directory):
+    return StateStore(str(directory)).load()
+
+
+def failing_write(*args):
+    raise OSError("disk full")
+
+
+def test_changes_survive_a_reload(tmp_path):
+    state = {"attention": 10.0, "pets": 1.0}
+    store = make_store(tmp_path, state)
+    store.close()
+    state["attention"] = 20.0
+    store.close()
+    loaded = reload(tmp_path)
+    assert loaded["attention"] == 20.0
+    assert loaded["pets"] == 1.0
+
+
+def test_a_failed_write_goes_out_with_the_next_flush(tmp_path):
+    state = {"attention": 10.0, "pets": 1.0}
+    store = make_store(tmp_path, state)
+    store._append = failing_write
+    store.close()
+    assert "attention" not in reload(tmp_path)
+
+    # Nothing changed since, but the lost fields are still dirty
+    del store._append
+    store.close()
+    loaded = reload(tmp_path)
+    assert loaded["attention"] == 10.0
+    assert loaded["pets"] == 1.0
+
+
+def test_a_retry_sends_the_latest_value(tmp_path):
+    state = {"attention": 10.0}
+    store = make_store(tmp_path, state)
+    store._append = failing_write
+    store.close()
+    del store._append
+    state["attention"] = 30.0
+    store.close()
+    assert reload(tmp_path)["attention"] == 30.0
+
+
+def test_stopping_between_snapshot_and_truncate_loses_nothing(tmp_path):
+    state = {"attention": 0.0}
+    store = make_store(tmp_path, state)
+    store.COMPACT_AFTER = 6
+    for value in (1.0, 2.0):
+        state["attention"] = value
+        store.close()
+    # The next flush compacts; pretend we died right after the rename
+    store._truncate_journal = failing_write
+    state["attention"] = 3.0
+    store.close()
+    assert store.compactions == 0
+    assert reload(tmp_path)["attention"] == 3.0
+
+    # And the compaction is tried again on the next flush
+    del store._truncate_journal
+    state["attention"] = 4.0
+    store.close()
+    assert store.compactions == 1
+    assert reload(tmp_path)["attention"] == 4.0
+    assert (tmp_path / "state.journal").stat().st_size == 0
+
+
+def test_a_torn_journal_tail_is_ignored(tmp_path):
+    state = {"attention": 10.0}
+    store = make_store(tmp_path, state)
+    store.close()
+    with open(tmp_path / "state.journal", "ab") as f:
+        f.write(b"\x00\x01\x02")
+    assert reload(tmp_path)["attention"] == 10.0
+    assert (tmp_path / "state.journal").stat().st_size % 13 == 0
@@ -0,0 +1,77 @@
+from presence import FakePresenceProvider, PresenceProvider, PresenceService, SysfsBatteryProvider
+from scheduler import Scheduler, VirtualClock
+
+
+class BrokenProvider(PresenceProvider):
+    def read(self):
+        raise OSError("no session")
+
+
+def make_service(*providers):
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    service = PresenceService(providers, scheduler)
+    changes = []
+    service.subscribe(lambda present, on_battery: changes.append((present, on_battery)))
+    return service, scheduler, clock, changes
+
+
+def test_first_provider_wins_and_broken_ones_are_skipped():
+    first = FakePresenceProvider(idle_seconds=10.0)
+    del first.facts["on_battery"]
+    second = FakePresenceProvider(idle_seconds=500.0, on_battery=True)
+    service, _, _, _ = make_service(BrokenProvider(), first, second)
+    assert service.read() == {"idle_seconds": 10.0, "locked": False, "on_battery": True}
+
+
+def test_next_poll_is_when_they_could_first_be_away():
+    provider = FakePresenceProvider(idle_seconds=280.0)
+    service, scheduler, clock, changes = make_service(provider)
+    service.start()
+    assert service.poll_timer.remaining() == PresenceService.AWAY_AFTER - 280.0
+    provider.set(idle_seconds=0.0)
+    scheduler.run_until(20.0)
+    assert service.polls == 2
+    assert service.poll_timer.remaining() == PresenceService.PRESENT_POLL
+    assert changes == []
+
+
+def test_leaving_and_coming_back():
+    provider = FakePresenceProvider()
+    service, scheduler, clock, changes = make_service(provider)
+    service.start()
+    provider.set(idle_seconds=PresenceService.AWAY_AFTER)
+    scheduler.run_until(60.0)
+    assert changes == [(False, False)]
+    # Away: polled often to catch them coming back
+    polls = service.polls
+    scheduler.run_until(60.0 + 10 * PresenceService.AWAY_POLL)
+    assert service.polls - polls == 10
+    provider.set(idle_seconds=0.0)
+    scheduler.run_until(scheduler.clock() + PresenceService.AWAY_POLL)
+    assert changes == [(False, False), (True, False)]
+
+
+def test_lock_and_battery_are_reported():
+    provider = FakePresenceProvider()
+    service, scheduler, clock, changes = make_service(provider)
+    service.start()
+    provider.set(on_battery=True)
+    scheduler.run_until(60.0)
+    provider.set(locked=True)
+    scheduler.run_until(120.0)
+    assert changes == [(True, True), (False, True)]
+
+
+def test_sysfs_battery(tmp_path):
+    def supply(name, **files):
+        (tmp_path / name).mkdir()
+        for key, value in files.items():
+            (tmp_path / name / key).write_text(value + "\n")
+
+    supply("AC", type="Mains", online="0")
+    supply("BAT0", type="Battery", status="Discharging")
+    provider = SysfsBatteryProvider(str(tmp_path))
+    assert provider.read() == {"on_battery": True}
+    (tmp_path / "AC" / "online").write_text("1\n")
+    assert provider.read() == {"on_battery": False}
@@ -0,0 +1,56 @@
+import random
+
+from brain import NekoBrain, NekoView
+from dialogue import DialogueEngine
+from recording import END, END_FULL, END_STOPPED, FOCUS, LINE, PRESS, START, SessionRecorder, read_trace
+from scheduler import Scheduler, VirtualClock
+from window_source import FakeWindowSource
+
+
+def make_recorded_brain(path, limit=None):
+    clock = VirtualClock()
+    recorder = SessionRecorder(str(path), limit=limit)
+    recorder.start(clock)
+    scheduler = Scheduler(clock=clock, slack=NekoBrain.SLACK_AWAKE)
+    scheduler.recorder = recorder
+    source = FakeWindowSource()
+    engine = DialogueEngine()
+    engine.load_pack("test", {"lines": {"greeting": ["hello"], "pet_more": ["more"]}})
+    brain = NekoBrain(view=NekoView(), scheduler=scheduler, window_source=source, rng=random.Random(1),
+                      dialogue=engine, recorder=recorder)
+    source.subscribe(brain.focus_changed)
+    brain.start()
+    return brain, scheduler, source, recorder
+
+
+def test_a_session_reads_back(tmp_path):
+    path = tmp_path / "session.nktr"
+    brain, scheduler, source, recorder = make_recorded_brain(path)
+    source.focus(0x1234, app="code.exe")
+    scheduler.run_until(6.0)
+    source.focus(0x5678, app="code.exe")
+    brain.pressed()
+    recorder.close()
+
+    trace = read_trace(str(path))
+    assert trace.end == END_STOPPED
+    kinds = [kind for _, kind, _, _ in trace.records]
+    assert kinds[0] == START
+    assert kinds[-1] == END
+    # Windows and apps are numbered, never written
+    focus = [payload for _, kind, _, payload in trace.records if kind == FOCUS]
+    assert focus == [(1, 1), (2, 1)]
+    assert PRESS in kinds
+    lines = [trace.texts[payload[0]] for _, kind, _, payload in trace.records if kind == LINE]
+    assert lines == ["hello", "more"]
+
+
+def test_recording_stops_when_full(tmp_path):
+    path = tmp_path / "session.nktr"
+    brain, scheduler, source, recorder = make_recorded_brain(path, limit=512)
+    for window in range(1, 200):
+        source.focus(window)
+    assert recorder.full and not recorder.recording
+    assert recorder.size <= 512
+    recorder.close()
+    assert read_trace(str(path)).end == END_FULL
@@ -0,0 +1,92 @@
+from scheduler import Scheduler, VirtualClock
+
+
+def make_scheduler(slack=0.05):
+    clock = VirtualClock()
+    return Scheduler(clock=clock, slack=slack), clock
+
+
+def test_deadlines_within_slack_share_a_wakeup():
+    scheduler, clock = make_scheduler(slack=0.05)
+    ran = []
+    scheduler.call_at(1.0, lambda: ran.append(("a", clock())))
+    scheduler.call_at(1.03, lambda: ran.append(("b", clock())))
+    scheduler.call_at(2.0, lambda: ran.append(("c", clock())))
+    scheduler.run_until(3.0)
+    assert ran == [("a", 1.0), ("b", 1.0), ("c", 2.0)]
+    assert scheduler.wakeup_count == 2
+
+
+def test_wakeups_are_at_least_slack_apart():
+    scheduler, clock = make_scheduler(slack=1.0)
+    ran = []
+    scheduler.call_at(1.0, lambda: ran.append(clock()))
+    scheduler.call_at(2.5, lambda: ran.append(clock()))
+    scheduler.call_at(2.6, lambda: ran.append(clock()))
+    scheduler.run_until(5.0)
+    assert ran == [1.0, 2.5, 2.5]
+    assert scheduler.wakeup_count == 2
+
+
+def test_tightest_slack_owner_wins():
+    scheduler, _ = make_scheduler(slack=0.05)
+    scheduler.set_slack(3.0, owner="sleeping")
+    scheduler.set_slack(1.0, owner="hidden")
+    assert scheduler.slack == 1.0
+    scheduler.set_slack(5.0, owner="hidden")
+    assert scheduler.slack == 3.0
+
+
+def test_stopped_and_restarted_timers_do_not_wake():
+    scheduler, _ = make_scheduler()
+    fired = []
+    timer = scheduler.timer(lambda: fired.append(1), single_shot=True)
+    for _ in range(200):
+        timer.start(1000)
+    timer.stop()
+    scheduler.run_until(10.0)
+    assert fired == []
+    assert scheduler.wakeup_count == 0
+    # Restarts compact the dead entries away instead of piling them up
+    assert len(scheduler._heap) <= Scheduler.COMPACT_MIN + 1
+
+
+def test_repeating_timer_keeps_its_interval():
+    scheduler, clock = make_scheduler()
+    fired = []
+    timer = scheduler.timer(lambda: fired.append(clock()))
+    timer.start(2000)
+    scheduler.run_until(7.0)
+    assert fired == [2.0, 4.0, 6.0]
+    assert timer.is_active()
+    assert timer.remaining() == 1.0
+
+
+def test_jobs_scheduled_by_jobs_wait_for_their_own_wakeup():
+    scheduler, clock = make_scheduler(slack=0.05)
+    ran = []
+
+    def reschedule():
+        ran.append(clock())
+        if len(ran) < 3:
+            scheduler.call_later(0.01, reschedule)
+
+    scheduler.call_at(1.0, reschedule)
+    scheduler.run_due()  # nothing due yet
+    scheduler.run_until(2.0)
+    assert len(ran) == 3
+    assert scheduler.wakeup_count == 4
+
+
+def test_bind_arms_the_os_timer_for_the_next_wakeup():
+    scheduler, clock = make_scheduler(slack=0.0)
+    armed = []
+    scheduler.bind(armed.append)
+    entry = scheduler.call_at(5.0, lambda: None)
+    later = scheduler.call_at(8.0, lambda: None)
+    assert armed[-1] == 5.0
+    scheduler.cancel(entry)
+    assert armed[-1] == 8.0
+    clock.advance_to(2.0)
+    scheduler.cancel(later)
+    assert armed[-1] is None
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from sprites import SpriteStore
+
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+@pytest.fixture
+def store(qapp, tmp_path):
+    assets = tmp_path / "assets"
+    shutil.copytree(ASSETS, assets)
+    return SpriteStore(str(assets), cache_dir=str(tmp_path / "cache"))
+
+
+def reload(store, look):
+    digest, images = store.prepare(look, store.loaded_dprs(look))
+    return store.install(look, digest, images)
+
+
+def test_a_half_written_png_keeps_the_old_sprite(store):
+    before = store.get("idle", 1.0)
+    assert not before.isNull()
+    with open(store.source_path("idle"), "r+b") as f:
+        f.truncate(100)
+    assert not reload(store, "idle")
+    assert store.get("idle", 1.0) is before
+
+
+def test_a_deleted_png_without_a_bundle_keeps_the_old_sprite(store):
+    before = store.get("idle", 1.0)
+    os.remove(store.source_path("idle"))
+    assert not reload(store, "idle")
+    assert store.get("idle", 1.0) is before
+
+
+def test_a_broken_png_at_a_new_pixel_ratio_borrows_another(store):
+    store.get("idle", 1.0)
+    with open(store.source_path("idle"), "wb") as f:
+        f.write(b"not a png")
+    assert not store.get("idle", 2.0).isNull()
+
+
+def test_a_new_png_replaces_the_sprite(store):
+    before = store.get("idle", 1.0)
+    shutil.copyfile(store.source_path("happy"), store.source_path("idle"))
+    assert reload(store, "idle")
+    after = store.get("idle", 1.0)
+    assert after is not before and not after.isNull()
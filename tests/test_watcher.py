@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from scheduler import Scheduler, VirtualClock
+
+
+@pytest.fixture
+def watched(qapp, tmp_path):
+    from watcher import FileWatcher
+
+    (tmp_path / "core.json").write_text("{}")
+    (tmp_path / "notes.txt").write_text("")
+    batches = []
+    watcher = FileWatcher(str(tmp_path), Scheduler(clock=VirtualClock(), slack=0.0), batches.append,
+                          suffixes=(".json",))
+    yield watcher, tmp_path, batches
+    watcher.close()
+
+
+def test_a_settled_batch_lists_what_changed(watched):
+    watcher, directory, batches = watched
+    (directory / "core.json").write_text('{"lines": {}}')
+    (directory / "extra.json").write_text("{}")
+    (directory / "notes.txt").write_text("ignored")
+    watcher.settle()
+    assert batches == [[str(directory / "core.json"), str(directory / "extra.json")]]
+    os.remove(directory / "extra.json")
+    watcher.settle()
+    assert batches[-1] == [str(directory / "extra.json")]
+    # Nothing new: no batch
+    watcher.settle()
+    assert watcher.batches == 2
+
+
+def test_files_replaced_by_a_rename_stay_watched(watched):
+    watcher, directory, batches = watched
+    (directory / "core.json.tmp").write_text('{"lines": {}}')
+    os.replace(directory / "core.json.tmp", directory / "core.json")
+    watcher.settle()
+    assert batches == [[str(directory / "core.json")]]
+    assert str(directory / "core.json") in watcher.watcher.files()
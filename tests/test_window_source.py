@@ -0,0 +1,150 @@
+import random
+
+from brain import NekoBrain, NekoView
+from dialogue import DialogueEngine
+from scheduler import Scheduler, VirtualClock
+from window_source import AdaptivePollingSource, WindowAppCache
+
+
+class Desktop:
+    # Stands in for the OS: which window is in front, and how often asked
+    def __init__(self):
+        self.window = 1
+        self.polls = 0
+
+    def get_foreground(self):
+        self.polls += 1
+        return self.window
+
+
+def make_pets(count=2):
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=NekoBrain.SLACK_AWAKE)
+    desktop = Desktop()
+    source = AdaptivePollingSource(desktop.get_foreground, scheduler)
+    engine = DialogueEngine()
+    brains = [NekoBrain(view=NekoView(), scheduler=scheduler, window_source=source, rng=random.Random(i),
+                        dialogue=engine) for i in range(count)]
+    source.start()
+    return brains, scheduler, source, desktop
+
+
+def test_polling_backs_off_while_nothing_changes():
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    desktop = Desktop()
+    source = AdaptivePollingSource(desktop.get_foreground, scheduler)
+    source.start()
+    scheduler.run_until(30.0)
+    assert source.interval == AdaptivePollingSource.AWAKE_INTERVAL
+    polls = desktop.polls
+    scheduler.run_until(40.0)
+    assert desktop.polls - polls == 10
+
+
+def test_a_switch_brings_fast_polling_back():
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    desktop = Desktop()
+    source = AdaptivePollingSource(desktop.get_foreground, scheduler)
+    seen = []
+    source.subscribe(seen.append)
+    source.start()
+    scheduler.run_until(30.0)
+    desktop.window = 2
+    scheduler.run_until(31.0)
+    assert seen == [1, 2]
+    assert source.interval < AdaptivePollingSource.AWAKE_INTERVAL
+
+
+def test_power_saving_polls_less():
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    desktop = Desktop()
+    source = AdaptivePollingSource(desktop.get_foreground, scheduler)
+    source.set_power_saving(True)
+    source.start()
+    scheduler.run_until(60.0)
+    expected = AdaptivePollingSource.AWAKE_INTERVAL * AdaptivePollingSource.POWER_SAVING_FACTOR
+    assert source.interval == expected
+
+
+def test_a_failing_poll_keeps_the_current_window():
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=0.0)
+    desktop = Desktop()
+    source = AdaptivePollingSource(desktop.get_foreground, scheduler)
+    source.start()
+
+    def broken():
+        raise OSError("no desktop")
+
+    source.get_foreground = broken
+    scheduler.run_until(5.0)
+    assert source.current_window == 1
+    assert source.poll_timer.is_active()
+
+
+def test_app_cache_looks_each_window_up_once():
+    lookups = []
+
+    def lookup(window):
+        lookups.append(window)
+        if window == 3:
+            raise OSError("gone")
+        return f"app{window}"
+
+    cache = WindowAppCache(lookup, max_entries=2)
+    assert cache.get(1) == "app1"
+    assert cache.get(1) == "app1"
+    assert cache.get(3) is None
+    assert cache.get(3) is None
+    assert lookups == [1, 3]
+    assert (cache.hits, cache.misses) == (2, 2)
+    cache.get(2)
+    assert len(cache) == 2
+    cache.get(1)  # the oldest, dropped for 2
+    assert lookups == [1, 3, 2, 1]
+
+
+def test_polling_stops_only_when_every_pet_is_away_and_resumes_once():
+    (first, second), scheduler, source, desktop = make_pets()
+    first.set_present(False)
+    assert not source.suspended and source.poll_timer.is_active()
+    second.set_present(False)
+    assert source.suspended and not source.poll_timer.is_active()
+    polls = desktop.polls
+    scheduler.run_until(600.0)
+    assert desktop.polls == polls
+
+    first.set_present(True)
+    assert desktop.polls == polls + 1
+    assert source.poll_timer.is_active()
+    second.set_present(True)
+    # Already polling; the second pet coming back doesn't poll again
+    assert desktop.polls == polls + 1
+    scheduler.run_until(620.0)
+    assert desktop.polls > polls + 1
+
+
+def test_resume_after_an_idle_suspend_does_not_start_polling():
+    (first, second), scheduler, source, desktop = make_pets()
+    source.stop()
+    first.set_present(False)
+    second.set_present(False)
+    first.set_present(True)
+    assert not source.poll_timer.is_active()
+    assert desktop.polls == 1
+
+
+def test_source_only_slows_down_when_every_pet_sleeps():
+    (first, second), scheduler, source, desktop = make_pets()
+    first.go_to_sleep()
+    assert not source.sleeping
+    assert source.max_interval() == AdaptivePollingSource.AWAKE_INTERVAL
+    second.go_to_sleep()
+    assert source.sleeping
+    assert source.max_interval() == AdaptivePollingSource.SLEEPING_INTERVAL
+    first.wake_up()
+    assert not source.sleeping
+    assert source.interval == AdaptivePollingSource.FAST_INTERVAL
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from metrics import MetricsRegistry
+from scheduler import Scheduler, VirtualClock
+
+
+@pytest.fixture
+def pool(qapp):
+    from workers import WorkerPool
+
+    scheduler = Scheduler(clock=VirtualClock(), slack=0.0)
+    pool = WorkerPool(scheduler, registry=MetricsRegistry())
+    yield pool
+    pool.shutdown()
+
+
+def wait_for(condition, timeout=5.0):
+    from PySide6.QtCore import QCoreApplication
+
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+    return condition()
+
+
+def test_results_come_back_on_the_gui_thread(pool):
+    results = []
+    pool.submit(lambda x: x * 2, 21, name="double",
+                on_done=lambda result: results.append((result, threading.get_ident())))
+    assert wait_for(lambda: results)
+    assert results == [(42, threading.get_ident())]
+    assert pool.registry.histograms["worker:double"].count == 1
+
+
+def test_errors_go_to_on_error(pool):
+    errors = []
+
+    def fail():
+        raise OSError("denied")
+
+    pool.submit(fail, on_done=lambda result: errors.append("done"), on_error=errors.append)
+    assert wait_for(lambda: errors)
+    assert isinstance(errors[0], OSError)
+
+
+def test_a_newer_job_with_the_same_key_supersedes_the_old_one(pool):
+    release = threading.Event()
+    results = []
+    stale = pool.submit(release.wait, key="front", on_done=lambda result: results.append("stale"))
+    pool.submit(lambda: "fresh", key="front", on_done=results.append)
+    assert stale.cancelled and pool.cancelled == 1
+    release.set()
+    assert wait_for(lambda: results)
+    wait_for(lambda: stale.future.done())
+    wait_for(lambda: False, timeout=0.05)
+    assert results == ["fresh"]
+
+
+def test_a_hung_call_times_out_and_its_late_answer_is_dropped(pool):
+    release = threading.Event()
+    results = []
+    job = pool.submit(release.wait, timeout=2.0, on_done=results.append, on_error=results.append)
+    pool.scheduler.run_until(2.0)
+    assert job.timed_out and pool.timeouts == 1
+    assert isinstance(results[0], TimeoutError)
+    release.set()
+    wait_for(lambda: job.future.done())
+    wait_for(lambda: False, timeout=0.05)
+    assert len(results) == 1
@@ -0,0 +1,350 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brain import NekoBrain
+from attention import LOW_MAX, MEDIUM_MAX, METER_MAX, GIVE_UP_AFTER
+
+
+# Batch tuning: simulates every (parameter set, user trace) pair at once as
+# rows of NumPy arrays, stepping all of them together in fixed dt steps.
+# It follows the rules in brain.py closely but not exactly (several window
+# switches inside one step are handled together), so use it to compare
+# parameter sets, and tools/simulate.py to check a single pick in detail.
+#
+#   python tools/batch_sim.py --traces 500 --grid attention_base=1.5,2,2.5 --grid pet_drop=20,25,30
+
+IDLE, TALKING, SLEEPING, PEEKING = 0, 1, 2, 3
+LOW, MEDIUM, HIGH = 0, 1, 2
+
+BUBBLE_SECONDS = 4.0
+PEEK_SECONDS = 3.0
+GIVE_UP_NAP_SECONDS = 4.0
+
+DEFAULT_PARAMS = {
+    "attention_base": NekoBrain.ATTENTION_BASE,
+    "attention_busy": NekoBrain.ATTENTION_BUSY,
+    "attention_idle": NekoBrain.ATTENTION_IDLE,
+    "attention_asleep": NekoBrain.ATTENTION_ASLEEP,
+    "pet_drop": NekoBrain.PET_DROP,
+    "give_up_after": GIVE_UP_AFTER,
+    "dialogue_low_min": NekoBrain.DIALOGUE_INTERVALS["LOW"][0] / 1000.0,
+    "dialogue_low_max": NekoBrain.DIALOGUE_INTERVALS["LOW"][1] / 1000.0,
+    "dialogue_medium_min": NekoBrain.DIALOGUE_INTERVALS["MEDIUM"][0] / 1000.0,
+    "dialogue_medium_max": NekoBrain.DIALOGUE_INTERVALS["MEDIUM"][1] / 1000.0,
+    "dialogue_high_min": NekoBrain.DIALOGUE_INTERVALS["HIGH"][0] / 1000.0,
+    "dialogue_high_max": NekoBrain.DIALOGUE_INTERVALS["HIGH"][1] / 1000.0,
+    "sleep_low": NekoBrain.SLEEP_DELAYS["LOW"] / 1000.0,
+    "sleep_medium": NekoBrain.SLEEP_DELAYS["MEDIUM"] / 1000.0,
+    "sleep_high": NekoBrain.SLEEP_DELAYS["HIGH"] / 1000.0,
+}
+
+
+class Traces:
+    # Synthetic user activity for many users at once, as (steps, traces)
+    # arrays of per-step event counts. Same knobs as SyntheticUser in
+    # tools/simulate.py.
+    def __init__(self, rng, count, hours, dt, start_hour=9.0, work_hours=9.0,
+                 switch_every=45.0, burst_every=900.0, pet_every=1200.0, hover_every=600.0):
+        steps = int(hours * 3600.0 / dt)
+        clock = start_hour * 3600.0 + np.arange(steps) * dt
+        working = ((clock % 86400.0) < (start_hour + work_hours) * 3600.0) & ((clock % 86400.0) >= start_hour * 3600.0)
+        working = working[:, None]
+
+        self.count = count
+        self.steps = steps
+        self.dt = dt
+        self.switches = rng.poisson(dt / switch_every, (steps, count)).astype(np.int16) * working
+
+        # A burst is six quick switches a couple of seconds apart
+        bursts = (rng.random((steps, count)) < dt / burst_every) & working
+        per_step = max(1, int(round(2.0 / dt)))
+        for i in range(6):
+            shift = i // per_step
+            if shift < steps:
+                self.switches[shift:] += bursts[:steps - shift]
+
+        self.pets = (rng.random((steps, count)) < dt / pet_every) & working
+        self.hovers = (rng.random((steps, count)) < dt / hover_every) & working
+
+
+def expand_grid(grid):
+    # {"pet_drop": [20, 25]} -> one full parameter dict per combination
+    names = list(grid)
+    sets = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(DEFAULT_PARAMS)
+        params.update(zip(names, values))
+        sets.append(params)
+    return sets
+
+
+def run_batch(param_sets, traces, rng):
+    P = len(param_sets)
+    T = traces.count
+    N = P * T
+    dt = traces.dt
+
+    # One row per (parameter set, trace) pair
+    p = {name: np.repeat(np.array([ps[name] for ps in param_sets], dtype=float), T) for name in DEFAULT_PARAMS}
+    trace_of = np.tile(np.arange(T), P)
+
+    state = np.full(N, IDLE, dtype=np.int8)
+    meter = np.zeros(N)
+    giving_up = np.zeros(N, dtype=bool)
+    high_time = np.zeros(N)
+    # Decayed switch count (attention.SwitchRate), decayed once per step
+    switch_rate = np.zeros(N)
+    curious_armed = np.ones(N, dtype=bool)
+    switch_decay = np.exp(-dt / NekoBrain.SWITCH_TAU)
+
+    never = np.inf
+    sleep_at = np.full(N, never)
+    dialogue_at = np.full(N, never)
+    bubble_at = np.full(N, never)
+    peek_at = np.full(N, never)
+    nap_at = np.full(N, never)
+
+    lines = np.zeros(N, dtype=np.int32)
+    sleeps = np.zeros(N, dtype=np.int32)
+    give_ups = np.zeros(N, dtype=np.int32)
+    high_seconds = np.zeros(N)
+
+    # Per-level settings as (3, N) tables, indexed by [level, row]
+    sleep_delay = np.stack([p["sleep_low"], p["sleep_medium"], p["sleep_high"]])
+    dialogue_min = np.stack([p["dialogue_low_min"], p["dialogue_medium_min"], p["dialogue_high_min"]])
+    dialogue_max = np.stack([p["dialogue_low_max"], p["dialogue_medium_max"], p["dialogue_high_max"]])
+
+    t = 0.0
+
+    # The helpers below take boolean masks but work on the (usually few)
+    # selected rows only
+    def level(rows=slice(None)):
+        m = meter[rows]
+        return (m > LOW_MAX).astype(np.intp) + (m > MEDIUM_MAX)
+
+    def reset_sleep(mask):
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        sleep_at[rows] = t + sleep_delay[level(rows), rows]
+        wake(mask & (state >= SLEEPING))
+
+    def say(mask):
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        lines[rows] += 1
+        state[rows] = TALKING
+        bubble_at[rows] = t + BUBBLE_SECONDS
+        reset_sleep(mask)
+
+    def wake(mask):
+        if not mask.any():
+            return
+        state[mask] = IDLE
+        say(mask)
+
+    def go_to_sleep(mask):
+        sleeps[mask] += 1
+        state[mask] = SLEEPING
+        bubble_at[mask] = never
+
+    def schedule_dialogue(mask):
+        rows = np.flatnonzero(mask)
+        lvl = level(rows)
+        dialogue_at[rows] = t + rng.uniform(dialogue_min[lvl, rows], dialogue_max[lvl, rows])
+
+    everyone = np.ones(N, dtype=bool)
+    schedule_dialogue(everyone)
+    reset_sleep(everyone)
+    greeted = False
+
+    for step in range(traces.steps):
+        t = (step + 1) * dt
+
+        if not greeted and t >= 5.0:
+            say(everyone)
+            greeted = True
+
+        # --- User input ---
+        pressed = traces.pets[step][trace_of]
+        if pressed.any():
+            asleep = pressed & (state == SLEEPING)
+            giving_up[asleep] = False
+            reset_sleep(asleep)
+
+            petted = pressed & ~asleep
+            giving_up[petted] = False
+            high_time[petted] = 0.0
+            meter[petted] = np.maximum(0.0, meter[petted] - p["pet_drop"][petted])
+            say(petted)
+
+        hovered = traces.hovers[step][trace_of]
+        if hovered.any():
+            reset_sleep(hovered)
+
+        switches = traces.switches[step][trace_of]
+        switched = switches > 0
+        if switched.any():
+            awake = switched & (state <= TALKING)
+            dozing = switched & (state >= SLEEPING)
+
+            curious_armed[awake & (switch_rate < NekoBrain.SWITCH_REARM)] = True
+            switch_rate[switched] += switches[switched]
+
+            reset_sleep(awake)
+            agitated = awake & (switch_rate >= NekoBrain.SWITCH_AGITATED)
+            say(agitated)
+            switch_rate[agitated] = 0.0
+            curious_armed[agitated] = True
+            curious = awake & ~agitated & curious_armed & (switch_rate >= NekoBrain.SWITCH_CURIOUS)
+            say(curious)
+            curious_armed[curious] = False
+
+            woken = dozing & (switch_rate >= NekoBrain.SWITCH_WAKE)
+            wake(woken)
+            say(woken)
+            switch_rate[woken] = 0.0
+            peeking = dozing & ~woken & (state == SLEEPING)
+            state[peeking] = PEEKING
+            peek_at[peeking] = t + PEEK_SECONDS
+
+        # --- Timers ---
+        due = bubble_at <= t
+        if due.any():
+            bubble_at[due] = never
+            state[due & (state == TALKING)] = IDLE
+
+        due = peek_at <= t
+        if due.any():
+            peek_at[due] = never
+            go_to_sleep(due & (state == PEEKING))
+
+        due = (sleep_at <= t) | (nap_at <= t)
+        if due.any():
+            sleep_at[sleep_at <= t] = never
+            nap_at[nap_at <= t] = never
+            go_to_sleep(due)
+
+        due = dialogue_at <= t
+        if due.any():
+            asleep = due & (state == SLEEPING)
+            stays_asleep = asleep & (level() == LOW) & (rng.random(N) < 0.8)
+            talking = due & ~stays_asleep
+            wake(talking & asleep)
+            say(talking)
+            schedule_dialogue(due)
+
+        # --- Attention ---
+        awake = state <= TALKING
+        rate = p["attention_base"] + np.where(
+            awake,
+            np.where(switch_rate >= NekoBrain.SWITCH_BUSY, p["attention_busy"], p["attention_idle"]),
+            np.where(state == SLEEPING, p["attention_asleep"], 0.0),
+        )
+        meter = np.where(giving_up, meter, np.minimum(METER_MAX, meter + rate / 10.0 * dt))
+        switch_rate *= switch_decay
+
+        at_high = level() == HIGH
+        high_seconds[at_high] += dt
+        high_time = np.where(at_high & ~giving_up, high_time + dt, 0.0)
+
+        gave_up = high_time >= p["give_up_after"]
+        if gave_up.any():
+            give_ups[gave_up] += 1
+            giving_up[gave_up] = True
+            meter[gave_up] = 10.0
+            high_time[gave_up] = 0.0
+            sad = gave_up & (state <= TALKING)
+            say(sad)
+            nap_at[sad] = t + GIVE_UP_NAP_SECONDS
+
+    hours = traces.steps * dt / 3600.0
+    return {
+        "lines_per_hour": (lines / hours).reshape(P, T),
+        "high_share": (high_seconds / (hours * 3600.0)).reshape(P, T),
+        "give_ups": give_ups.reshape(P, T),
+        "sleeps_per_hour": (sleeps / hours).reshape(P, T),
+    }
+
+
+def summarize(param_sets, grid, results):
+    rows = []
+    for i, params in enumerate(param_sets):
+        lines = results["lines_per_hour"][i]
+        high = results["high_share"][i]
+        gave_up = results["give_ups"][i]
+        sleeps = results["sleeps_per_hour"][i]
+        rows.append({
+            "params": {name: params[name] for name in grid},
+            "lines_per_hour": {
+                "mean": float(lines.mean()),
+                "p10": float(np.percentile(lines, 10)),
+                "p50": float(np.percentile(lines, 50)),
+                "p90": float(np.percentile(lines, 90)),
+            },
+            "high_share": {
+                "mean": float(high.mean()),
+                "p90": float(np.percentile(high, 90)),
+            },
+            "give_ups_mean": float(gave_up.mean()),
+            "gave_up_at_least_once": float((gave_up > 0).mean()),
+            "sleeps_per_hour_mean": float(sleeps.mean()),
+        })
+    return rows
+
+
+def parse_grid(items):
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if name not in DEFAULT_PARAMS:
+            raise SystemExit(f"unknown parameter {name!r}; choose from: {', '.join(DEFAULT_PARAMS)}")
+        grid[name] = [float(v) for v in values.split(",")]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Neko's behavior parameters over many synthetic users")
+    parser.add_argument("--traces", type=int, default=200, help="synthetic users per parameter set")
+    parser.add_argument("--hours", type=float, default=8.0)
+    parser.add_argument("--dt", type=float, default=2.0, help="step size in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...")
+    parser.add_argument("--json", action="store_true", help="print the raw summary as JSON")
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid)
+    param_sets = expand_grid(grid)
+    rng = np.random.default_rng(args.seed)
+
+    started = time.perf_counter()
+    traces = Traces(rng, args.traces, args.hours, args.dt)
+    results = run_batch(param_sets, traces, rng)
+    rows = summarize(param_sets, grid, results)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({"seconds": elapsed, "results": rows}, indent=2))
+        return
+
+    print(f"{len(param_sets)} parameter sets x {args.traces} users x {args.hours:g} h in {elapsed:.2f} s")
+    print(f"{'params':<40} {'lines/h p50 (p90)':>18} {'HIGH %':>7} {'gave up':>8} {'sleeps/h':>9}")
+    for row in rows:
+        label = ", ".join(f"{k}={v:g}" for k, v in row["params"].items()) or "defaults"
+        lines = row["lines_per_hour"]
+        print(f"{label:<40} {lines['p50']:>9.1f} ({lines['p90']:>5.1f}) "
+              f"{row['high_share']['mean'] * 100:>7.1f} {row['gave_up_at_least_once'] * 100:>7.0f}% "
+              f"{row['sleeps_per_hour_mean']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# Numbers behind "uses minimal CPU and memory". Runs offscreen in fresh
+# processes (own XDG dirs, no DISPLAY) and measures:
+#
+#   startup.*       cold import, QApplication, NekoApp + first NekoWidget,
+#                   load_assets and time to first paint
+#   latency.*       say / hide_bubble, p50 and p99
+#   throughput.*    pet_reaction, wake_up and go_to_sleep calls per second
+#   repaints.*      paint events each transition causes
+#   wakeups.*       scheduler wakeups per hour spent in each NekoState, over
+#                   a simulated day (tools/simulate.py's synthetic user)
+#                   under a virtual clock
+#
+# Every number is the median over --runs processes.
+#
+#   python tools/bench.py                          # table
+#   python tools/bench.py --json > baseline.json   # save a baseline
+#   python tools/bench.py --baseline baseline.json # fail on regressions
+#
+# With --baseline, anything more than --tolerance worse than the baseline
+# fails the run (exit status 1).
+
+LATENCY_CALLS = 2000
+THROUGHPUT_CALLS = 2000
+REPAINT_RUNS = 20
+SIM_STEP = 1.0  # simulated seconds between state samples
+
+
+def metric(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def child_startup():
+    started = time.perf_counter()
+    from PySide6.QtWidgets import QApplication
+    import main
+    from metrics import REGISTRY
+    imported = time.perf_counter()
+
+    app = QApplication([])
+    QApplication.setQuitOnLastWindowClosed(False)
+    qt = time.perf_counter()
+    neko_app = main.NekoApp()
+    constructed = time.perf_counter()
+
+    deadline = constructed + 10.0
+    while not any(name == "first paint" for name, _ in neko_app.startup.phases):
+        if time.perf_counter() > deadline:
+            break
+        app.processEvents()
+    painted = time.perf_counter()
+
+    return {
+        "startup.import_ms": (imported - started) * 1000,
+        "startup.qapp_ms": (qt - imported) * 1000,
+        "startup.construct_ms": (constructed - qt) * 1000,
+        "startup.load_assets_ms": REGISTRY.histograms["NekoApp.load_assets"].total * 1000,
+        "startup.first_paint_ms": (painted - started) * 1000,
+    }
+
+
+def timings(fn, calls, prepare=None):
+    samples = []
+    for _ in range(calls):
+        if prepare is not None:
+            prepare()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+
+def child_hot(seed, hours):
+    from PySide6.QtCore import QObject, QEvent
+    from PySide6.QtWidgets import QApplication
+    from scheduler import VirtualClock
+    from brain import NekoState
+    from simulate import SyntheticUser, deliver
+
+    app = QApplication([])
+    QApplication.setQuitOnLastWindowClosed(False)
+    import main
+
+    # The simulation plays the OS timer's part: nothing fires unless
+    # run_until() says so, so animation never adds stray paints
+    clock = VirtualClock()
+    neko_app = main.NekoApp(clock=clock)
+    scheduler = neko_app.scheduler
+    scheduler.bind(lambda delay: None)
+    neko_app.scheduler_timer.stop()
+    pet = neko_app.pets[0]
+    brain = pet.brain
+    brain.random.seed(seed)
+
+    def flush():
+        for _ in range(3):
+            QApplication.sendPostedEvents()
+            app.processEvents()
+
+    class PaintCounter(QObject):
+        count = 0
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                self.count += 1
+            return False
+
+    counter = PaintCounter()
+    for widget in (pet, pet.neko_image, pet.bubble):
+        widget.installEventFilter(counter)
+    flush()
+
+    lines = [brain.choose_line("chatter") for _ in range(8)]
+    line = iter(lines * (LATENCY_CALLS + REPAINT_RUNS * 4))
+    results = {}
+
+    # --- Latency: the bubble cache is warm after the first few lines ---
+    say = timings(lambda: brain.say(next(line)), LATENCY_CALLS, prepare=brain.hide_bubble)
+    hide = timings(brain.hide_bubble, LATENCY_CALLS, prepare=lambda: brain.say(next(line)))
+    for name, samples in (("say", say), ("hide_bubble", hide)):
+        results[f"latency.{name}_p50_us"] = percentile(samples, 50) * 1e6
+        results[f"latency.{name}_p99_us"] = percentile(samples, 99) * 1e6
+    flush()
+
+    # --- Throughput ---
+    asleep = lambda: brain.state == NekoState.SLEEPING or brain.go_to_sleep()
+    awake = lambda: brain.state != NekoState.SLEEPING or brain.wake_up()
+    for name, fn, prepare in (("pet_reaction", brain.pet_reaction, None),
+                              ("wake_up", brain.wake_up, asleep),
+                              ("go_to_sleep", brain.go_to_sleep, awake)):
+        samples = timings(fn, THROUGHPUT_CALLS, prepare=prepare)
+        results[f"throughput.{name}_per_s"] = len(samples) / sum(samples)
+    flush()
+
+    # --- Repaints per transition ---
+    idle = lambda: (awake(), brain.hide_bubble())
+    transitions = (
+        ("say", lambda: brain.say(next(line)), idle),
+        ("hide_bubble", brain.hide_bubble, lambda: (awake(), brain.say(next(line)))),
+        ("pet_reaction", brain.pet_reaction, idle),
+        ("go_to_sleep", brain.go_to_sleep, idle),
+        ("wake_up", brain.wake_up, asleep),
+    )
+    for name, fn, prepare in transitions:
+        paints = 0
+        for _ in range(REPAINT_RUNS):
+            prepare()
+            flush()
+            counter.count = 0
+            fn()
+            flush()
+            paints += counter.count
+        results[f"repaints.{name}"] = paints / REPAINT_RUNS
+
+    # --- Wakeups per hour in each state, over a simulated day ---
+    brain.hide_bubble()
+    awake()
+    start = clock()
+    duration = hours * 3600.0
+    user = SyntheticUser(random.Random(seed))
+    steps = ((i * SIM_STEP, "step", None) for i in range(1, int(duration / SIM_STEP) + 1))
+    seconds = {state.name: 0.0 for state in NekoState}
+    wakeups = {state.name: 0 for state in NekoState}
+    for t, kind, argument in heapq.merge(user.events(duration), steps, key=lambda e: e[0]):
+        state = brain.state.name
+        before, was = scheduler.wakeup_count, clock()
+        scheduler.run_until(start + t)
+        wakeups[state] += scheduler.wakeup_count - before
+        seconds[state] += clock() - was
+        if kind != "step":
+            deliver(brain, kind, argument)
+    for state, spent in seconds.items():
+        # A few stray seconds in a state say nothing about its rate
+        if spent >= 60.0:
+            results[f"wakeups.{state.lower()}_per_hour"] = wakeups[state] * 3600.0 / spent
+    results["wakeups.day_per_hour"] = sum(wakeups.values()) * 3600.0 / duration
+
+    return results
+
+
+UNITS = {
+    "startup": ("ms", "lower"),
+    "latency": ("us", "lower"),
+    "throughput": ("calls/s", "higher"),
+    "repaints": ("paints", "lower"),
+    "wakeups": ("wakeups/h", "lower"),
+}
+
+
+def run_child(*args):
+    # Own data/config dirs so the run neither reads nor writes real state,
+    # and no DISPLAY so no X11 window or idle tracking joins in
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+                   XDG_DATA_HOME=os.path.join(home, "data"),
+                   XDG_CONFIG_HOME=os.path.join(home, "config"),
+                   XDG_CACHE_HOME=os.path.join(home, "cache"),
+                   XDG_RUNTIME_DIR=os.path.join(home, "run"))
+        env.pop("DISPLAY", None)
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", *map(str, args)],
+            env=env, cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def median_of(results):
+    return {name: statistics.median(r[name] for r in results if name in r) for name in results[0]}
+
+
+def run(runs, seed, hours):
+    values = median_of([run_child("startup") for _ in range(runs)])
+    values.update(median_of([run_child("hot", "--seed", seed, "--hours", hours) for _ in range(runs)]))
+    metrics = {}
+    for name, value in values.items():
+        unit, better = UNITS[name.split(".")[0]]
+        metrics[name] = metric(value, unit, better)
+    return {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "runs": runs,
+        "seed": seed,
+        "hours": hours,
+        "metrics": metrics,
+    }
+
+
+def compare(result, baseline, tolerance):
+    # [(name, old, new, change, regressed)]; change is signed so that
+    # positive is always worse
+    rows = []
+    for name, current in result["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if old is None:
+            continue
+        old, new = old["value"], current["value"]
+        if old == new:
+            change = 0.0
+        elif old == 0:
+            change = float("inf") if (new > old) == (current["better"] == "lower") else float("-inf")
+        else:
+            change = (new - old) / abs(old)
+            if current["better"] == "higher":
+                change = -change
+        rows.append((name, old, new, change, change > tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup, hot-path and wakeup benchmarks, offscreen")
+    parser.add_argument("--runs", type=int, default=5, help="processes to take the median of")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hours", type=float, default=24.0, help="simulated hours for the wakeup counts")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON (a baseline)")
+    parser.add_argument("--baseline", help="JSON from an earlier --json run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression, as a fraction")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        if args.child == "startup":
+            print(json.dumps(child_startup()))
+        else:
+            print(json.dumps(child_hot(args.seed, args.hours)))
+        return 0
+
+    result = run(args.runs, args.seed, args.hours)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.baseline is None:
+        print(f"Python {result['python']}, offscreen, median of {args.runs} runs, {args.hours:g} simulated h")
+        for name, m in result["metrics"].items():
+            print(f"  {name:<34} {m['value']:12.1f} {m['unit']}")
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(result, baseline, args.tolerance)
+    regressed = [row for row in rows if row[4]]
+    if not args.json:
+        print(f"{'metric':<34} {'baseline':>12} {'current':>12}   change")
+        for name, old, new, change, bad in rows:
+            print(f"  {name:<32} {old:12.1f} {new:12.1f} {change * 100:+8.1f}%{'  REGRESSED' if bad else ''}")
+        if regressed:
+            print(f"FAIL: {len(regressed)} metric(s) more than {args.tolerance * 100:.0f}% worse than the baseline")
+        else:
+            print("OK: no regressions")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
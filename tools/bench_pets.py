@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# What does each extra pet cost? Runs NekoApp with 1..50 pets in a fresh
+# offscreen process each, lets them live for a while, and compares CPU time
+# and resident memory against running that many single-pet processes.
+#
+#   python tools/bench_pets.py                 # 1, 5, 10, 25, 50 pets
+#   python tools/bench_pets.py --pets 1 50 --seconds 20 --json
+
+
+def child(pets, seconds):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from platform_adapter import process_rss
+
+    app = QApplication([])
+    QApplication.setQuitOnLastWindowClosed(False)
+    import main
+
+    baseline_rss = process_rss()
+    neko_app = main.NekoApp(pets=pets)
+    started_wall = time.perf_counter()
+    started_cpu = time.process_time()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    result = {
+        "pets": pets,
+        "seconds": time.perf_counter() - started_wall,
+        "cpu": time.process_time() - started_cpu,
+        "rss_mb": (process_rss() or 0) / (1024 * 1024),
+        "qt_rss_mb": (baseline_rss or 0) / (1024 * 1024),
+        "wakeups": neko_app.scheduler.wakeup_count,
+    }
+    print(json.dumps(result))
+
+
+def run(pets, seconds):
+    # Own data/config dirs so the run neither reads nor writes real state
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+                   XDG_DATA_HOME=os.path.join(home, "data"),
+                   XDG_CONFIG_HOME=os.path.join(home, "config"),
+                   XDG_CACHE_HOME=os.path.join(home, "cache"))
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(pets), "--seconds", str(seconds)],
+            env=env, cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU and memory per pet, 1 to 50 pets in one process")
+    parser.add_argument("--pets", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.child, args.seconds)
+        return 0
+
+    counts = sorted(set(args.pets) | {1})
+    results = [run(n, args.seconds) for n in counts]
+    single = results[0]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.seconds:g} s per run, offscreen")
+        print("pets   CPU ms  vs N x 1 pet    RSS MB  vs N x 1 pet   wakeups")
+        for r in results:
+            n = r["pets"]
+            cpu_ratio = r["cpu"] / (n * single["cpu"]) if single["cpu"] else 0.0
+            rss_ratio = r["rss_mb"] / (n * single["rss_mb"]) if single["rss_mb"] else 0.0
+            print(f"{n:4d} {r['cpu'] * 1000:8.0f} {cpu_ratio * 100:11.0f}%  {r['rss_mb']:8.1f} "
+                  f"{rss_ratio * 100:11.0f}%  {r['wakeups']:8d}")
+
+    # Sub-linear: N pets together cost less than N single-pet processes
+    largest = results[-1]
+    n = largest["pets"]
+    ok = n == 1 or (largest["cpu"] < n * single["cpu"] and largest["rss_mb"] < n * single["rss_mb"])
+    if not args.json:
+        print("OK: sub-linear" if ok else "FAIL: cost grows linearly or worse")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import timeit
+import statistics
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import Scheduler, VirtualClock
+from profiler import PROFILER, Profiler
+from metrics import MetricsRegistry, timed
+
+
+# How much do --profile and the metrics cost, and what is left when they're off?
+#
+#   python tools/bench_profiler.py
+#
+# With the metrics registry and the profiler both off (a headless run), a
+# @timed handler only checks two flags before calling through. That is
+# what the run gates on: the real decorated handler against the same
+# function undecorated, each the median of several timeit repeats, must
+# not cost more than --max-overhead-ns extra per call. The costs with
+# metrics on (as in the app) and with --profile are reported alongside.
+
+
+def median_ns(stmt, number, repeat=15):
+    return statistics.median(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e9
+
+
+def bench_scheduler(jobs, tracer):
+    # ns per job for a wakeup that runs `jobs` no-op jobs
+    def run():
+        scheduler = Scheduler(clock=VirtualClock(0.0), slack=0.0)
+        scheduler.tracer = tracer
+        for _ in range(jobs):
+            scheduler.call_at(1.0, noop)
+        scheduler.clock.advance_to(1.0)
+        scheduler.run_due()
+
+    started = time.perf_counter()
+    for _ in range(5):
+        run()
+    return (time.perf_counter() - started) / (5 * jobs) * 1e9
+
+
+def noop():
+    pass
+
+
+def plain_timed(registry):
+    # @timed as it would be without the profiler check
+    def decorate(fn):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.observe("noop", time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the profiler's and the metrics' overhead, on and off")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--max-overhead-ns", type=float, default=300.0,
+                        help="fail if a @timed handler with metrics and profiling off costs more than this extra")
+    args = parser.parse_args()
+    n = args.calls
+
+    registry = MetricsRegistry()
+    decorated = timed("noop", registry=registry)(noop)
+    without_check = plain_timed(registry)(noop)
+
+    PROFILER.disable()
+    bare = median_ns(noop, n)
+    off = median_ns(decorated, n)
+
+    registry.enable()
+    metrics_on = median_ns(decorated, n)
+    metrics_only = median_ns(without_check, n)
+    off_sched = bench_scheduler(n // 4, None)
+
+    PROFILER.enable()
+    profiled = median_ns(decorated, n // 4)
+    PROFILER.disable()
+    registry.disable()
+    on_sched = bench_scheduler(n // 4, Profiler(capacity=n))
+
+    wrapped = PROFILER.wrap(noop)
+    overhead = max(0.0, off - bare)
+
+    print("per call")
+    print(f"  undecorated function        {bare:8.0f} ns")
+    print(f"  @timed, everything off      {off:8.0f} ns  (+{overhead:.0f} ns)")
+    print(f"  @timed, metrics on          {metrics_on:8.0f} ns  (recording without the profiler check "
+          f"{metrics_only:.0f} ns)")
+    print(f"  @timed, --profile           {profiled:8.0f} ns")
+    print(f"  scheduler job               {off_sched:8.0f} ns  ({on_sched:.0f} ns traced)")
+    print(f"  wrap() while off returns the function itself: {wrapped is noop}")
+
+    print(f"@timed overhead with metrics and profiling off: {overhead:.1f} ns per call "
+          f"(limit {args.max_overhead_ns:.0f} ns)")
+    if overhead > args.max_overhead_ns or wrapped is not noop:
+        print("FAIL")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
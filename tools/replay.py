@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brain import NekoBrain, NekoState
+from scheduler import Scheduler, VirtualClock
+from dialogue import DialogueEngine, default_dialogue_dir
+from bundle import open_bundle
+from metrics import MetricsRegistry
+from window_source import ForegroundWindowSource
+from recording import (
+    read_trace, dialogue_fingerprint, KIND_NAMES, START, FOCUS, PRESS, DRAG, HOVER, HIDE, SHOW, PRESENT,
+    BATTERY, WAKEUP, STATE, LINE, END, END_STOPPED, END_FULL
+)
+
+
+# Plays a trace recorded with `main.py --record` back through fresh brains
+# under a VirtualClock: the same seeds, the same inputs at the same moments
+# and a wakeup wherever the live scheduler woke up, at 1000x by default (a
+# day in under a minute and a half). Checks that she goes through the same
+# states and says the same lines as she did live, and reports what each
+# kind of event cost to handle.
+#
+#   python tools/replay.py neko-20260101-090000.trace
+#   python tools/replay.py TRACE --speed 0        # as fast as it goes
+#   python tools/replay.py TRACE --dialogue DIR   # packs she had live
+#
+# Exits with status 1 if the replay told a different story.
+
+SLOWEST = 5  # slowest single events to list
+
+
+class ReplaySource(ForegroundWindowSource):
+    # Answers app_for() with whatever the trace says the app was at the time
+    def __init__(self):
+        super().__init__()
+        self.app = None
+
+    def app_for(self, window):
+        return self.app
+
+
+class ReplayLog:
+    # Stands in for the SessionRecorder: writes down what the replayed
+    # brains do, in the trace's terms
+    def __init__(self, clock):
+        self.clock = clock
+        self.pets = {}
+        self.outputs = []  # (t, pet, kind, state value or text)
+
+    def started(self, brain):
+        # Already seeded from the trace
+        pass
+
+    def input(self, brain, kind, *payload):
+        pass
+
+    def state_changed(self, brain, state):
+        self.outputs.append((self.clock(), self.pets[brain], STATE, state.value))
+
+    def said(self, brain, text):
+        self.outputs.append((self.clock(), self.pets[brain], LINE, text))
+
+
+def load_dialogue(directory=None):
+    # The packs as NekoApp loads them: the bundle's, overridden by loose files
+    engine = DialogueEngine()
+    bundle = open_bundle()
+    for name, pack in (bundle.dialogue_packs() if bundle else {}).items():
+        engine.load_pack(name, pack)
+    engine.load_dir(directory or default_dialogue_dir())
+    return engine
+
+
+def deliver(brain, source, kind, payload):
+    if kind == FOCUS:
+        window, app = payload
+        source.app = app or None
+        brain.focus_changed(window)
+    elif kind == PRESS:
+        brain.pressed()
+    elif kind == DRAG:
+        brain.dragged()
+    elif kind == HOVER:
+        brain.hovered()
+    elif kind == HIDE:
+        brain.hide()
+    elif kind == SHOW:
+        brain.show()
+    elif kind == PRESENT:
+        brain.set_present(bool(payload[0]))
+    elif kind == BATTERY:
+        brain.set_on_battery(bool(payload[0]))
+
+
+def replay(trace, engine, speed=1000.0):
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock, slack=NekoBrain.SLACK_AWAKE)
+    source = ReplaySource()
+    log = ReplayLog(clock)
+    costs = MetricsRegistry()
+    slowest = []
+    brains = {}
+    expected = []
+
+    started = time.perf_counter()
+    for index, (t, kind, pet, payload) in enumerate(trace.records):
+        if kind == STATE:
+            expected.append((t, pet, kind, payload[0]))
+            continue
+        if kind == LINE:
+            expected.append((t, pet, kind, trace.texts.get(payload[0])))
+            continue
+        if kind == END:
+            break
+        if kind != START and kind != WAKEUP and pet not in brains:
+            continue
+        if speed:
+            ahead = t / speed - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+        clock.advance_to(t)
+
+        begin = time.perf_counter()
+        if kind == START:
+            seed, attention, giving_up, pets, slept, lines, give_ups = payload
+            brain = NekoBrain(scheduler=scheduler, window_source=source, rng=random.Random(seed),
+                              dialogue=engine, recorder=log)
+            log.pets[brain] = pet
+            brains[pet] = brain
+            brain.restore_state({"attention": attention, "giving_up": float(giving_up), "pets": pets,
+                                 "slept": slept, "lines": lines, "give_ups": give_ups})
+            brain.start()
+        elif kind == WAKEUP:
+            scheduler.run_due()
+        else:
+            deliver(brains[pet], source, kind, payload)
+        elapsed = time.perf_counter() - begin
+
+        costs.observe(KIND_NAMES[kind], elapsed)
+        # Wakeups run every pet's timers, so they belong to none
+        entry = (elapsed, index, t, KIND_NAMES[kind], None if kind == WAKEUP else pet)
+        if len(slowest) < SLOWEST:
+            heapq.heappush(slowest, entry)
+        else:
+            heapq.heappushpop(slowest, entry)
+    real = time.perf_counter() - started
+
+    divergence = None
+    for i in range(max(len(expected), len(log.outputs))):
+        want = expected[i] if i < len(expected) else None
+        got = log.outputs[i] if i < len(log.outputs) else None
+        if want is None and trace.end != END_STOPPED:
+            # Recording stopped part way through handling the last event
+            break
+        if want is None or got is None or want[1:] != got[1:]:
+            divergence = {"index": i, "expected": describe_output(want), "got": describe_output(got)}
+            break
+
+    return {
+        "duration": trace.duration(),
+        "real_seconds": real,
+        "speed": speed,
+        "records": len(trace.records),
+        "pets": len(brains),
+        "outputs": len(expected),
+        "matched": divergence is None,
+        "divergence": divergence,
+        "dialogue_matches": dialogue_fingerprint(engine) == trace.fingerprint,
+        "ended": {None: "cut short", END_FULL: "size limit"}.get(trace.end, "stopped"),
+        "final": [{"pet": pet, "state": brain.state.name, "attention": brain.attention_meter,
+                   "lines": brain.stats_lines_spoken} for pet, brain in sorted(brains.items())],
+        "costs": {name: {"count": h.count, "total_ms": h.total * 1000, "p50_us": h.percentile(50) * 1e6,
+                         "p99_us": h.percentile(99) * 1e6, "max_us": h.max * 1e6}
+                  for name, h in sorted(costs.histograms.items())},
+        "slowest": [{"us": elapsed * 1e6, "at": t, "event": name, "pet": pet}
+                    for elapsed, _, t, name, pet in sorted(slowest, reverse=True)],
+    }
+
+
+def describe_output(output):
+    if output is None:
+        return None
+    t, pet, kind, value = output
+    what = f"state {NekoState(value).name}" if kind == STATE else f"says {value!r}"
+    return f"{clock_time(t)} pet {pet + 1} {what}"
+
+
+def clock_time(seconds):
+    minutes, seconds = divmod(seconds, 60.0)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02d}:{seconds:06.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session under a virtual clock")
+    parser.add_argument("trace", help="a .trace file written by main.py --record")
+    parser.add_argument("--speed", type=float, default=1000.0, help="times real time; 0 for as fast as possible")
+    parser.add_argument("--dialogue", help="dialogue directory to use instead of the one next to the code")
+    parser.add_argument("--json", action="store_true", help="print the raw result as JSON")
+    args = parser.parse_args()
+
+    trace = read_trace(args.trace)
+    result = replay(trace, load_dialogue(args.dialogue), speed=args.speed)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0 if result["matched"] else 1
+
+    speed = f"{args.speed:g}x" if args.speed else "full speed"
+    print(f"Replayed {clock_time(result['duration'])} of {result['pets']} pet(s) in "
+          f"{result['real_seconds']:.2f} s ({speed}), {result['records']} records, trace {result['ended']}")
+    if not result["dialogue_matches"]:
+        print("  warning: these dialogue packs differ from the recorded ones; lines will not match")
+    if result["matched"]:
+        print(f"  same {result['outputs']} state changes and lines as recorded")
+    else:
+        d = result["divergence"]
+        print(f"  DIVERGED at output {d['index']}:")
+        print(f"    recorded: {d['expected'] or 'nothing more'}")
+        print(f"    replayed: {d['got'] or 'nothing more'}")
+    for pet in result["final"]:
+        print(f"  pet {pet['pet'] + 1} ends {pet['state'].lower()}, attention {pet['attention']:.1f}, "
+              f"{pet['lines']} lines")
+    print(f"  {'event':<8} {'count':>7} {'total ms':>9} {'p50':>8} {'p99':>8} {'max':>8}")
+    for name, c in result["costs"].items():
+        print(f"  {name:<8} {c['count']:7d} {c['total_ms']:9.1f} {c['p50_us']:6.0f}µs {c['p99_us']:6.0f}µs "
+              f"{c['max_us']:6.0f}µs")
+    print("  slowest:")
+    for s in result["slowest"]:
+        pet = "" if s["pet"] is None else f" (pet {s['pet'] + 1})"
+        print(f"    {s['us']:8.0f}µs  {s['event']} at {clock_time(s['at'])}{pet}")
+    return 0 if result["matched"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brain import NekoBrain, NekoState
+from scheduler import Scheduler, VirtualClock
+
+
+# Runs NekoBrain against a made-up user under a virtual clock, so a whole day
+# of her behavior takes a fraction of a second instead of a day.
+#
+#   python tools/simulate.py --hours 24 --seed 1
+
+
+class SyntheticUser:
+    # Works during the day with a steady trickle of window switches, the odd
+    # frantic burst, occasional pets and hovers; away outside work hours.
+    def __init__(self, rng, work_start=9.0, work_end=18.0, switch_every=45.0,
+                 burst_every=900.0, pet_every=1200.0, hover_every=600.0):
+        self.rng = rng
+        self.work_start = work_start * 3600.0
+        self.work_end = work_end * 3600.0
+        self.switch_every = switch_every
+        self.burst_every = burst_every
+        self.pet_every = pet_every
+        self.hover_every = hover_every
+
+    def is_working(self, t):
+        return self.work_start <= t % 86400.0 < self.work_end
+
+    def events(self, duration):
+        # Yields (time, kind, argument) in time order
+        streams = [
+            self._poisson(duration, self.switch_every, "focus"),
+            self._poisson(duration, self.burst_every, "burst"),
+            self._poisson(duration, self.pet_every, "press"),
+            self._poisson(duration, self.hover_every, "hover"),
+        ]
+        window = 1
+        for t, kind in heapq.merge(*streams):
+            if kind == "burst":
+                # Six quick switches a second or two apart
+                for _ in range(6):
+                    t += self.rng.uniform(0.5, 2.0)
+                    window += 1
+                    yield t, "focus", window
+            elif kind == "focus":
+                window += 1
+                yield t, "focus", window
+            else:
+                yield t, kind, None
+
+    def _poisson(self, duration, mean_gap, kind):
+        t = 0.0
+        while True:
+            t += self.rng.expovariate(1.0 / mean_gap)
+            if t >= duration:
+                return
+            if self.is_working(t):
+                yield t, kind
+
+
+def deliver(brain, kind, argument):
+    if kind == "focus":
+        brain.focus_changed(argument)
+    elif kind == "press":
+        brain.pressed()
+    elif kind == "hover":
+        brain.hovered()
+    elif kind == "drag":
+        brain.dragged()
+
+
+def simulate(hours=24.0, seed=0, sample_every=10.0, user=None):
+    duration = hours * 3600.0
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock)
+    brain = NekoBrain(scheduler=scheduler, rng=random.Random(rng.random()))
+    user = user or SyntheticUser(random.Random(rng.random()))
+
+    seconds_at_level = {"LOW": 0.0, "MEDIUM": 0.0, "HIGH": 0.0}
+    seconds_in_state = {state.name: 0.0 for state in NekoState}
+    samples = ((i * sample_every, "sample", None) for i in range(1, int(duration / sample_every) + 1))
+    inputs = 0
+
+    brain.start()
+    for t, kind, argument in heapq.merge(user.events(duration), samples, key=lambda e: e[0]):
+        scheduler.run_until(t)
+        if kind == "sample":
+            seconds_at_level[brain.attention_level] += sample_every
+            seconds_in_state[brain.state.name] += sample_every
+        else:
+            deliver(brain, kind, argument)
+            inputs += 1
+    scheduler.run_until(duration)
+
+    return {
+        "hours": hours,
+        "seed": seed,
+        "inputs": inputs,
+        "lines_spoken": brain.stats_lines_spoken,
+        "lines_per_hour": brain.stats_lines_spoken / hours,
+        "pets_received": brain.stats_pets_received,
+        "times_slept": brain.stats_times_slept,
+        "give_ups": brain.stats_give_ups,
+        "wakeups": scheduler.wakeup_count,
+        "wakeups_per_hour": scheduler.wakeup_count / hours,
+        "hours_at_level": {k: v / 3600.0 for k, v in seconds_at_level.items()},
+        "hours_in_state": {k: v / 3600.0 for k, v in seconds_in_state.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Neko's behavior under a virtual clock")
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the raw result as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = simulate(args.hours, args.seed)
+    result["real_seconds"] = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"Simulated {args.hours:g} h in {result['real_seconds']:.3f} s (seed {args.seed})")
+    print(f"  lines spoken:  {result['lines_spoken']} ({result['lines_per_hour']:.1f}/h)")
+    print(f"  pets received: {result['pets_received']}")
+    print(f"  times slept:   {result['times_slept']}")
+    print(f"  give-ups:      {result['give_ups']}")
+    print(f"  wakeups:       {result['wakeups']} ({result['wakeups_per_hour']:.0f}/h)")
+    for level, hours in result["hours_at_level"].items():
+        print(f"  at {level:<6}     {hours:.2f} h")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import gc
+import sys
+import json
+import random
+import tempfile
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# Does she stay the same size however long she runs? Drives one pet in a
+# fresh offscreen process through a long run of clicks, right-clicks (the
+# context menu opens and closes), drags and foreground window switches,
+# with the stats window and tray menu opened now and then, and fails if
+# resident memory or the number of live QObjects grew past a fixed budget
+# after warm-up.
+#
+#   python tools/soak.py                       # 100k actions
+#   python tools/soak.py --actions 20000 --rss-budget 4 --json
+
+ACTIONS = ("click", "right_click", "drag", "switch")
+WINDOWS = 40           # distinct foreground windows to switch between
+BATCH = 200            # actions per event loop turn
+STATS_EVERY = 5000     # open and close the stats window and tray menu
+WARMUP = 0.1           # share of the run that fills caches before the baseline
+
+
+def live_qobjects(app, neko_app):
+    # Everything reachable from the application, NekoApp and the top-level
+    # widgets; leaked menus and windows are parented to one of those or
+    # are top-level themselves
+    import shiboken6
+    from PySide6.QtCore import QObject
+    from PySide6.QtWidgets import QApplication
+
+    seen = set()
+    for root in [app, neko_app] + QApplication.topLevelWidgets():
+        seen.add(shiboken6.getCppPointer(root)[0])
+        for obj in root.findChildren(QObject):
+            seen.add(shiboken6.getCppPointer(obj)[0])
+    return len(seen)
+
+
+def child(actions, seed):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import Qt, QTimer, QPointF, QEvent, QCoreApplication
+    from PySide6.QtGui import QMouseEvent
+    from PySide6.QtWidgets import QApplication
+    from platform_adapter import process_rss
+
+    app = QApplication([])
+    QApplication.setQuitOnLastWindowClosed(False)
+    import main
+
+    neko_app = main.NekoApp()
+    pet = neko_app.pets[0]
+    rng = random.Random(seed)
+    windows = [f"Window {i}" for i in range(WINDOWS)]
+    warmup = int(actions * WARMUP)
+    counts = dict.fromkeys(ACTIONS, 0)
+    samples = []
+    done = [0]
+
+    def mouse(kind, local, button, buttons):
+        event = QMouseEvent(kind, QPointF(local), QPointF(pet.mapToGlobal(local)), button, buttons,
+                            Qt.NoModifier)
+        QApplication.sendEvent(pet, event)
+
+    def close_popup():
+        popup = QApplication.activePopupWidget()
+        if popup is not None:
+            popup.hide()
+
+    def act(action):
+        centre = pet.rect().center()
+        if action == "click":
+            mouse(QEvent.MouseButtonPress, centre, Qt.LeftButton, Qt.LeftButton)
+            mouse(QEvent.MouseButtonRelease, centre, Qt.LeftButton, Qt.NoButton)
+        elif action == "right_click":
+            # Closes the menu whether it popped up or runs its own loop
+            QTimer.singleShot(0, close_popup)
+            mouse(QEvent.MouseButtonPress, centre, Qt.RightButton, Qt.RightButton)
+            close_popup()
+        elif action == "drag":
+            mouse(QEvent.MouseButtonPress, centre, Qt.LeftButton, Qt.LeftButton)
+            step = centre + main.QPoint(rng.randint(-3, 3), rng.randint(-3, 3))
+            mouse(QEvent.MouseMove, step, Qt.NoButton, Qt.LeftButton)
+            mouse(QEvent.MouseButtonRelease, step, Qt.LeftButton, Qt.NoButton)
+        else:
+            neko_app.focus_changed.emit(rng.choice(windows))
+
+    def open_surfaces():
+        neko_app.open_stats_window(pet)
+        tabs = neko_app.stats_window.tabs
+        for index in range(tabs.count()):
+            tabs.setCurrentIndex(index)
+        neko_app.stats_window.close()
+        neko_app.tray_menu.popup(pet.pos())
+        neko_app.tray_menu.hide()
+
+    def measure():
+        # Deleted-on-close windows and menus go at the next loop turn;
+        # flush them so they don't count as live
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        gc.collect()
+        samples.append({
+            "actions": done[0],
+            "rss_mb": (process_rss() or 0) / (1024 * 1024),
+            "qobjects": live_qobjects(app, neko_app),
+        })
+
+    def step():
+        end = min(actions, done[0] + BATCH)
+        while done[0] < end:
+            action = rng.choice(ACTIONS)
+            act(action)
+            counts[action] += 1
+            done[0] += 1
+            # First thing (so warm-up covers Qt's one-off allocations),
+            # then every STATS_EVERY actions
+            if done[0] % STATS_EVERY == 1:
+                open_surfaces()
+            if done[0] == warmup or done[0] % (actions // 10 or 1) == 0:
+                measure()
+        if done[0] < actions:
+            QTimer.singleShot(0, step)
+        else:
+            app.quit()
+
+    QTimer.singleShot(0, step)
+    app.exec()
+    measure()
+
+    baseline = next(s for s in samples if s["actions"] >= warmup)
+    final = samples[-1]
+    print(json.dumps({
+        "actions": actions,
+        "counts": counts,
+        "samples": samples,
+        "rss_growth_mb": final["rss_mb"] - baseline["rss_mb"],
+        "qobject_growth": final["qobjects"] - baseline["qobjects"],
+    }))
+
+
+def run(actions, seed):
+    # Own data/config dirs so the run neither reads nor writes real state
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+                   XDG_DATA_HOME=os.path.join(home, "data"),
+                   XDG_CONFIG_HOME=os.path.join(home, "config"),
+                   XDG_CACHE_HOME=os.path.join(home, "cache"),
+                   XDG_RUNTIME_DIR=os.path.join(home, "run"))
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(actions), "--seed", str(seed)],
+            env=env, cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and QObject growth over a long run of interactions")
+    parser.add_argument("--actions", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rss-budget", type=float, default=8.0, help="MB of RSS growth allowed after warm-up")
+    parser.add_argument("--qobject-budget", type=int, default=10, help="live QObjects allowed to appear after warm-up")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.child, args.seed)
+        return 0
+
+    result = run(args.actions, args.seed)
+    ok = result["rss_growth_mb"] <= args.rss_budget and result["qobject_growth"] <= args.qobject_budget
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        counts = ", ".join(f"{action.replace('_', '-')} x{n}" for action, n in result["counts"].items())
+        print(f"{result['actions']} actions offscreen: {counts}")
+        print("actions    RSS MB  QObjects")
+        for s in result["samples"]:
+            print(f"{s['actions']:7d} {s['rss_mb']:9.1f} {s['qobjects']:9d}")
+        print(f"growth after warm-up: {result['rss_growth_mb']:+.1f} MB (budget {args.rss_budget:g}), "
+              f"{result['qobject_growth']:+d} QObjects (budget {args.qobject_budget})")
+        print("OK: flat" if ok else "FAIL: grew past the budget")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
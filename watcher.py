@@ -0,0 +1,83 @@
+import os
+
+from PySide6.QtCore import QFileSystemWatcher
+
+
+# Watches a directory for edited, added and removed files and reports them
+# in batches: callback(paths) once things have been quiet for DEBOUNCE ms.
+# QFileSystemWatcher sits on inotify on Linux and ReadDirectoryChangesW on
+# Windows, so nothing polls while nothing changes.
+#
+# Editors often save by writing a temp file and renaming it over the old
+# one, which drops the old inode from the watch; every settled batch
+# re-adds whatever is in the directory now.
+class FileWatcher:
+    DEBOUNCE = 250  # ms
+
+    def __init__(self, directory, scheduler, callback, suffixes=None):
+        self.directory = directory
+        self.callback = callback
+        self.suffixes = tuple(suffixes) if suffixes else None
+        self.batches = 0
+        self.settle_timer = scheduler.timer(self.settle, single_shot=True)
+        self.known = self.scan()
+
+        self.watcher = QFileSystemWatcher()
+        self.watcher.addPath(directory)
+        self.rewatch()
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+    def wanted(self, filename):
+        return self.suffixes is None or filename.endswith(self.suffixes)
+
+    def scan(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return {}
+        found = {}
+        for name in names:
+            if not self.wanted(name):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found[path] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def rewatch(self, changed=()):
+        # Changed files may be new inodes now, so they are watched afresh
+        stale = [path for path in changed if path in self.watcher.files()]
+        if stale:
+            self.watcher.removePaths(stale)
+        watched = set(self.watcher.files())
+        missing = [path for path in self.known if path not in watched]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def on_file_changed(self, path):
+        self.settle_timer.start(self.DEBOUNCE)
+
+    def on_directory_changed(self, path):
+        self.settle_timer.start(self.DEBOUNCE)
+
+    def settle(self):
+        # Whatever the events said, a file changed if its inode, mtime or
+        # size did, or it appeared or went away
+        current = self.scan()
+        changed = sorted(path for path in set(current) | set(self.known)
+                         if current.get(path) != self.known.get(path))
+        self.known = current
+        self.rewatch(changed)
+        if changed:
+            self.batches += 1
+            self.callback(changed)
+
+    def close(self):
+        self.settle_timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
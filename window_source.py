@@ -0,0 +1,424 @@
+import os
+import sys
+import select
+import threading
+from collections import OrderedDict
+
+
+# Which application a window belongs to. Finding out is an OS round trip
+# (process lookup on Windows, a property read on X11), so answers are kept
+# per window handle and the lookup runs once per window, not per switch.
+#
+# With an executor (workers.WorkerPool) lookups run off the GUI thread: a
+# miss returns None right away and the answer is there from the next ask.
+class WindowAppCache:
+    LOOKUP_TIMEOUT = 2.0  # seconds
+
+    def __init__(self, lookup, max_entries=128, executor=None):
+        self.lookup = lookup
+        self.max_entries = max_entries
+        self.executor = executor
+        self._entries = OrderedDict()
+        self._pending = set()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, window):
+        if window in self._entries:
+            self._entries.move_to_end(window)
+            self.hits += 1
+            return self._entries[window]
+        self.misses += 1
+        if self.executor is not None:
+            if window not in self._pending:
+                self._pending.add(window)
+                self.executor.submit(self.lookup, window, name="lookup_app", timeout=self.LOOKUP_TIMEOUT,
+                                     on_done=lambda app: self._store(window, app),
+                                     on_error=lambda error: self._store(window, None))
+            return None
+        try:
+            app = self.lookup(window)
+        except Exception:
+            app = None
+        self._store(window, app)
+        return app
+
+    def _store(self, window, app):
+        self._pending.discard(window)
+        self._entries[window] = app
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# Foreground window sources push "focus changed" events to their listeners
+# instead of the widget asking the OS for the active window on a timer.
+# Listeners are called with the new window handle (0 if unknown). Sources
+# that run their own thread call listeners from that thread, so Qt users
+# should subscribe a signal's emit() to get the event on the GUI thread.
+class ForegroundWindowSource:
+    def __init__(self):
+        self._listeners = []
+        self.current_window = None
+        self.sleeping = False
+        self.suspended = False
+        self.power_saving = False
+        self._sleeping_votes = {}
+        self._suspended_votes = {}
+        self.apps = WindowAppCache(self.lookup_app)
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _vote(self, votes, value, owner):
+        # With several owners (one per pet, all sharing this source) the
+        # source only rests once every one of them asks it to
+        if owner is None:
+            return value
+        votes[owner] = value
+        return all(votes.values())
+
+    def set_sleeping(self, sleeping, owner=None):
+        # Sources that cost something per check can slow down while she sleeps
+        sleeping = self._vote(self._sleeping_votes, sleeping, owner)
+        if sleeping != self.sleeping:
+            self.sleeping = sleeping
+            self.sleeping_changed()
+
+    def set_suspended(self, suspended, owner=None):
+        # The user is away; sources that poll can stop until they're back
+        suspended = self._vote(self._suspended_votes, suspended, owner)
+        if suspended != self.suspended:
+            self.suspended = suspended
+            self.suspended_changed()
+
+    def sleeping_changed(self):
+        pass
+
+    def suspended_changed(self):
+        pass
+
+    def set_power_saving(self, power_saving):
+        # On battery; sources that poll can poll less
+        self.power_saving = power_saving
+
+    def lookup_app(self, window):
+        # Lowercase application name for a window handle, None if unknown
+        return None
+
+    def set_executor(self, executor):
+        # Where blocking OS calls should run (see workers.WorkerPool)
+        self.apps.executor = executor
+
+    def app_for(self, window):
+        if not window:
+            return None
+        return self.apps.get(window)
+
+    def _emit(self, window):
+        window = window or 0
+        if window == self.current_window:
+            return
+        self.current_window = window
+        for callback in list(self._listeners):
+            callback(window)
+
+
+class FakeWindowSource(ForegroundWindowSource):
+    # In-process source for tests and simulations: focus() stands in for
+    # the user clicking into another window.
+    def __init__(self):
+        super().__init__()
+        self.window_apps = {}
+
+    def focus(self, window, app=None):
+        if app is not None:
+            self.window_apps[window] = app
+        self._emit(window)
+
+    def lookup_app(self, window):
+        return self.window_apps.get(window)
+
+
+class AdaptivePollingSource(ForegroundWindowSource):
+    # Fallback for platforms without focus notifications. Polls quickly right
+    # after a switch, then backs off while nothing changes, and backs off much
+    # further while she is asleep. Polls run as scheduler jobs on the GUI
+    # thread, so they share wakeups with everything else.
+    FAST_INTERVAL = 0.25
+    AWAKE_INTERVAL = 1.0
+    SLEEPING_INTERVAL = 5.0
+    BACKOFF = 1.5
+    POWER_SAVING_FACTOR = 2.0
+    POLL_TIMEOUT = 2.0
+
+    def __init__(self, get_foreground, scheduler, lookup_app=None):
+        super().__init__()
+        self.get_foreground = get_foreground
+        if lookup_app is not None:
+            self.lookup_app = lookup_app
+        self.interval = self.FAST_INTERVAL
+        self.poll_timer = scheduler.timer(self.poll, single_shot=True)
+        self.executor = None
+        self._poll_job = None
+        self._resume = False
+
+    def set_executor(self, executor):
+        super().set_executor(executor)
+        self.executor = executor
+
+    def start(self):
+        if self.poll_timer.is_active():
+            return
+        self._emit(self.get_foreground())
+        self.poll_timer.start(self.interval * 1000)
+
+    def stop(self):
+        self.poll_timer.stop()
+        self._cancel_poll()
+
+    def _cancel_poll(self):
+        if self._poll_job is not None:
+            self.executor.cancel(self._poll_job)
+            self._poll_job = None
+
+    def sleeping_changed(self):
+        if not self.sleeping and self.poll_timer.is_active():
+            # Waking up should not inherit a 5 second sleeping interval
+            self.interval = self.FAST_INTERVAL
+            self.poll_timer.start(self.interval * 1000)
+
+    def suspended_changed(self):
+        if self.suspended:
+            self._resume = self.poll_timer.is_active() or self._poll_job is not None
+            self.poll_timer.stop()
+            self._cancel_poll()
+        elif self._resume:
+            self._resume = False
+            self.interval = self.FAST_INTERVAL
+            self.poll()
+
+    def max_interval(self):
+        interval = self.SLEEPING_INTERVAL if self.sleeping else self.AWAKE_INTERVAL
+        if self.power_saving:
+            interval *= self.POWER_SAVING_FACTOR
+        return interval
+
+    def poll(self):
+        if self.executor is not None:
+            # The OS call can stall; the answer comes back on this thread
+            self._poll_job = self.executor.submit(
+                self.get_foreground, name="get_foreground", timeout=self.POLL_TIMEOUT,
+                on_done=self._polled, on_error=lambda error: self._polled(self.current_window))
+            return
+        try:
+            window = self.get_foreground()
+        except Exception:
+            window = self.current_window
+        self._polled(window)
+
+    def _polled(self, window):
+        self._poll_job = None
+        previous = self.current_window
+        self._emit(window)
+        if self.current_window != previous:
+            self.interval = self.FAST_INTERVAL
+        else:
+            self.interval = min(self.interval * self.BACKOFF, self.max_interval())
+        self.poll_timer.start(self.interval * 1000)
+
+
+class WinEventForegroundSource(ForegroundWindowSource):
+    # Windows: SetWinEventHook(EVENT_SYSTEM_FOREGROUND). With an out-of-context
+    # hook the callback is delivered on the thread that installed it, as part
+    # of its normal message pump, so it must be started from the GUI thread.
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+
+        self._user32 = ctypes.windll.user32
+        self._user32.SetWinEventHook.restype = wintypes.HANDLE
+        self._user32.GetForegroundWindow.restype = wintypes.HWND
+        self._proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        self._proc = None
+        self._hook = None
+
+    def start(self):
+        if self._hook:
+            return
+        # Keep a reference to the ctypes callback or it is garbage collected
+        self._proc = self._proc_type(self._on_event)
+        self._hook = self._user32.SetWinEventHook(
+            self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND,
+            0, self._proc, 0, 0, self.WINEVENT_OUTOFCONTEXT
+        )
+        if not self._hook:
+            self._proc = None
+            raise OSError("SetWinEventHook failed")
+        self._emit(self._user32.GetForegroundWindow())
+
+    def stop(self):
+        if self._hook:
+            self._user32.UnhookWinEvent(self._hook)
+            self._hook = None
+            self._proc = None
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, thread_id, timestamp):
+        self._emit(hwnd)
+
+    def lookup_app(self, window):
+        return _win32_window_app(window)
+
+
+class X11ActiveWindowSource(ForegroundWindowSource):
+    # Linux/X11: listen for PropertyNotify on the root window and re-read
+    # _NET_ACTIVE_WINDOW when the window manager changes it. The listener
+    # thread sleeps in select() until the X server sends something.
+    def __init__(self, display_name=None):
+        super().__init__()
+        from Xlib import X, display
+
+        self._X = X
+        self._display = display.Display(display_name)
+        self._root = self._display.screen().root
+        self._atom = self._display.intern_atom('_NET_ACTIVE_WINDOW')
+        self._stop_read, self._stop_write = os.pipe()
+        self._running = False
+        self._thread = None
+        self._display_name = display_name
+        # Xlib connections aren't thread safe and the listener thread owns
+        # the first one, so app lookups get their own, one at a time
+        self._lookup_display = None
+        self._lookup_lock = threading.Lock()
+
+    def start(self):
+        if self._running:
+            return
+        self._root.change_attributes(event_mask=self._X.PropertyChangeMask)
+        self._display.flush()
+        self._emit(self.active_window())
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="neko-focus-x11", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._lookup_lock:
+            if self._lookup_display is not None:
+                self._lookup_display.close()
+                self._lookup_display = None
+        if not self._running:
+            return
+        self._running = False
+        os.write(self._stop_write, b"x")
+
+    def lookup_app(self, window):
+        # WM_CLASS is (instance, class); the class names the application
+        with self._lookup_lock:
+            if self._lookup_display is None:
+                from Xlib import display
+                self._lookup_display = display.Display(self._display_name)
+            wm_class = self._lookup_display.create_resource_object('window', window).get_wm_class()
+        if not wm_class:
+            return None
+        return wm_class[-1].lower()
+
+    def active_window(self):
+        prop = self._root.get_full_property(self._atom, self._X.AnyPropertyType)
+        if prop is None or not len(prop.value):
+            return 0
+        return int(prop.value[0])
+
+    def _run(self):
+        fd = self._display.fileno()
+        while self._running:
+            # Drain anything Xlib has already buffered before blocking
+            while self._display.pending_events():
+                event = self._display.next_event()
+                if event.type == self._X.PropertyNotify and event.atom == self._atom:
+                    self._emit(self.active_window())
+            readable, _, _ = select.select([fd, self._stop_read], [], [])
+            if self._stop_read in readable:
+                break
+        self._display.close()
+        os.close(self._stop_read)
+        os.close(self._stop_write)
+
+
+def _win32_get_foreground():
+    import win32gui
+    return win32gui.GetForegroundWindow()
+
+
+def _win32_window_app(hwnd):
+    # Executable name of the process that owns hwnd, e.g. "code.exe"
+    import ctypes
+    from ctypes import wintypes
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    pid = wintypes.DWORD()
+    user32.GetWindowThreadProcessId(wintypes.HWND(hwnd), ctypes.byref(pid))
+    if not pid.value:
+        return None
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    process = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+    if not process:
+        return None
+    try:
+        size = wintypes.DWORD(260)
+        path = ctypes.create_unicode_buffer(size.value)
+        if not kernel32.QueryFullProcessImageNameW(process, 0, path, ctypes.byref(size)):
+            return None
+        return os.path.basename(path.value).lower()
+    finally:
+        kernel32.CloseHandle(process)
+
+
+def open_foreground_source(callback, scheduler, executor=None):
+    # Best available source for this machine, subscribed to callback and
+    # already started. Event-driven backends are preferred; polling is only
+    # used when they are unavailable. With an executor, blocking OS calls
+    # (polling, app lookups) run on it instead of the calling thread.
+    candidates = []
+    if sys.platform == 'win32':
+        candidates.append(WinEventForegroundSource)
+        candidates.append(lambda: AdaptivePollingSource(_win32_get_foreground, scheduler, _win32_window_app))
+    elif os.environ.get('DISPLAY'):
+        candidates.append(X11ActiveWindowSource)
+
+    for factory in candidates:
+        try:
+            source = factory()
+            if executor is not None:
+                source.set_executor(executor)
+            source.subscribe(callback)
+            source.start()
+            return source
+        except Exception:
+            continue
+
+    # Nothing to watch (e.g. Wayland or no display): she simply never sees
+    # window switches.
+    source = ForegroundWindowSource()
+    source.subscribe(callback)
+    return source
@@ -0,0 +1,120 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Signal
+
+from metrics import REGISTRY, callback_name
+
+
+# A submitted call. Once it is finished, cancelled or timed out, nothing
+# more happens for it: a result that turns up later is dropped.
+class Job:
+    __slots__ = ("name", "key", "on_done", "on_error", "future", "timeout_entry", "finished", "cancelled",
+                 "timed_out")
+
+    def __init__(self, name, key, on_done, on_error):
+        self.name = name
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future = None
+        self.timeout_entry = None
+        self.finished = False
+        self.cancelled = False
+        self.timed_out = False
+
+    def is_pending(self):
+        return not (self.finished or self.cancelled or self.timed_out)
+
+
+# Runs blocking platform calls (COM, window and process lookups, PNG
+# decoding) on a few worker threads so the GUI thread never waits on the
+# OS. Results come back as a queued signal and on_done(result) /
+# on_error(exception) run on the GUI thread.
+#
+# A job with a key supersedes any pending job with the same key, so asking
+# again ("what's in front now?") cancels the stale question. A timeout (on
+# the shared scheduler) gives up on a call that hangs; the thread can't be
+# interrupted, but its late answer is thrown away and on_error gets a
+# TimeoutError.
+class WorkerPool(QObject):
+    _finished = Signal(object, object, object)
+
+    def __init__(self, scheduler, max_workers=2, registry=None, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.registry = registry or REGISTRY
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="neko-worker")
+        self._by_key = {}
+        self.submitted = 0
+        self.cancelled = 0
+        self.timeouts = 0
+        self._finished.connect(self._deliver)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, timeout=None, key=None, name=None):
+        job = Job(name or callback_name(fn), key, on_done, on_error)
+        if key is not None:
+            stale = self._by_key.get(key)
+            if stale is not None:
+                self.cancel(stale)
+            self._by_key[key] = job
+        if timeout is not None:
+            job.timeout_entry = self.scheduler.call_later(timeout, lambda: self._time_out(job))
+        self.submitted += 1
+        job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def cancel(self, job):
+        if not job.is_pending():
+            return
+        job.cancelled = True
+        job.future.cancel()
+        self.cancelled += 1
+        self._retire(job)
+
+    def shutdown(self):
+        for job in list(self._by_key.values()):
+            self.cancel(job)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, fn, args):
+        # Worker thread
+        if not job.is_pending():
+            return
+        started = time.perf_counter()
+        try:
+            result, error = fn(*args), None
+        except Exception as e:
+            result, error = None, e
+        self.registry.observe("worker:" + job.name, time.perf_counter() - started)
+        self._finished.emit(job, result, error)
+
+    def _deliver(self, job, result, error):
+        # GUI thread
+        if not job.is_pending():
+            return
+        job.finished = True
+        self._retire(job)
+        if error is None:
+            if job.on_done is not None:
+                job.on_done(result)
+        elif job.on_error is not None:
+            job.on_error(error)
+
+    def _time_out(self, job):
+        job.timeout_entry = None
+        if not job.is_pending():
+            return
+        job.timed_out = True
+        job.future.cancel()
+        self.timeouts += 1
+        self._retire(job)
+        if job.on_error is not None:
+            job.on_error(TimeoutError(f"{job.name} took longer than expected"))
+
+    def _retire(self, job):
+        if job.timeout_entry is not None:
+            self.scheduler.cancel(job.timeout_entry)
+            job.timeout_entry = None
+        if job.key is not None and self._by_key.get(job.key) is job:
+            del self._by_key[job.key]